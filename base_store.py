@@ -0,0 +1,246 @@
+import zlib
+from contextlib import nullcontext
+
+from fuzzy_index import TrigramIndex
+from sort_index import sort_key
+
+
+# columns of sorted views of records, records with same values go in ID order
+ORDERS = {
+    'id': [],
+    'surname': ['Фамилия', 'Имя', 'Отчество'],
+    'company': ['Компания', 'Фамилия', 'Имя'],
+}
+
+
+class ConflictError(Exception):
+    """Raised when record was changed by someone else after it was read"""
+
+
+class BaseStore:
+    """
+    Interface of records storage used by Phonebook.
+    Records are returned as mappings of values by columns,
+    record ID is stored in first column and is assigned by storage
+    """
+
+    # (state, trigram index) of last fuzzy search, see fuzzy_search
+    _fuzzy_cache = None
+
+    @classmethod
+    def create(cls, filename: str, columns: list):
+        """Creates empty phonebook file"""
+        raise NotImplementedError
+
+    def __len__(self):
+        return self.count()
+
+    def __contains__(self, record_id):
+        return self.get(record_id) is not None
+
+    @staticmethod
+    def version(record) -> int:
+        """
+        Returns version of record, it changes whenever any value of record changes.
+        Version is calculated from values, so it survives compaction and format conversion
+        """
+        return zlib.crc32('\x1f'.join(record.values()).encode('utf-8'))
+
+    def get(self, record_id):
+        """Returns record by it's ID or None if record not found"""
+        raise NotImplementedError
+
+    def records(self) -> list:
+        """Returns list of all records in file order"""
+        raise NotImplementedError
+
+    def iter_records(self):
+        """
+        A generator that returns all records in file order,
+        storages that can read records one by one override it, so they are not kept in memory
+        """
+        yield from self.records()
+
+    def search(self, query: str) -> list:
+        """Returns list of records containing all words of query, matched by prefix"""
+        raise NotImplementedError
+
+    def search_ids(self, query: str) -> set:
+        """
+        Returns IDs of records found by search, storages that can find them
+        without reading records override it
+        """
+        return {record[self.columns[0]] for record in self.search(query)}
+
+    def find_by_phone(self, number: str, mode: str = 'exact') -> list:
+        """Returns list of records with matching number, mode is "exact", "prefix" or "suffix" """
+        raise NotImplementedError
+
+    def fuzzy_search(self, query: str, limit: int = None) -> list:
+        """
+        Returns list of records with names or company similar to every word of query,
+        most similar records go first. Index is built from all records and kept
+        until state of storage changes, only found records are read then.
+        Storages that keep records in memory override it
+        """
+        index = self._fuzzy_index()
+        ranked = sorted(
+            index.search(query), key=lambda item: (-item[1], self.id_key(item[0]))
+        )
+        records = (self.get(record_id) for record_id, _ in ranked[:limit])
+        return [record for record in records if record is not None]
+
+    def _fuzzy_index(self) -> TrigramIndex:
+        """Returns trigram index of names, it's built again only if records were changed"""
+        state = self.state()
+        if state is not None and self._fuzzy_cache is not None and self._fuzzy_cache[0] == state:
+            return self._fuzzy_cache[1]
+
+        names = [column for column in self.columns[1:] if 'номер' not in column]
+        index = TrigramIndex.build(
+            (record[self.columns[0]], [record[column] for column in names])
+            for record in self.iter_records()
+        )
+        if state is not None:
+            self._fuzzy_cache = (state, index)
+        return index
+
+    def scan(self, query: str, workers: int = None) -> list:
+        """
+        Returns list of records containing every term of query anywhere in values,
+        records are in ID order. Used for substring queries index can't serve
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+        records = [record for record in self.records() if self._contains(record.values(), terms)]
+        return sorted(records, key=lambda record: self.id_key(record[self.columns[0]]))
+
+    @staticmethod
+    def _contains(values, terms: list) -> bool:
+        """Returns True if every lowercase term is substring of any value"""
+        text = '\n'.join(values).lower()
+        return all(term in text for term in terms)
+
+    @staticmethod
+    def id_key(record_id: str):
+        """Sort key of record ID, digit IDs go in numeric order before others"""
+        return (0, int(record_id), '') if record_id.isdigit() else (1, 0, record_id)
+
+    def count(self) -> int:
+        """Returns count of records"""
+        raise NotImplementedError
+
+    def page(self, start: int, count: int) -> list:
+        """Returns list of records from start to start + count in file order"""
+        raise NotImplementedError
+
+    def sorted_page(self, order: str, start: int, count: int) -> list:
+        """
+        Returns list of records from start to start + count in passed order.
+        All records are sorted on every call, storages that keep sorted indexes override it
+
+        :param order: key of ORDERS
+        :param start: number of first record, starting from 0
+        :param count: count of records
+        """
+        records = sorted(self.records(), key=lambda record: self._sort_key(order, record))
+        return records[start:start + count]
+
+    def sorted_position(self, order: str, prefix: str) -> int:
+        """
+        Returns number of first record in passed order which first sorted value
+        starts with prefix or goes after it, in ID order number of first record
+        with ID not less than prefix
+
+        :param order: key of ORDERS
+        :param prefix: beginning of value, e.g. first letter of surname
+        """
+        target = self._prefix_key(order, prefix)
+        return sum(1 for record in self.records() if self._sort_key(order, record) < target)
+
+    def _sort_key(self, order: str, record) -> tuple:
+        return sort_key(
+            [record[column] for column in ORDERS[order]], self.id_key(record[self.columns[0]])
+        )
+
+    def _prefix_key(self, order: str, prefix: str) -> tuple:
+        """Returns beginning of sort key that goes right before records starting with prefix"""
+        if ORDERS[order]:
+            return sort_key([prefix], ())[:1]
+        return (self.id_key(prefix),)
+
+    def next_id(self) -> int:
+        """Returns ID that will be assigned to next added record"""
+        raise NotImplementedError
+
+    def last_id(self) -> int:
+        """Returns biggest assigned record ID or 0 if there are no records"""
+        return self.next_id() - 1
+
+    def add(self, record: dict) -> dict:
+        """Adds record and returns it with assigned ID"""
+        return self.add_many([record])[0]
+
+    def add_many(self, records: list) -> list:
+        """Adds records at once and returns them with assigned IDs"""
+        raise NotImplementedError
+
+    def update(self, record_id, changes: dict, version: int = None) -> bool:
+        """
+        Updates record fields, returns False if record not found.
+        Raises ConflictError if version is passed and record has other version
+        """
+        raise NotImplementedError
+
+    def delete(self, record_id, version: int = None) -> bool:
+        """
+        Deletes record, returns False if record not found.
+        Raises ConflictError if version is passed and record has other version
+        """
+        raise NotImplementedError
+
+    def change_many(self, changes: list) -> int:
+        """
+        Updates and deletes several records at once. Versions of all records are checked
+        before anything is changed, so ConflictError leaves records untouched.
+        Returns count of changed records, missing records are skipped.
+        Storages that can write all changes at once override it
+
+        :param changes: list of (record ID, dict of new values or None to delete record,
+            version of record or None)
+        """
+        with self.batch():
+            for record_id, _, version in changes:
+                record = self.get(record_id)
+                if version is not None and record is not None and self.version(record) != version:
+                    raise ConflictError(str(record_id))
+
+            changed = 0
+            for record_id, fields, _ in changes:
+                if fields is None:
+                    changed += self.delete(record_id)
+                else:
+                    changed += self.update(record_id, fields)
+        return changed
+
+    def write(self, records: list):
+        """Replaces all records with passed ones"""
+        raise NotImplementedError
+
+    def state(self):
+        """
+        Returns value that changes whenever records are changed, by this or other process.
+        Used to tell if cached results are still valid, None if changes can't be detected
+        """
+        return None
+
+    def batch(self):
+        """
+        Returns context manager that groups several changes,
+        so other processes don't see them interleaved with their own
+        """
+        return nullcontext()
+
+    def close(self):
+        """Finishes pending work, should be called before exit"""
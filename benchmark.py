@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import subprocess
+from itertools import islice
+
+try:
+    import resource
+except ImportError:
+    # peak memory is not reported on Windows
+    resource = None
+
+from dataset import generate_records, SURNAMES, MALE_NAMES, LATIN_SURNAMES
+from storage import open_store, create_file, convert
+
+
+COLUMNS = ['ИД', 'Имя', 'Фамилия', 'Отчество', 'Компания', 'Рабочий номер', 'Личный номер']
+FORMATS = ['csv', 'pbk', 'db']
+# operations in order they run, store is loaded by first one
+OPERATIONS = ['load', 'search', 'phone', 'paginate', 'add', 'edit', 'delete']
+# version of results layout, bump when it changes
+RESULTS_VERSION = 1
+
+
+def dataset_file(folder: str, rows: int, file_format: str, seed: int) -> str:
+    """
+    Returns path to generated phonebook, file is generated once and reused by next runs.
+    Other formats are converted from csv file of same size and seed
+
+    :param folder: folder of generated files
+    :param rows: count of records
+    :param file_format: "csv", "pbk" or "db"
+    :param seed: seed of generated records
+    """
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f'phonebook_{rows}_{seed}.{file_format}')
+    if os.path.exists(path):
+        return path
+
+    # file gets its name only when it's complete, so interrupted generation isn't reused
+    temp = os.path.join(folder, f'generating.{file_format}')
+    if file_format == 'csv':
+        _generate(temp, rows, seed)
+    else:
+        convert(dataset_file(folder, rows, 'csv', seed), temp, COLUMNS)
+    os.replace(temp, path)
+    _remove_sidecars(temp)
+    return path
+
+
+def _generate(path: str, rows: int, seed: int, batch_size: int = 100000):
+    """Writes generated records to new phonebook file by batches"""
+    create_file(path, COLUMNS)
+    store = open_store(path, COLUMNS)
+    try:
+        records = generate_records(rows, seed)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            store.add_many(batch)
+    finally:
+        store.close()
+
+
+def _remove_sidecars(path: str):
+    """Removes journal, indexes and other files stored next to phonebook file"""
+    folder, name = os.path.split(path)
+    for filename in os.listdir(folder or '.'):
+        if filename.startswith(name + '.'):
+            os.remove(os.path.join(folder, filename))
+
+
+def _stats(latencies: list, seconds: float) -> dict:
+    """Returns throughput and latency percentiles of operation"""
+    latencies = sorted(latencies)
+
+    def percentile(share: float) -> float:
+        position = min(int(len(latencies) * share), len(latencies) - 1)
+        return round(latencies[position] * 1000, 3)
+
+    return {
+        'count': len(latencies),
+        'seconds': round(seconds, 3),
+        'ops_per_sec': round(len(latencies) / seconds, 1) if seconds else None,
+        'p50_ms': percentile(0.5),
+        'p99_ms': percentile(0.99),
+    }
+
+
+def _timed(calls) -> dict:
+    """Runs calls one by one and returns their stats"""
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return _stats(latencies, time.perf_counter() - started)
+
+
+def _peak_rss() -> float:
+    """Returns peak resident memory of process in megabytes or None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_case(source: str, operations: int, seed: int) -> dict:
+    """
+    Runs all operations against copy of phonebook file and returns results.
+    Should run in separate process, so peak memory belongs to this case only
+
+    :param source: path to generated phonebook
+    :param operations: count of calls of every operation except load
+    :param seed: seed of random queries
+    """
+    rng = random.Random(seed)
+    folder, name = os.path.split(source)
+    path = os.path.join(folder, 'run_' + name)
+    _remove_sidecars(path)
+    shutil.copyfile(source, path)
+
+    results = {}
+    store = open_store(path, COLUMNS)
+    try:
+        # load is opening file and first query, indexes are built by it
+        results['load'] = _timed([lambda: (store.count(), store.search('иван'))])
+        rows = store.count()
+        last_id = store.last_id()
+
+        surnames = SURNAMES + LATIN_SURNAMES
+        queries = [
+            rng.choice(surnames)[:rng.randint(3, 6)] if rng.random() < 0.5
+            else f'{rng.choice(MALE_NAMES)} {rng.choice(surnames)}'
+            for _ in range(operations)
+        ]
+        results['search'] = _timed(lambda query=query: store.search(query) for query in queries)
+
+        numbers = [f'{rng.randrange(10 ** 4):04d}' for _ in range(operations)]
+        results['phone'] = _timed(
+            lambda number=number: store.find_by_phone(number, 'suffix') for number in numbers
+        )
+
+        starts = [rng.randrange(max(rows, 1)) for _ in range(operations)]
+        results['paginate'] = _timed(lambda start=start: store.page(start, 9) for start in starts)
+
+        records = list(generate_records(operations, seed + 1))
+        results['add'] = _timed(lambda record=record: store.add(record) for record in records)
+
+        ids = [rng.randint(1, last_id) for _ in range(operations)]
+        results['edit'] = _timed(
+            lambda record_id=record_id: store.update(record_id, {'Компания': 'ООО "Бенчмарк"'})
+            for record_id in ids
+        )
+
+        ids = rng.sample(range(1, last_id + 1), min(operations, last_id))
+        results['delete'] = _timed(lambda record_id=record_id: store.delete(record_id) for record_id in ids)
+    finally:
+        store.close()
+        os.remove(path)
+        _remove_sidecars(path)
+
+    return {
+        'rows': rows,
+        'file_size': os.path.getsize(source),
+        'peak_rss_mb': _peak_rss(),
+        'operations': results,
+    }
+
+
+def run(rows_list: list, formats: list, operations: int, folder: str, seed: int) -> dict:
+    """Generates datasets and runs every case in separate process, returns all results"""
+    cases = []
+    for rows in rows_list:
+        for file_format in formats:
+            print(f'Подготовка: {rows} записей, {file_format}', file=sys.stderr, flush=True)
+            source = dataset_file(folder, rows, file_format, seed)
+
+            print(f'Замеры: {rows} записей, {file_format}', file=sys.stderr, flush=True)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--case', source,
+                 '--operations', str(operations), '--seed', str(seed)],
+                check=True, stdout=subprocess.PIPE
+            ).stdout
+            cases.append({'format': file_format, **json.loads(output)})
+
+    return {
+        'version': RESULTS_VERSION,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'operations_per_case': operations,
+        'cases': cases,
+    }
+
+
+def compare(previous: dict, current: dict) -> list:
+    """
+    Returns lines of table with change of p50 latency and throughput
+    of every operation found in both results
+    """
+    old_cases = {(case['rows'], case['format']): case for case in previous.get('cases', [])}
+    lines = [f'{"записей":>10} {"формат":>6} {"операция":>9} {"p50, мс":>18} {"оп/с":>22}']
+    for case in current['cases']:
+        old_case = old_cases.get((case['rows'], case['format']))
+        if old_case is None:
+            continue
+        for operation in OPERATIONS:
+            new = case['operations'].get(operation)
+            old = old_case['operations'].get(operation)
+            if new is None or old is None:
+                continue
+            lines.append(
+                f'{case["rows"]:>10} {case["format"]:>6} {operation:>9} '
+                f'{_change(old["p50_ms"], new["p50_ms"]):>18} '
+                f'{_change(old["ops_per_sec"], new["ops_per_sec"]):>22}'
+            )
+    return lines
+
+
+def _change(old: float, new: float) -> str:
+    if not old or new is None:
+        return f'{old} -> {new}'
+    return f'{old} -> {new} ({(new - old) / old:+.0%})'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='benchmark.py',
+        description='Замеры скорости справочника на сгенерированных данных, результат в JSON'
+    )
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[10000],
+        help='размеры справочников, например 10000 1000000 10000000'
+    )
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument(
+        '--operations', type=int, default=1000, help='количество вызовов каждой операции'
+    )
+    parser.add_argument(
+        '--data', default='bench_data', help='папка сгенерированных справочников'
+    )
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', help='файл результатов, по умолчанию stdout')
+    parser.add_argument('--compare', help='файл результатов прошлого запуска для сравнения')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    # single case runs in child process, see run
+    if options.case:
+        json.dump(run_case(options.case, options.operations, options.seed), sys.stdout)
+        return 0
+
+    results = run(options.rows, options.formats, options.operations, options.data, options.seed)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print('\n'.join(compare(previous, results)), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
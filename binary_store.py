@@ -0,0 +1,347 @@
+import os
+import struct
+from bisect import bisect_left
+
+from locking import FileLock
+from mapped import MappedFile
+from store import RecordStore
+from table import Record, RecordTable
+
+
+# magic, version, columns count, indexed records count, ID index entries count,
+# offset of offset table
+HEADER = struct.Struct('<4sHHQQQ')
+MAGIC = b'PBK1'
+VERSION = 1
+
+# length of column name, record or field
+NAME_LENGTH = struct.Struct('<H')
+LENGTH = struct.Struct('<I')
+# offset of record in offset table
+OFFSET = struct.Struct('<Q')
+# (ID, number of record) in ID index
+INDEX_ENTRY = struct.Struct('<qQ')
+
+
+def _index_key(record_id: str) -> int:
+    """
+    Returns ID as integer for ID index or None if ID can't be indexed.
+    IDs with leading zeros are not indexed, otherwise '007' and '7' would be same key
+    """
+    if record_id.isdigit() and record_id.isascii() and len(record_id) < 19 \
+            and (record_id[0] != '0' or record_id == '0'):
+        return int(record_id)
+    return None
+
+
+class BinaryStore(RecordStore):
+    """
+    Storage of records in binary file, layout of file:
+
+    - header, see HEADER
+    - column names, each is prefixed with length
+    - records, each is prefixed with total length,
+      fields of record are prefixed with their length
+    - offset table with offset of every indexed record in file order
+    - ID index of (ID, number of record) sorted by ID, only digit IDs are indexed
+    - records appended after file was written, they are not indexed
+      and are moved into indexed part by compaction
+
+    Record with digit ID is found with binary search over ID index
+    without reading other records
+    """
+
+    @classmethod
+    def create(cls, filename: str, columns: list):
+        """Creates empty file with header only"""
+        with open(filename, 'wb') as f:
+            f.write(cls._encode_header(columns, 0, 0, 0))
+
+    @staticmethod
+    def _encode_header(columns: list, count: int, indexed: int, table_offset: int) -> bytes:
+        names = b''
+        for column in columns:
+            name = column.encode('utf-8')
+            names += NAME_LENGTH.pack(len(name)) + name
+
+        if not table_offset:
+            # file without records, appended records start after names
+            table_offset = HEADER.size + len(names)
+        return HEADER.pack(MAGIC, VERSION, len(columns), count, indexed, table_offset) + names
+
+
+    def _header(self, data) -> tuple:
+        """
+        Returns (records start, records count, ID index entries count, offset table offset)
+        of mapped file
+        """
+        if len(data) < HEADER.size:
+            raise ValueError(f'{self.filename}: файл справочника поврежден')
+
+        magic, version, columns, count, indexed, table_offset = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{self.filename}: неизвестный формат файла')
+
+        offset = HEADER.size
+        for _ in range(columns):
+            offset += NAME_LENGTH.size + NAME_LENGTH.unpack_from(data, offset)[0]
+        return offset, count, indexed, table_offset
+
+    def _tail_start(self, data) -> int:
+        """Returns offset of first record that was appended after file was written"""
+        _, count, indexed, table_offset = self._header(data)
+        return table_offset + count * OFFSET.size + indexed * INDEX_ENTRY.size
+
+    def _decode(self, data, offset: int) -> tuple:
+        """Returns (list of fields, offset of next record) of record at offset"""
+        length = LENGTH.unpack_from(data, offset)[0]
+        end = offset + LENGTH.size + length
+
+        row = []
+        position = offset + LENGTH.size
+        while position < end:
+            size = LENGTH.unpack_from(data, position)[0]
+            position += LENGTH.size
+            row.append(bytes(data[position:position + size]).decode('utf-8'))
+            position += size
+        return row, end
+
+    def _first_field(self, data, offset: int) -> bytes:
+        """Returns raw first field of record at offset, nothing is decoded"""
+        position = offset + LENGTH.size
+        size = LENGTH.unpack_from(data, position)[0]
+        position += LENGTH.size
+        return bytes(data[position:position + size])
+
+    def _offsets(self, data, start: int = 0, end: int = None):
+        """A generator that returns offsets of records from start to end offset"""
+        if end is None:
+            end = len(data)
+        position = start
+        while position < end:
+            yield position
+            position += LENGTH.size + LENGTH.unpack_from(data, position)[0]
+
+    def _all_offsets(self, data):
+        """A generator that returns offsets of all records in file order"""
+        records_start, _, _, table_offset = self._header(data)
+        yield from self._offsets(data, records_start, table_offset)
+        yield from self._offsets(data, self._tail_start(data))
+
+    def _encode_row(self, row: list) -> bytes:
+        fields = b''.join(
+            LENGTH.pack(len(value)) + value
+            for value in (field.encode('utf-8') for field in row)
+        )
+        return LENGTH.pack(len(fields)) + fields
+
+
+    # file format specific methods of RecordStore
+
+    def _read_rows(self, start: int = None):
+        with MappedFile(self.filename) as mapped:
+            data = mapped.data
+            offsets = self._all_offsets(data) if start is None else self._offsets(data, start)
+            for offset in offsets:
+                yield self._decode(data, offset)[0]
+
+    def _row_ids(self, mapped: MappedFile):
+        data = mapped.data
+        for offset in self._all_offsets(data):
+            yield self._first_field(data, offset)
+
+    def _encode_rows(self, rows: list) -> bytes:
+        return b''.join(self._encode_row(row) for row in rows)
+
+    def _appended(self, file_signature: tuple, data: bytes):
+        # appended records are found by walking tail, there are no row offsets to update
+        pass
+
+    def _lazy_count(self) -> int:
+        with MappedFile(self.filename) as mapped:
+            data = mapped.data
+            _, count, _, _ = self._header(data)
+            return count + sum(1 for _ in self._offsets(data, self._tail_start(data)))
+
+    def _lazy_rows(self, start: int, count: int) -> list:
+        rows = []
+        with MappedFile(self.filename) as mapped:
+            data = mapped.data
+            _, indexed_count, _, table_offset = self._header(data)
+
+            # indexed records are read with single lookup in offset table
+            for number in range(start, min(start + count, indexed_count)):
+                offset = OFFSET.unpack_from(data, table_offset + number * OFFSET.size)[0]
+                rows.append(self._decode(data, offset)[0])
+
+            if len(rows) < count:
+                skip = max(start - indexed_count, 0)
+                for offset in self._offsets(data, self._tail_start(data)):
+                    if skip:
+                        skip -= 1
+                        continue
+                    if len(rows) == count:
+                        break
+                    rows.append(self._decode(data, offset)[0])
+        return rows
+
+    def _shards(self, mapped: MappedFile, count: int) -> list:
+        # indexed records are split by offset table, tail goes as separate shard
+        data = mapped.data
+        records_start, indexed_count, _, table_offset = self._header(data)
+
+        bounds = [records_start]
+        for number in range(1, count):
+            ordinal = indexed_count * number // count
+            if ordinal:
+                offset = OFFSET.unpack_from(data, table_offset + ordinal * OFFSET.size)[0]
+                bounds.append(max(offset, bounds[-1]))
+        bounds.append(table_offset)
+
+        shards = [(first, last) for first, last in zip(bounds, bounds[1:]) if first < last]
+        tail_start = self._tail_start(data)
+        if tail_start < len(data):
+            shards.append((tail_start, len(data)))
+        return shards
+
+    def _scan_range(self, mapped: MappedFile, start: int, end: int, terms: list, touched: set):
+        data = mapped.data
+        matches = []
+        changed = []
+        contains = self._contains
+        for offset in self._offsets(data, start, end):
+            # whole record is decoded at once, lengths are dropped as invalid characters
+            # or stay as control ones, so most records are skipped without parsing fields
+            length = LENGTH.unpack_from(data, offset)[0]
+            text = bytes(data[offset + LENGTH.size:offset + LENGTH.size + length])
+            text = text.decode('utf-8', 'ignore').lower()
+            if not all(term in text for term in terms):
+                if touched:
+                    record_id = self._first_field(data, offset).decode('utf-8')
+                    if record_id in touched:
+                        changed.append((record_id, offset))
+                continue
+
+            row = self._decode(data, offset)[0]
+            if row[0] in touched:
+                changed.append((row[0], offset))
+            elif contains(row, terms):
+                matches.append((row[0], offset))
+        return matches, changed
+
+    def _row_at(self, mapped: MappedFile, offset: int) -> list:
+        return self._decode(mapped.data, offset)[0]
+
+    def _write_temp(self, table: RecordTable) -> str:
+        temp = f'{self.filename}.{os.getpid()}.tmp'
+        offsets = []
+        index = []
+
+        with open(temp, 'wb') as f:
+            # header is written again when counts are known
+            header = self._encode_header(self.columns, 0, 0, 0)
+            f.write(header)
+
+            position = len(header)
+            for row in table.rows():
+                data = self._encode_row(row)
+                number = _index_key(row[0])
+                if number is not None:
+                    index.append((number, len(offsets)))
+                offsets.append(position)
+                f.write(data)
+                position += len(data)
+
+            index.sort()
+            f.write(b''.join(OFFSET.pack(offset) for offset in offsets))
+            f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in index))
+
+            f.seek(0)
+            f.write(self._encode_header(self.columns, len(offsets), len(index), position))
+        return temp
+
+    def _needs_compaction(self) -> bool:
+        # records appended to tail are not indexed, so big tail is compacted as well
+        return super()._needs_compaction() or self._tail_size() >= self.compact_threshold
+
+    def _tail_size(self) -> int:
+        try:
+            with MappedFile(self.filename) as mapped:
+                return len(mapped.data) - self._tail_start(mapped.data)
+        except FileNotFoundError:
+            return 0
+
+
+    def get(self, record_id) -> Record:
+        """
+        Returns record by it's ID or None if record not found.
+        While records are not loaded record is found in ID index of file
+        and only this record is read
+
+        :param record_id: record ID
+        """
+        with self._lock, FileLock(self.filename, shared=True):
+            if self._signature is not None:
+                return super().get(record_id)
+
+            record_id = str(record_id)
+            updates, deleted = self._journal_overlay()
+            if record_id in deleted:
+                return None
+
+            row = self._find(record_id)
+            if row is None:
+                return None
+            row = self._align(row)
+            for column, value in updates.get(record_id, {}).items():
+                row[self.columns.index(column)] = str(value)
+            return Record(self.columns, row)
+
+    def _find(self, record_id: str) -> list:
+        """Returns row with passed ID read straight from file or None"""
+        with MappedFile(self.filename) as mapped:
+            data = mapped.data
+            records_start, count, indexed, table_offset = self._header(data)
+            index_offset = table_offset + count * OFFSET.size
+
+            number = _index_key(record_id)
+            if number is not None:
+                # binary search over ID index entries in mapped file
+                entries = _IndexView(data, index_offset, indexed)
+                position = bisect_left(entries, number)
+                if position < indexed and entries[position] == number:
+                    ordinal = INDEX_ENTRY.unpack_from(
+                        data, index_offset + position * INDEX_ENTRY.size
+                    )[1]
+                    offset = OFFSET.unpack_from(data, table_offset + ordinal * OFFSET.size)[0]
+                    return self._decode(data, offset)[0]
+                # appended records are not indexed yet
+                offsets = self._offsets(data, self._tail_start(data))
+            else:
+                offsets = self._all_offsets(data)
+
+            key = record_id.encode('utf-8')
+            for offset in offsets:
+                if self._first_field(data, offset) == key:
+                    return self._decode(data, offset)[0]
+        return None
+
+
+class _IndexView:
+    def __init__(self, data, offset: int, count: int):
+        """
+        Sequence of IDs of ID index in mapped file, used for binary search
+
+        :param data: mapped file data
+        :param offset: offset of ID index
+        :param count: count of index entries
+        """
+        self.data = data
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position: int) -> int:
+        return INDEX_ENTRY.unpack_from(self.data, self.offset + position * INDEX_ENTRY.size)[0]
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, size: int = 128):
+        """
+        Cache of limited size, least recently used values are dropped first.
+        Counts hits and misses, so size can be tuned
+
+        :param size: max count of cached values, 0 disables cache
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, compute):
+        """
+        Returns cached value for key, value is computed and cached on miss
+
+        :param key: hashable key, must include everything value depends on
+        :param compute: function without arguments that returns value
+        """
+        try:
+            value = self._values[key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._values.move_to_end(key)
+            return value
+
+        value = compute()
+        if self.size:
+            self._values[key] = value
+            if len(self._values) > self.size:
+                self._values.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drops all values, counters are kept"""
+        self._values.clear()
+
+    def stats(self) -> dict:
+        """Returns counters of cache usage"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._values),
+            'max_size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,117 @@
+import sys
+import json
+import socket
+
+from base_store import BaseStore
+
+
+class PhonebookClient:
+    def __init__(self, path: str = None, host: str = '127.0.0.1', port: int = None):
+        """
+        Client of phonebook server, see PhonebookServer for protocol.
+        Connection is opened once and reused for all requests
+
+        :param path: path to unix socket of server
+        :param host: host of TCP server
+        :param port: port of TCP server
+        """
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port))
+        self._file = self.socket.makefile('rwb')
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+        self.socket.close()
+
+    def request(self, op: str, **params):
+        """
+        Sends request and returns result, raises RuntimeError with server message on error
+
+        :param op: operation name
+        :param params: operation parameters
+        """
+        self._file.write(json.dumps({'op': op, **params}, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Сервер закрыл соединение')
+        response = json.loads(line)
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+
+    version = staticmethod(BaseStore.version)
+
+    def search(self, query: str) -> list:
+        return self.request('search', query=query)
+
+    def get(self, record_id) -> dict:
+        return self.request('get', id=str(record_id))
+
+    def get_many(self, ids: list) -> list:
+        return self.request('get', ids=[str(record_id) for record_id in ids])
+
+    def phone(self, number: str, mode: str = 'exact') -> list:
+        return self.request('phone', number=number, mode=mode)
+
+    def add(self, record: dict) -> dict:
+        return self.request('add', record=record)
+
+    def edit(self, record_id, fields: dict, version: int = None) -> dict:
+        return self.request('edit', id=str(record_id), fields=fields, version=version)
+
+    def delete(self, record_id, version: int = None) -> bool:
+        return self.request('delete', id=str(record_id), version=version)
+
+
+def main():
+    """
+    Sends single request from command line and prints result as JSON, e.g.:
+    python client.py phonebook.sock search Иванов
+    python client.py 127.0.0.1:8765 get 1
+    """
+    if len(sys.argv) < 3:
+        print(main.__doc__.strip())
+        return 1
+
+    address, op, *args = sys.argv[1:]
+    host, _, port = address.rpartition(':')
+    if port.isdigit():
+        client = PhonebookClient(host=host, port=int(port))
+    else:
+        client = PhonebookClient(address)
+
+    with client:
+        try:
+            if op == 'search':
+                result = client.search(' '.join(args))
+            elif op == 'get':
+                result = client.get_many(args)
+            elif op == 'phone':
+                result = client.phone(*args[:2])
+            elif op == 'delete':
+                result = client.delete(args[0])
+            else:
+                # other operations take JSON parameters, e.g. add '{"record": {"Имя": "..."}}'
+                result = client.request(op, **json.loads(args[0] if args else '{}'))
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import sys
+import csv
+import json
+import argparse
+
+from phonebook import Phonebook
+from storage import convert
+from exporter import FORMATS, export_records
+
+
+# names of batch commands, see _parser
+COMMANDS = ['search', 'phone', 'get', 'add', 'delete', 'import', 'export', 'convert', 'dedup']
+
+# maps add command options to columns
+FIELDS = {
+    'first_name': 'Имя',
+    'last_name': 'Фамилия',
+    'surname': 'Отчество',
+    'company': 'Компания',
+    'work_number': 'Рабочий номер',
+    'personal_number': 'Личный номер',
+}
+
+
+class Output:
+    def __init__(self, columns: list, output_format: str = 'csv', stream=None):
+        """
+        Writes records in machine-readable format
+
+        :param columns: list of columns in file
+        :param output_format: "csv" or "jsonl"
+        :param stream: file-like object, stdout by default
+        """
+        self.columns = columns
+        self.format = output_format
+        self.stream = stream or sys.stdout
+        self._writer = None
+
+    def write(self, records: list):
+        """Writes list of dicts of records, csv header is written once"""
+        if self.format == 'jsonl':
+            self.stream.writelines(
+                json.dumps(dict(record), ensure_ascii=False) + '\n' for record in records
+            )
+            return
+
+        if self._writer is None:
+            self._writer = csv.DictWriter(
+                f=self.stream,
+                fieldnames=self.columns,
+                delimiter=';',
+                lineterminator='\n'
+            )
+            self._writer.writeheader()
+        self._writer.writerows(records)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='Пакетные команды справочника, выполняются без интерфейса'
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-f', '--file', help='файл справочника')
+    common.add_argument(
+        '--format', choices=['csv', 'jsonl'], default='csv', help='формат вывода'
+    )
+
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', parents=[common], help='поиск по записям')
+    search.add_argument('query', nargs='+', help='условия поиска')
+    mode = search.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--substring', action='store_true',
+        help='искать условия в любой части слов, файл просматривается в нескольких процессах'
+    )
+    mode.add_argument(
+        '--fuzzy', action='store_true',
+        help='искать похожие имена и компании, с опечатками или латинскими буквами'
+    )
+    search.add_argument(
+        '--workers', type=int,
+        help='количество процессов для поиска в любой части слов, по умолчанию число ядер'
+    )
+
+    phone = commands.add_parser('phone', parents=[common], help='поиск по номеру телефона')
+    phone.add_argument('number', help='номер или его часть')
+    phone.add_argument(
+        '--mode', choices=['exact', 'prefix', 'suffix'], default='exact',
+        help='совпадение номера целиком, по началу или по окончанию'
+    )
+
+    get = commands.add_parser('get', parents=[common], help='записи по ИД')
+    get.add_argument('ids', nargs='+', help='ИД записей')
+
+    add = commands.add_parser('add', parents=[common], help='добавить запись')
+    for option in FIELDS:
+        add.add_argument('--' + option.replace('_', '-'), dest=option, default='')
+
+    delete = commands.add_parser('delete', parents=[common], help='удалить записи по ИД')
+    delete.add_argument('ids', nargs='+', help='ИД записей')
+
+    import_ = commands.add_parser(
+        'import', parents=[common], help='добавить записи из csv или jsonl файла'
+    )
+    import_.add_argument('source', help='путь к файлу, "-" для stdin')
+    import_.add_argument(
+        '--rejected', help='файл для некорректных записей, по умолчанию [source].rejected.csv'
+    )
+    import_.add_argument(
+        '--batch-size', type=int, default=10000, help='количество записей в одной пачке'
+    )
+
+    # export has own formats, so common options are not inherited
+    export = commands.add_parser(
+        'export', help='выгрузить записи, записи читаются и записываются по одной'
+    )
+    export.add_argument('-f', '--file', help='файл справочника')
+    export.add_argument('--format', choices=FORMATS, default='csv', help='формат вывода')
+    export.add_argument('-o', '--output', help='путь к файлу, по умолчанию stdout')
+    export.add_argument('-q', '--query', help='выгрузить только записи, найденные поиском')
+    export.add_argument(
+        '--substring', action='store_true', help='искать условия в любой части слов'
+    )
+    export.add_argument('--fields', nargs='+', help='выгружаемые поля, по умолчанию все')
+    export.add_argument(
+        '--gzip', action='store_true',
+        help='сжать gzip, для файла с расширением .gz включается само'
+    )
+
+    convert_ = commands.add_parser(
+        'convert', parents=[common], help='сохранить справочник в другом формате'
+    )
+    convert_.add_argument(
+        'target', help='путь к новому файлу, формат по расширению: .csv, .pbk или .db'
+    )
+
+    dedup = commands.add_parser(
+        'dedup', parents=[common], help='найти записи одного человека и объединить их'
+    )
+    dedup.add_argument(
+        '--merge', action='store_true',
+        help='объединить найденные группы, без флага группы только выводятся'
+    )
+
+    return parser
+
+
+def parse_command(args: list) -> argparse.Namespace:
+    """
+    Parses command line arguments of batch command
+
+    :param args: command line arguments starting with command name
+    """
+    return _parser().parse_args(args)
+
+
+def run_command(options: argparse.Namespace, file: str, columns: list) -> int:
+    """
+    Runs single batch command against phonebook and returns exit code
+
+    :param options: parsed command arguments
+    :param file: path to phonebook file
+    :param columns: list of columns in file
+    """
+    if options.command == 'convert':
+        count = convert(file, options.target, columns)
+        print(f'Сохранено записей: {count}', file=sys.stderr)
+        return 0
+
+    phonebook = Phonebook(file, columns)
+    store = phonebook.store
+    output = Output(columns, options.format)
+
+    try:
+        if options.command == 'search':
+            if options.substring:
+                output.write(store.scan(' '.join(options.query), options.workers))
+            elif options.fuzzy:
+                output.write(store.fuzzy_search(' '.join(options.query)))
+            else:
+                # like in interface, query index can't serve is looked for in any part of words
+                query = ' '.join(options.query)
+                output.write(store.search(query) or store.scan(query, options.workers))
+
+        elif options.command == 'phone':
+            output.write(store.find_by_phone(options.number, options.mode))
+
+        elif options.command == 'get':
+            records = [store.get(record_id) for record_id in options.ids]
+            output.write([record for record in records if record is not None])
+            # found records are still written, exit code tells some were not found
+            missing = [record_id for record_id, record in zip(options.ids, records) if record is None]
+            if missing:
+                print('Записи не найдены: ' + ', '.join(missing), file=sys.stderr)
+                return 1
+
+        elif options.command == 'add':
+            data = {column: getattr(options, option) for option, column in FIELDS.items()}
+            record = phonebook.create_record(data)
+            if not record:
+                print('Некорректные данные записи', file=sys.stderr)
+                return 1
+            output.write([record])
+
+        elif options.command == 'delete':
+            missing = [record_id for record_id in options.ids if not store.delete(record_id)]
+            if missing:
+                print('Записи не найдены: ' + ', '.join(missing), file=sys.stderr)
+                return 1
+
+        elif options.command == 'import':
+            from importer import BulkImporter
+
+            importer = BulkImporter(phonebook, options.batch_size)
+            try:
+                imported, rejected = importer.run(options.source, options.rejected)
+            except ValueError as error:
+                print(f'Неизвестные поля: {error}', file=sys.stderr)
+                return 1
+            print(f'Добавлено записей: {imported}', file=sys.stderr)
+            if rejected:
+                print(f'Пропущено некорректных записей: {rejected}', file=sys.stderr)
+
+        elif options.command == 'export':
+            try:
+                count = export_records(
+                    store, options.output, options.format, options.query,
+                    options.substring, options.fields, options.gzip or None
+                )
+            except ValueError as error:
+                print(f'Неизвестные поля: {error}', file=sys.stderr)
+                return 1
+            if options.output:
+                print(f'Выгружено записей: {count}', file=sys.stderr)
+        elif options.command == 'dedup':
+            from dedup import Deduplicator
+
+            deduplicator = Deduplicator(phonebook)
+            groups = deduplicator.groups()
+            if deduplicator.skipped_blocks:
+                print(
+                    f'Не проверено слишком больших блоков похожих записей: '
+                    f'{len(deduplicator.skipped_blocks)}, записей в них: '
+                    f'{sum(deduplicator.skipped_blocks)}',
+                    file=sys.stderr
+                )
+            if options.merge:
+                merged, deleted, skipped = deduplicator.apply(groups)
+                print(f'Объединено групп: {merged}, удалено записей: {deleted}', file=sys.stderr)
+                if skipped:
+                    print(f'Пропущено измененных групп: {skipped}', file=sys.stderr)
+            else:
+                # records of same group get same number
+                output = Output(columns + ['Группа'], options.format)
+                for number, group in enumerate(groups, 1):
+                    output.write([{**record, 'Группа': number} for record in group])
+    finally:
+        store.close()
+
+    return 0
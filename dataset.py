@@ -0,0 +1,140 @@
+import random
+
+
+# values pass Phonebook._check_name: letters except "ё", spaces, hyphens and double quotes
+MALE_NAMES = [
+    'Александр', 'Алексей', 'Андрей', 'Антон', 'Артем', 'Борис', 'Вадим', 'Валерий',
+    'Василий', 'Виктор', 'Владимир', 'Вячеслав', 'Геннадий', 'Георгий', 'Григорий',
+    'Денис', 'Дмитрий', 'Евгений', 'Егор', 'Иван', 'Игорь', 'Илья', 'Кирилл',
+    'Константин', 'Леонид', 'Максим', 'Михаил', 'Никита', 'Николай', 'Олег', 'Павел',
+    'Петр', 'Роман', 'Руслан', 'Семен', 'Сергей', 'Станислав', 'Степан', 'Тимур',
+    'Федор', 'Юрий', 'Ярослав',
+]
+FEMALE_NAMES = [
+    'Александра', 'Алина', 'Алла', 'Анастасия', 'Анна', 'Валентина', 'Валерия', 'Вера',
+    'Виктория', 'Галина', 'Дарья', 'Евгения', 'Екатерина', 'Елена', 'Елизавета',
+    'Жанна', 'Зоя', 'Инна', 'Ирина', 'Карина', 'Кристина', 'Ксения', 'Лариса', 'Любовь',
+    'Людмила', 'Маргарита', 'Марина', 'Мария', 'Надежда', 'Наталья', 'Нина', 'Оксана',
+    'Ольга', 'Полина', 'Светлана', 'София', 'Тамара', 'Татьяна', 'Юлия', 'Яна',
+]
+# female surnames are made by adding "а"
+SURNAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов',
+    'Михайлов', 'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев',
+    'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев',
+    'Макаров', 'Никитин', 'Захаров', 'Зайцев', 'Соловьев', 'Борисов', 'Яковлев',
+    'Григорьев', 'Романов', 'Воробьев', 'Сергеев', 'Кузьмин', 'Фролов', 'Александров',
+    'Дмитриев', 'Королев', 'Гусев', 'Киселев', 'Ильин', 'Максимов', 'Поляков', 'Сорокин',
+    'Виноградов', 'Ковалев', 'Белов', 'Медведев', 'Антонов', 'Тарасов', 'Жуков',
+    'Баранов', 'Филиппов', 'Комаров', 'Давыдов', 'Беляев', 'Герасимов', 'Богданов',
+    'Осипов', 'Сидоров', 'Матвеев', 'Титов', 'Марков', 'Миронов', 'Крылов', 'Куликов',
+    'Карпов', 'Власов', 'Мельников', 'Денисов', 'Гаврилов', 'Тихонов', 'Казаков',
+    'Афанасьев', 'Данилов', 'Савельев', 'Тимофеев', 'Фомин', 'Чернов', 'Абрамов',
+]
+# patronymics are made from male names that don't end with vowel
+FATHER_NAMES = [name for name in MALE_NAMES if not name.endswith(('а', 'я'))]
+LATIN_FIRST_NAMES = [
+    'John', 'Michael', 'David', 'James', 'Robert', 'William', 'Thomas', 'Daniel', 'Mark',
+    'Paul', 'Peter', 'Alex', 'Anna', 'Maria', 'Emily', 'Sarah', 'Laura', 'Kate', 'Julia',
+    'Helen', 'Sophie', 'Emma', 'Olga', 'Irina', 'Li', 'Wei', 'Ahmed', 'Omar', 'Hans',
+    'Klaus', 'Pierre', 'Jean', 'Marco', 'Luca', 'Carlos', 'Diego',
+]
+LATIN_SURNAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson',
+    'Anderson', 'Taylor', 'Thomas', 'Moore', 'Martin', 'Jackson', 'White', 'Harris',
+    'Clark', 'Lewis', 'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Green',
+    'Baker', 'Muller', 'Schmidt', 'Schneider', 'Fischer', 'Dubois', 'Rossi', 'Russo',
+    'Garcia', 'Martinez', 'Wang', 'Zhang', 'Chen', 'Ivanov', 'Petrov', 'Smirnova',
+    'Mac Donald', 'Van Dyke', 'Smith-Jones',
+]
+COMPANY_FORMS = ['ООО', 'АО', 'ПАО', 'ЗАО', 'ИП', 'ГК', 'НКО']
+COMPANY_WORDS = [
+    'Ромашка', 'Вектор', 'Альянс', 'Гранит', 'Восток', 'Запад', 'Север', 'Юг', 'Меридиан',
+    'Прогресс', 'Стройинвест', 'Техносервис', 'Энергия', 'Импульс', 'Горизонт', 'Сфера',
+    'Лидер', 'Партнер', 'Феникс', 'Атлант', 'Орион', 'Контур', 'Профи', 'Эталон', 'Ресурс',
+    'Мостострой', 'Агрохолдинг', 'Транслогистик', 'Фармация', 'Медцентр',
+]
+LATIN_COMPANIES = [
+    'Google', 'Microsoft', 'Oracle', 'Siemens', 'Bosch', 'Nestle', 'Unilever', 'Samsung',
+    'Acme Corp', 'Globex', 'Initech', 'Umbrella', 'Stark Industries', 'Wayne Enterprises',
+]
+# mobile codes and city codes used for numbers
+MOBILE_CODES = ['900', '901', '903', '905', '910', '912', '915', '916', '920', '925',
+                '926', '950', '952', '960', '977', '985', '999']
+CITY_CODES = ['495', '499', '812', '343', '383', '831', '846', '861', '863']
+
+
+def _person(rng: random.Random) -> tuple:
+    """Returns (first name, last name, patronymic)"""
+    # most contacts are Russian, some are written in Latin letters
+    if rng.random() < 0.15:
+        return rng.choice(LATIN_FIRST_NAMES), rng.choice(LATIN_SURNAMES), ''
+
+    gender = 'male' if rng.random() < 0.5 else 'female'
+    first_name = rng.choice(MALE_NAMES if gender == 'male' else FEMALE_NAMES)
+    surname = rng.choice(SURNAMES)
+    if gender == 'female':
+        surname += 'а'
+    # double surnames and missing patronymics happen too
+    if rng.random() < 0.03:
+        surname += '-' + rng.choice(SURNAMES) + ('а' if gender == 'female' else '')
+
+    patronymic = ''
+    if rng.random() < 0.8:
+        patronymic = _patronymic(rng.choice(FATHER_NAMES), gender)
+    return first_name, surname, patronymic
+
+
+def _patronymic(father: str, gender: str) -> str:
+    """Returns patronymic made from father's name, e.g. Юрий -> Юрьевич"""
+    if father.endswith('ий'):
+        stem, ending = father[:-2] + 'ь', 'ев'
+    elif father.endswith(('й', 'ь')):
+        stem, ending = father[:-1], 'ев'
+    else:
+        stem, ending = father, 'ов'
+    return stem + ending + ('ич' if gender == 'male' else 'на')
+
+
+def _company(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.2:
+        return ''
+    if roll < 0.3:
+        return rng.choice(LATIN_COMPANIES)
+
+    name = rng.choice(COMPANY_WORDS)
+    if rng.random() < 0.3:
+        name += ' ' + rng.choice(COMPANY_WORDS)
+    return f'{rng.choice(COMPANY_FORMS)} "{name}"'
+
+
+def _phone(rng: random.Random, mobile: bool) -> str:
+    """Returns number as it's stored after validation: digits starting with 7 or 8"""
+    prefix = '7' if rng.random() < 0.85 else '8'
+    code = rng.choice(MOBILE_CODES if mobile else CITY_CODES)
+    return prefix + code + f'{rng.randrange(10 ** 7):07d}'
+
+
+def generate_records(count: int, seed: int = None):
+    """
+    A generator that returns realistic records without IDs:
+    Russian and Latin names, companies with legal forms, mobile and city numbers.
+    Same seed gives same records
+
+    :param count: count of records
+    :param seed: seed of random generator, None(default) for random records
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        first_name, surname, patronymic = _person(rng)
+        work = _phone(rng, mobile=rng.random() < 0.4) if rng.random() < 0.7 else ''
+        personal = _phone(rng, mobile=True) if rng.random() < 0.9 else ''
+        yield {
+            'Имя': first_name,
+            'Фамилия': surname,
+            'Отчество': patronymic,
+            'Компания': _company(rng),
+            'Рабочий номер': work,
+            'Личный номер': personal,
+        }
@@ -0,0 +1,277 @@
+from base_store import ConflictError
+from fuzzy_index import normalize, distance, max_distance
+from phone_index import PhoneIndex
+from phonebook import Phonebook
+
+
+# bigger blocks are split by secondary key, see _split, parts that are still bigger
+# are skipped: comparing all of their pairs takes too long
+MAX_BLOCK = 1000
+
+# count of last digits of numbers that split big blocks of names
+PHONE_SUFFIX = 4
+
+
+class Deduplicator:
+    def __init__(self, phonebook: Phonebook):
+        """
+        Finds records of same person and merges them.
+        Records are grouped into blocks by keys: full name, every phone number,
+        company with first name or surname. Only records of same block are compared,
+        so records are not compared with each other record of phonebook
+
+        :param phonebook: phonebook to look for duplicates in
+        """
+        self.phonebook = phonebook
+        self.store = phonebook.store
+        self.columns = phonebook.columns
+
+        self.name_columns = ['Имя', 'Фамилия', 'Отчество']
+        self.phone_columns = [column for column in self.columns if 'номер' in column]
+        # sizes of blocks skipped by last call of groups, their records were not compared
+        self.skipped_blocks = []
+
+
+    def _phone(self, number: str) -> str:
+        """Returns digits of valid number in same form as phone index has them"""
+        if not self.phonebook._check_number(number):
+            return ''
+        return PhoneIndex.normalize(number)
+
+    def _profile(self, record) -> tuple:
+        """
+        Returns normalized values of record that are compared:
+        ((first name, surname), patronymic, set of phones, company)
+        """
+        first_name, surname, patronymic = (
+            normalize(' '.join(record.get(column, '').split())) for column in self.name_columns
+        )
+        phones = {self._phone(record.get(column, '')) for column in self.phone_columns}
+        phones.discard('')
+        company = normalize(' '.join(record.get('Компания', '').split()))
+        return (first_name, surname), patronymic, phones, company
+
+    def _keys(self, profile: tuple) -> list:
+        """Returns blocking keys of record, records with common key are compared"""
+        (first_name, surname), patronymic, phones, company = profile
+        keys = [('phone', phone) for phone in phones]
+        if first_name or surname:
+            # first name and surname could be swapped
+            keys.append(('name', *sorted([first_name, surname]), patronymic))
+        if company:
+            # every name is paired with company, so typo in other name doesn't split them
+            keys.extend(('company', company, name) for name in {first_name, surname} if name)
+        return keys
+
+    def _split(self, key: tuple, block: list, profiles: list) -> list:
+        """
+        Returns list of parts of big block. Records sharing a number are split
+        by first letters of names, other blocks by last digits of numbers:
+        record with several numbers goes to several parts, records without numbers
+        go to every part, as they could be same with any of them
+
+        :param key: blocking key of block
+        :param block: list of positions of records
+        :param profiles: profiles of records by positions
+        """
+        parts = {}
+        unknown = []
+        for position in block:
+            (first_name, surname), _, phones, _ = profiles[position]
+            if key[0] == 'phone':
+                subkeys = {''.join(sorted([first_name[:1], surname[:1]]))}
+            else:
+                subkeys = {phone[-PHONE_SUFFIX:] for phone in phones}
+            if not subkeys:
+                unknown.append(position)
+            for subkey in subkeys:
+                parts.setdefault(subkey, []).append(position)
+        return [part + unknown for part in parts.values()] or [unknown]
+
+    @staticmethod
+    def _similar(first: str, second: str) -> bool:
+        """Returns True if words are same or differ by allowed count of typos"""
+        if first == second:
+            return True
+        if not first or not second:
+            return False
+        limit = min(max_distance(first), max_distance(second))
+        return distance(first, second, limit) <= limit
+
+    def _same(self, first: tuple, second: tuple) -> bool:
+        """Returns True if profiles belong to same person"""
+        names, patronymic, phones, company = first
+        other_names, other_patronymic, other_phones, other_company = second
+
+        # namesakes are told apart by other values, they are checked first
+        # as they are cheaper than comparing names with typos
+        if not self._compatible(self._values(first), self._values(second)):
+            return False
+        # if nothing but name is known, name must be full
+        if not (phones & other_phones or company and company == other_company
+                or patronymic and other_patronymic):
+            return False
+
+        if not (
+            self._similar(names[0], other_names[0]) and self._similar(names[1], other_names[1])
+            or self._similar(names[0], other_names[1]) and self._similar(names[1], other_names[0])
+        ):
+            return False
+        # missing patronymic doesn't contradict anything
+        return not patronymic or not other_patronymic or self._similar(patronymic, other_patronymic)
+
+    @staticmethod
+    def _values(profile: tuple) -> tuple:
+        """Returns (set of numbers, set of companies) of profile"""
+        company = profile[3]
+        return profile[2], {company} if company else set()
+
+    @staticmethod
+    def _compatible(first: tuple, second: tuple) -> bool:
+        """
+        Returns False if (numbers, companies) tell that records are of different people:
+        both have numbers and none of them is common, or both have only other companies.
+        Common number is enough, people change jobs
+        """
+        (phones, companies), (other_phones, other_companies) = first, second
+        if phones & other_phones:
+            return True
+        if phones and other_phones:
+            return False
+        return not (companies and other_companies and not companies & other_companies)
+
+
+    def groups(self, records: list = None) -> list:
+        """
+        Returns list of groups of duplicates, every group is list of records in ID order,
+        groups are in order of their first records.
+        Sizes of blocks that were too big to compare are kept in skipped_blocks
+
+        :param records: list of records to look in, None(default) for all records
+        """
+        if records is None:
+            records = self.store.records()
+        profiles = [self._profile(record) for record in records]
+
+        blocks = {}
+        for position, profile in enumerate(profiles):
+            for key in self._keys(profile):
+                blocks.setdefault(key, []).append(position)
+
+        parts = []
+        self.skipped_blocks = []
+        for key, block in blocks.items():
+            if len(block) < 2:
+                continue
+            if len(block) <= MAX_BLOCK:
+                parts.append(block)
+                continue
+            for part in self._split(key, block, profiles):
+                if len(part) > MAX_BLOCK:
+                    self.skipped_blocks.append(len(part))
+                elif len(part) > 1:
+                    parts.append(part)
+
+        # records found to be same are joined into sets, see _find
+        parents = list(range(len(records)))
+        # (numbers, companies) of sets of several records by first position
+        values = {}
+        for block in parts:
+            for number, position in enumerate(block):
+                for other in block[number + 1:]:
+                    root, other_root = self._find(parents, position), self._find(parents, other)
+                    # pair could be compared already in other block
+                    if root == other_root or not self._same(profiles[position], profiles[other]):
+                        continue
+
+                    # record without numbers must not join namesakes with other numbers
+                    first = values.get(root) or self._values(profiles[root])
+                    second = values.get(other_root) or self._values(profiles[other_root])
+                    if not self._compatible(first, second):
+                        continue
+                    root, other_root = min(root, other_root), max(root, other_root)
+                    parents[other_root] = root
+                    values[root] = first[0] | second[0], first[1] | second[1]
+                    values.pop(other_root, None)
+
+        groups = {}
+        for position in range(len(records)):
+            groups.setdefault(self._find(parents, position), []).append(records[position])
+
+        id_column = self.columns[0]
+        groups = [
+            sorted(group, key=lambda record: self.store.id_key(record[id_column]))
+            for group in groups.values() if len(group) > 1
+        ]
+        return sorted(groups, key=lambda group: self.store.id_key(group[0][id_column]))
+
+    @staticmethod
+    def _find(parents: list, position: int) -> int:
+        """Returns first position of set that contains position, paths are shortened on the way"""
+        root = position
+        while parents[root] != root:
+            root = parents[root]
+        while parents[position] != root:
+            parents[position], position = root, parents[position]
+        return root
+
+    def merge(self, group: list) -> dict:
+        """
+        Returns changes of first record of group that make it merged record:
+        its empty values are filled with values of other records in ID order
+        """
+        changes = {}
+        for column in self.columns[1:]:
+            if group[0][column]:
+                continue
+            for record in group[1:]:
+                if record[column]:
+                    changes[column] = record[column]
+                    break
+        return changes
+
+
+    def apply(self, groups: list) -> tuple:
+        """
+        Merges groups into their first records and deletes other records,
+        changes of all groups are applied at once, see BaseStore.change_many.
+        Group is skipped if any of its records was changed or deleted since it was read.
+        Returns (merged groups count, deleted records count, skipped groups count)
+
+        :param groups: list of groups returned by groups
+        """
+        merged = deleted = skipped = 0
+        id_column = self.columns[0]
+
+        with self.store.batch():
+            changes = []
+            for group in groups:
+                # versions are checked before anything is written, so group is never half merged
+                versions = [self.store.version(record) for record in group]
+                current = [self.store.get(record[id_column]) for record in group]
+                if any(
+                    record is None or self.store.version(record) != version
+                    for record, version in zip(current, versions)
+                ):
+                    skipped += 1
+                    continue
+
+                fields = self.merge(group)
+                if fields:
+                    changes.append((group[0][id_column], fields, versions[0]))
+                changes.extend(
+                    (record[id_column], None, version)
+                    for record, version in zip(group[1:], versions[1:])
+                )
+                merged += 1
+                deleted += len(group) - 1
+
+            try:
+                self.store.change_many(changes)
+            except ConflictError:
+                # can happen only with storages that don't lock batch, nothing is changed then
+                merged, deleted, skipped = 0, 0, skipped + merged
+
+        if merged:
+            self.phonebook._changed()
+        return merged, deleted, skipped
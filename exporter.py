@@ -0,0 +1,201 @@
+import io
+import os
+import sys
+import csv
+import gzip
+import json
+
+from base_store import BaseStore
+from search_index import TokenIndex
+
+
+FORMATS = ['csv', 'jsonl', 'vcard']
+
+
+def filter_records(records, query: str, substring: bool = False):
+    """
+    A generator that returns records matching query, same way as search does:
+    every word of query must start some word of record,
+    or be found in any part of values with substring
+
+    :param records: iterable of records
+    :param query: search terms separated with spaces
+    :param substring: match terms in any part of words, like search --substring
+    """
+    if substring:
+        terms = query.lower().split()
+        # scan finds nothing by empty query too
+        if not terms:
+            return
+        for record in records:
+            if BaseStore._contains(record.values(), terms):
+                yield record
+        return
+
+    terms = TokenIndex.tokenize(query)
+    # search finds nothing by query without words
+    if not terms:
+        return
+    for record in records:
+        tokens = set()
+        for value in record.values():
+            tokens |= TokenIndex.tokenize(value)
+        if all(any(token.startswith(term) for token in tokens) for term in terms):
+            yield record
+
+
+def project(records, fields: list):
+    """
+    A generator that returns dicts of records with passed columns only, in passed order
+
+    :param records: iterable of records
+    :param fields: list of columns
+    """
+    for record in records:
+        yield {field: record[field] for field in fields}
+
+
+def _csv_lines(records, fields: list):
+    """A generator that returns header and lines of records in csv format of phonebook file"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
+    writer.writerow(fields)
+    for record in records:
+        writer.writerow(record.values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # header is returned even if there are no records
+    yield buffer.getvalue()
+
+
+def _jsonl_lines(records, fields: list):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _vcard_value(value: str) -> str:
+    """Escapes vCard special characters"""
+    return value.replace('\\', '\\\\').replace(',', '\\,').replace(';', '\\;')
+
+
+def _vcard_lines(records, fields: list):
+    """A generator that returns vCard 3.0 cards of records, only projected fields are written"""
+    for record in records:
+        values = {column: _vcard_value(value) for column, value in record.items() if value}
+        full_name = ' '.join(
+            values[column] for column in ['Имя', 'Отчество', 'Фамилия'] if column in values
+        )
+        lines = [
+            'BEGIN:VCARD',
+            'VERSION:3.0',
+            f"N:{values.get('Фамилия', '')};{values.get('Имя', '')};{values.get('Отчество', '')};;",
+            f'FN:{full_name}',
+        ]
+        # properties by columns, empty values are skipped
+        for column, name in [
+            ('Компания', 'ORG'),
+            ('Рабочий номер', 'TEL;TYPE=WORK,VOICE'),
+            ('Личный номер', 'TEL;TYPE=CELL'),
+            ('ИД', 'UID'),
+        ]:
+            if column in values:
+                lines.append(f'{name}:{values[column]}')
+        lines.append('END:VCARD')
+        yield '\r\n'.join(lines) + '\r\n'
+
+
+# serializers by format, take records and projected columns
+SERIALIZERS = {
+    'csv': _csv_lines,
+    'jsonl': _jsonl_lines,
+    'vcard': _vcard_lines,
+}
+
+
+def serialize(records, fields: list, output_format: str = 'csv'):
+    """
+    A generator that returns text of records in passed format by pieces
+
+    :param records: iterable of dicts of projected records
+    :param fields: list of projected columns
+    :param output_format: "csv", "jsonl" or "vcard"
+    """
+    return SERIALIZERS[output_format](records, fields)
+
+
+def export_records(
+    store: BaseStore,
+    output: str = None,
+    output_format: str = 'csv',
+    query: str = None,
+    substring: bool = False,
+    fields: list = None,
+    compress: bool = None
+) -> int:
+    """
+    Writes records of store to file or stdout. Records are streamed through
+    read -> filter -> project -> serialize stages one by one,
+    so memory use doesn't depend on count of records.
+    Query is matched like search command does: IDs found by index keep records,
+    and if index finds nothing, terms are looked for in any part of values
+    File is replaced only when all records are written, so readers never see it half written.
+    Returns count of written records
+
+    :param store: storage of records
+    :param output: path to file, None(default) for stdout
+    :param output_format: "csv", "jsonl" or "vcard"
+    :param query: search terms, None(default) for all records
+    :param substring: match terms in any part of words
+    :param fields: list of written columns, None(default) for all
+    :param compress: write gzip, None(default) to compress if output ends with ".gz"
+    """
+    fields = fields or list(store.columns)
+    unknown = [field for field in fields if field not in store.columns]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    if compress is None:
+        compress = bool(output) and output.endswith('.gz')
+
+    records = store.iter_records()
+    if query:
+        ids = set() if substring else store.search_ids(query)
+        if ids:
+            id_column = store.columns[0]
+            records = (record for record in records if record[id_column] in ids)
+        else:
+            records = filter_records(records, query, substring=True)
+
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    chunks = serialize(project(counted(records), fields), fields, output_format)
+
+    if output is None:
+        if compress:
+            with gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb') as f:
+                with io.TextIOWrapper(f, encoding='utf-8', newline='') as text:
+                    text.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
+            sys.stdout.flush()
+        return count
+
+    temp = f'{output}.{os.getpid()}.tmp'
+    try:
+        if compress:
+            f = gzip.open(temp, 'wt', encoding='utf-8', newline='')
+        else:
+            f = open(temp, 'w', encoding='utf-8', newline='')
+        with f:
+            f.writelines(chunks)
+        os.replace(temp, output)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+    return count
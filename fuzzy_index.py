@@ -0,0 +1,267 @@
+import re
+import heapq
+from collections import Counter
+
+import sidecar
+
+
+# Cyrillic letters are written with Latin ones, so "Иванов" and "Ivanov" get same key
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '',
+    'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    # Latin letters that have no single Cyrillic pair
+    'x': 'ks', 'w': 'v',
+})
+
+# count of most similar words by trigrams that are compared by edit distance
+CANDIDATES = 100
+
+
+def normalize(word: str) -> str:
+    """Returns lowercase transliterated word, used as key of index"""
+    return word.lower().translate(TRANSLIT)
+
+
+def trigrams(word: str) -> set:
+    """Returns trigrams of word, word is padded so its beginning and end make own trigrams"""
+    padded = f'^{word}$'
+    return {padded[position:position + 3] for position in range(max(len(padded) - 2, 1))}
+
+
+def max_distance(word: str) -> int:
+    """Returns count of typos allowed in word of such length"""
+    if len(word) < 4:
+        return 0
+    if len(word) < 7:
+        return 1
+    return 2
+
+
+def distance(first: str, second: str, limit: int) -> int:
+    """
+    Returns edit distance between words, swap of neighbour letters is single edit.
+    Calculation stops as soon as distance exceeds limit, limit + 1 is returned then
+
+    :param first: first word
+    :param second: second word
+    :param limit: biggest distance that is interesting
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    before = None
+    previous = list(range(len(second) + 1))
+    for i, letter in enumerate(first, 1):
+        current = [i] + [0] * len(second)
+        for j, other in enumerate(second, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (letter != other)
+            )
+            if before is not None and j > 1 and letter == second[j - 2] \
+                    and first[i - 2] == other:
+                current[j] = min(current[j], before[j - 2] + 1)
+
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class TrigramIndex:
+    # bump when pickled structure changes
+    version = 1
+
+    def __init__(self):
+        """
+        Index of normalized words to record IDs, words are found by shared trigrams.
+        Used for typo tolerant search of names written in Cyrillic or Latin letters
+        """
+        # normalized word -> set of record IDs
+        self._words = {}
+        # trigram -> set of normalized words
+        self._trigrams = {}
+        self.dirty = False
+
+
+    @staticmethod
+    def tokenize(values: list) -> set:
+        """Returns normalized words of values"""
+        words = set()
+        for value in values:
+            words.update(normalize(word) for word in re.findall(r'\w+', value))
+        words.discard('')
+        return words
+
+
+    @classmethod
+    def build(cls, rows):
+        """
+        Builds index from scratch
+
+        :param rows: iterable of (record ID, list of indexed values)
+        """
+        index = cls()
+        for record_id, values in rows:
+            index._add_words(record_id, index.tokenize(values))
+        index.dirty = True
+        return index
+
+    def _add_words(self, record_id: str, words: set):
+        for word in words:
+            ids = self._words.get(word)
+            if ids is None:
+                ids = self._words[word] = set()
+                for gram in trigrams(word):
+                    self._trigrams.setdefault(gram, set()).add(word)
+            ids.add(record_id)
+        self.dirty = True
+
+    def _remove_words(self, record_id: str, words: set):
+        for word in words:
+            ids = self._words.get(word)
+            if ids is None:
+                continue
+            ids.discard(record_id)
+            if ids:
+                continue
+
+            # word isn't used anymore, it's dropped from trigram postings too
+            del self._words[word]
+            for gram in trigrams(word):
+                posting = self._trigrams.get(gram)
+                if posting is not None:
+                    posting.discard(word)
+                    if not posting:
+                        del self._trigrams[gram]
+        self.dirty = True
+
+    def add(self, record_id: str, values: list):
+        """
+        Adds words of record to index
+
+        :param record_id: record ID
+        :param values: list of indexed field values
+        """
+        self._add_words(record_id, self.tokenize(values))
+
+    def remove(self, record_id: str, values: list):
+        """
+        Removes words of record from index
+
+        :param record_id: record ID
+        :param values: list of field values that were indexed
+        """
+        self._remove_words(record_id, self.tokenize(values))
+
+    def update(self, record_id: str, old_values: list, new_values: list):
+        """Reindexes record after its fields were changed, only changed words are touched"""
+        old_words = self.tokenize(old_values)
+        new_words = self.tokenize(new_values)
+        self._remove_words(record_id, old_words - new_words)
+        self._add_words(record_id, new_words - old_words)
+
+
+    def _similar(self, term: str) -> list:
+        """
+        Returns list of (word, similarity from 0 to 1) of words similar to normalized term.
+        Words are ranked by shared trigrams first, only best candidates
+        are compared by edit distance
+        """
+        limit = max_distance(term)
+        # short words have no room for typos
+        if not limit:
+            return [(term, 1.0)] if term in self._words else []
+
+        grams = trigrams(term)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._trigrams.get(gram, ()))
+
+        # every edit changes at most 4 trigrams (swap of letters), words sharing less are too far
+        needed = max(len(grams) - 4 * limit, 1)
+        candidates = heapq.nlargest(
+            CANDIDATES,
+            (
+                (shared, word) for word, shared in counts.items()
+                if shared >= needed and abs(len(word) - len(term)) <= limit
+            )
+        )
+
+        similar = []
+        for _, word in candidates:
+            edits = distance(term, word, limit)
+            if edits <= limit:
+                similar.append((word, 1 - edits / max(len(term), len(word))))
+        return similar
+
+    def search(self, query: str, limit: int = None) -> list:
+        """
+        Returns list of (record ID, score) of records that have a similar word
+        for every word of query, most similar records go first
+
+        :param query: words separated with spaces
+        :param limit: count of returned records, None(default) for all
+        """
+        terms = self.tokenize([query])
+        if not terms:
+            return []
+
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for word, similarity in self._similar(term):
+                for record_id in self._words[word]:
+                    if similarity > term_scores.get(record_id, 0):
+                        term_scores[record_id] = similarity
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    record_id: score + term_scores[record_id]
+                    for record_id, score in scores.items() if record_id in term_scores
+                }
+            # no need to look further, no record has all words
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return ranked if limit is None else ranked[:limit]
+
+
+    def save(self, filename: str, signature):
+        """
+        Saves index to file
+
+        :param filename: path to index file
+        :param signature: state of phonebook files index was built for
+        """
+        sidecar.save(
+            filename, {'version': self.version, 'signature': signature, 'words': self._words}
+        )
+        self.dirty = False
+
+    @classmethod
+    def load(cls, filename: str, signature):
+        """
+        Returns index saved to file or None if file is missing, can't be trusted
+        or was built for other state of phonebook files
+
+        :param filename: path to index file
+        :param signature: current state of phonebook files
+        """
+        data = sidecar.load(filename)
+        if not isinstance(data, dict) or data.get('version') != cls.version or data.get('signature') != signature:
+            return None
+
+        index = cls()
+        index._words = data['words']
+        for word in index._words:
+            for gram in trigrams(word):
+                index._trigrams.setdefault(gram, set()).add(word)
+        return index
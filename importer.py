@@ -0,0 +1,164 @@
+import sys
+import csv
+import json
+from itertools import islice
+
+from phonebook import Phonebook
+
+
+def read_records(filename: str, columns: list = None):
+    """
+    A generator that returns (data, line, error) of records from csv or jsonl file,
+    format is chosen by extension, file is read line by line.
+    Data is dict of record or text of line that can't be parsed, line is source text of record
+    (several lines for csv values with line breaks), error is None for parsed lines.
+    Raises ValueError with unknown columns if csv header has columns phonebook doesn't have,
+    it's raised before first record is returned
+
+    :param filename: path to file, "-" for stdin
+    :param columns: list of columns in phonebook, csv header is not checked if None(default)
+    """
+    if filename == '-':
+        f = sys.stdin
+    else:
+        f = open(filename, 'r', encoding='utf-8', newline='')
+
+    try:
+        if filename.endswith('.jsonl'):
+            for line in f:
+                if not line.strip():
+                    continue
+                line = line.rstrip('\r\n')
+                # broken line is rejected, other lines are still imported
+                try:
+                    yield json.loads(line), line, None
+                except ValueError:
+                    yield line, line, 'Некорректный JSON'
+        else:
+            # lines are collected as reader takes them, so source of every row is known
+            lines = []
+
+            def source():
+                for line in f:
+                    lines.append(line)
+                    yield line
+
+            reader = csv.DictReader(source(), delimiter=';')
+            if columns is not None and reader.fieldnames:
+                unknown = [name for name in reader.fieldnames if name not in columns]
+                if unknown:
+                    raise ValueError(', '.join(unknown))
+            lines.clear()
+            for row in reader:
+                # empty lines skipped by reader are stripped with line breaks
+                yield row, ''.join(lines).strip('\r\n'), None
+                lines.clear()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class BulkImporter:
+    def __init__(self, phonebook: Phonebook, batch_size: int = 10000):
+        """
+        Streams records from file into phonebook in batches,
+        every batch is validated and written with single append
+
+        :param phonebook: phonebook to import into
+        :param batch_size: count of records read and written at once
+        """
+        self.phonebook = phonebook
+        self.store = phonebook.store
+        self.columns = phonebook.columns
+        self.batch_size = batch_size
+
+        self.imported = 0
+        self.rejected = 0
+
+
+    def _check(self, data) -> tuple:
+        """
+        Validates data of record read from file
+
+        Returns:
+         - (record with cleaned values, None) if data is valid
+         - (None, error) if data is not valid
+        """
+        if not isinstance(data, dict):
+            return None, 'Строка не является объектом'
+        # csv row with more values than header has them under None key
+        if None in data:
+            return None, 'Лишние значения в строке'
+        unknown = [str(key) for key in data if key not in self.columns]
+        if unknown:
+            return None, 'Неизвестные поля: ' + ', '.join(unknown)
+
+        record, error = self.phonebook._check_record(data)
+        if error:
+            return None, error
+        if not any(record.values()):
+            return None, 'Пустая запись'
+        return record, None
+
+    def run(self, source: str, report: str = None) -> tuple:
+        """
+        Imports all records from source, returns (imported, rejected) counts.
+        Raises ValueError with unknown columns if csv header doesn't match phonebook,
+        nothing is imported then
+
+        :param source: path to csv or jsonl file, "-" for stdin
+        :param report: path to csv file for rejected records,
+                       defaults to source with ".rejected.csv" suffix
+        """
+        if report is None:
+            report = ('import' if source == '-' else source) + '.rejected.csv'
+
+        report_file = None
+        report_writer = None
+
+        records = read_records(source, self.columns)
+
+        try:
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+
+                valid = []
+                rejected = []
+                for data, line, error in batch:
+                    if error is None:
+                        record, error = self._check(data)
+                    if error:
+                        # source line keeps values of unknown fields, that report columns don't have
+                        if isinstance(data, dict):
+                            rejected.append({**data, 'Строка': line, 'Ошибка': error})
+                        else:
+                            rejected.append({'Строка': line, 'Ошибка': error})
+                        continue
+
+                    valid.append(record)
+
+                # IDs are assigned by store for whole batch at once
+                self.store.add_many(valid)
+                self.imported += len(valid)
+
+                if rejected:
+                    # report is created only if there are rejected records
+                    if report_writer is None:
+                        report_file = open(report, 'w', encoding='utf-8', newline='')
+                        report_writer = csv.DictWriter(
+                            f=report_file,
+                            fieldnames=self.columns + ['Строка', 'Ошибка'],
+                            delimiter=';',
+                            lineterminator='\n',
+                            extrasaction='ignore'
+                        )
+                        report_writer.writeheader()
+                    report_writer.writerows(rejected)
+                    self.rejected += len(rejected)
+        finally:
+            if report_file is not None:
+                report_file.close()
+
+        return self.imported, self.rejected
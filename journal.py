@@ -0,0 +1,109 @@
+import os
+import json
+
+
+class Journal:
+    def __init__(self, filename: str):
+        """
+        Append-only log of record changes, stored next to phonebook file.
+        Every line is a JSON object:
+         - {"op": "update", "id": "1", "fields": {"Имя": "..."}}
+         - {"op": "delete", "id": "1"}
+
+        :param filename: path to phonebook file, journal gets ".journal" suffix
+        """
+        self.filename = filename + '.journal'
+
+
+    def size(self) -> int:
+        """Returns journal size in bytes"""
+        try:
+            return os.path.getsize(self.filename)
+        except FileNotFoundError:
+            return 0
+
+    def signature(self) -> tuple:
+        """Returns (mtime, size, inode) of journal or None if there is no journal"""
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def entries(self, end: int = None, start: int = 0):
+        """
+        A generator that returns journal entries in order they were written
+
+        :param end: stop reading at this byte offset, None(default) for whole file
+        :param start: byte offset of first entry to read
+        """
+        if not os.path.exists(self.filename):
+            return
+
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            data = f.read() if end is None else f.read(max(end - start, 0))
+
+        for line in data.split(b'\n'):
+            if not line:
+                continue
+            # last line could be partially written if process was killed
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+    def append(self, entries: list):
+        """
+        Appends entries to the end of journal with single write
+
+        :param entries: list of dicts
+        """
+        data = ''.join(
+            json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries
+        ).encode('utf-8')
+        with open(self.filename, 'ab+') as f:
+            # line left partially written by killed process must not swallow new entry
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    data = b'\n' + data
+            f.write(data)
+
+    @staticmethod
+    def update_entry(record_id, fields: dict) -> dict:
+        """Returns record update entry, entries are written with append"""
+        return {'op': 'update', 'id': str(record_id), 'fields': fields}
+
+    @staticmethod
+    def delete_entry(record_id) -> dict:
+        """Returns record delete entry, entries are written with append"""
+        return {'op': 'delete', 'id': str(record_id)}
+
+    def update(self, record_id, fields: dict):
+        """Writes record update entry"""
+        self.append([self.update_entry(record_id, fields)])
+
+    def delete(self, record_id):
+        """Writes record delete entry"""
+        self.append([self.delete_entry(record_id)])
+
+    def truncate(self, offset: int = None):
+        """
+        Removes entries that were already folded into phonebook file
+
+        :param offset: byte offset of first entry to keep, None(default) to clear journal
+        """
+        if offset is None or offset >= self.size():
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            return
+
+        with open(self.filename, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+
+        temp = f'{self.filename}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(tail)
+        os.replace(temp, self.filename)
@@ -0,0 +1,90 @@
+import heapq
+
+from base_store import BaseStore
+from exporter import filter_records
+from search_index import TokenIndex
+
+
+# smaller sets of candidates are narrowed by checking every record,
+# bigger ones are intersected with index results of new terms
+FILTER_LIMIT = 200
+
+
+class LiveSearch:
+    def __init__(self, store: BaseStore, filter_limit: int = FILTER_LIMIT):
+        """
+        Search that is repeated on every key while query is typed.
+        When query grows, results of previous query are narrowed
+        instead of searching all records again, and results of shorter
+        queries are kept, so erasing letters doesn't search at all.
+        Results are sets of IDs, records are read only for shown page
+
+        :param store: storage of records
+        :param filter_limit: biggest count of candidates that are checked one by one
+        """
+        self.store = store
+        self.filter_limit = filter_limit
+        # stack of (terms, set of IDs) of previous queries, every query narrows previous one
+        self._steps = []
+
+
+    @staticmethod
+    def _narrows(terms: set, previous_terms: set) -> bool:
+        """
+        Returns True if every record found by terms is found by previous terms:
+        every previous term is beginning of some of new terms
+        """
+        return all(
+            any(term.startswith(previous) for term in terms) for previous in previous_terms
+        )
+
+    def search(self, query: str) -> set:
+        """
+        Returns IDs of records containing all words of query, matched by prefix like search
+
+        :param query: search terms separated with spaces
+        """
+        terms = TokenIndex.tokenize(query)
+        # results of longer or other queries are dropped, e.g. after letter was erased
+        while self._steps and not self._narrows(terms, self._steps[-1][0]):
+            self._steps.pop()
+        if not terms:
+            return set()
+
+        if not self._steps:
+            ids = self.store.search_ids(query)
+        else:
+            previous_terms, ids = self._steps[-1]
+            if terms == previous_terms:
+                return ids
+            ids = self._narrow(ids, terms - previous_terms)
+
+        self._steps.append((terms, ids))
+        return ids
+
+    def _narrow(self, ids: set, terms: set) -> set:
+        """Returns IDs of candidates that contain every new term"""
+        if not terms or not ids:
+            return ids
+
+        query = ' '.join(terms)
+        if len(ids) > self.filter_limit:
+            return ids & self.store.search_ids(query)
+
+        id_column = self.store.columns[0]
+        records = (self.store.get(record_id) for record_id in ids)
+        records = (record for record in records if record is not None)
+        return {record[id_column] for record in filter_records(records, query)}
+
+    def first(self, ids: set, count: int) -> list:
+        """
+        Returns list of records with smallest IDs, only they are read
+
+        :param ids: IDs returned by search
+        :param count: count of records
+        """
+        records = (
+            self.store.get(record_id)
+            for record_id in heapq.nsmallest(count, ids, key=self.store.id_key)
+        )
+        return [record for record in records if record is not None]
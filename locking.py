@@ -0,0 +1,77 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # advisory locks are not available on Windows, locking becomes no-op
+    fcntl = None
+
+# locks held by current thread, lock filename -> [fd, shared, nesting depth]
+_held = threading.local()
+
+
+class FileLock:
+    def __init__(self, filename: str, shared: bool = False):
+        """
+        Advisory inter-process lock, held on separate ".lock" file
+        so phonebook file itself can be replaced while locked.
+        Lock is reentrant within thread: nested lock of same file is no-op,
+        shared lock can be taken inside exclusive one, but not vice versa
+
+        :param filename: path to phonebook file
+        :param shared: shared lock for readers, exclusive for writers
+        """
+        self.filename = filename + '.lock'
+        self.shared = shared
+
+
+    @staticmethod
+    def _locks() -> dict:
+        if not hasattr(_held, 'locks'):
+            _held.locks = {}
+        return _held.locks
+
+    def acquire(self):
+        if fcntl is None:
+            return
+
+        locks = self._locks()
+        lock = locks.get(self.filename)
+        if lock is not None:
+            # upgrade of flock isn't atomic, other process could take lock in between
+            if lock[1] and not self.shared:
+                raise RuntimeError('Shared lock can not be upgraded to exclusive')
+            lock[2] += 1
+            return
+
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        locks[self.filename] = [fd, self.shared, 1]
+
+    def release(self):
+        if fcntl is None:
+            return
+
+        locks = self._locks()
+        lock = locks.get(self.filename)
+        if lock is None:
+            return
+        lock[2] -= 1
+        if lock[2]:
+            return
+
+        del locks[self.filename]
+        fcntl.flock(lock[0], fcntl.LOCK_UN)
+        os.close(lock[0])
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
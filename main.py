@@ -1,7 +1,10 @@
 ﻿import sys
 import os
 
+import profiling
 from phonebook import Phonebook
+from commands import COMMANDS, parse_command, run_command
+from storage import STORES, create_file
 
 
 def process_file(
@@ -17,19 +20,53 @@ def process_file(
     if not os.path.exists(data_folder):
         return 'dir_not_found'
 
-    # add extension if provided without
-    if not filename.split('.')[-1] == 'csv':
+    # add extension if provided without, binary format is kept
+    if os.path.splitext(filename)[1].lower() not in STORES:
         filename += '.csv'
 
     file_path = os.path.join(data_folder, filename)
     # check if file exists, create if not
     if not os.path.exists(file_path):
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(';'.join(columns) + '\n')
+        create_file(file_path, columns)
         
     return file_path
 
 
+def serve(file: str, columns: list, args: list):
+    """
+    Runs phonebook server until interrupted,
+    unix socket next to phonebook file is used by default
+    """
+    # imported here, asyncio takes longer to import than the rest of program
+    import socket
+    import asyncio
+    from server import PhonebookServer
+
+    path = None
+    port = None
+    try:
+        if '--port' in args:
+            port = int(args[args.index('--port') + 1])
+        elif '--socket' in args:
+            path = args[args.index('--socket') + 1]
+        elif hasattr(socket, 'AF_UNIX'):
+            path = file + '.sock'
+        else:
+            port = 8765
+    except (IndexError, ValueError):
+        print('Укажите путь к сокету или номер порта')
+        return 1
+
+    phonebook = Phonebook(file, columns)
+    print('Загрузка справочника...', flush=True)
+    try:
+        asyncio.run(PhonebookServer(phonebook).serve(path, port=port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print('Сервер остановлен')
+    finally:
+        phonebook.store.close()
+
+
 def main():
     """
     This method stands for basic config, work with CLI arguments
@@ -37,15 +74,35 @@ def main():
     """
 
     columns = ['ИД', 'Имя', 'Фамилия', 'Отчество',
-               'Компания', 'Рабочий номер', 'Личный номер']
+               'Компания', 'Рабочий номер', 'Личный номер']
     
-    args = sys.argv[1:]
+    # profiling is enabled before anything runs, flag is removed from arguments
+    args = profiling.setup(sys.argv[1:])
     text = []
-    file = process_file(columns=columns)
 
+    # batch commands run without interface and exit
+    if args and args[0] in COMMANDS:
+        options = parse_command(args)
+        if options.file:
+            filepath = os.path.split(options.file)
+            file = process_file(
+                columns=columns,
+                data_folder=filepath[0] or '.',
+                filename=filepath[1]
+            )
+        else:
+            file = process_file(columns=columns)
+
+        if file == 'dir_not_found':
+            print('Директория не найдена. Возможно целевая папка не создана.')
+            return 1
+
+        return run_command(options, file, columns)
+
+    file = process_file(columns=columns)
     
     # list of commands for future use
-    commands = ['--help', '-h', '--file', '-f']
+    commands = ['--help', '-h', '--file', '-f', '--serve']
 
     # it only gets here if command is unknown
     if args and not any(arg in commands for arg in args):
@@ -56,7 +113,16 @@ def main():
         text.extend([
             'Запуск без аргументов запустит программу со значениями по умолчанию',
             '--help -h\t\tОтобразить эту информацию',
-            '--file -f [path\\to\\file]\t\tУказать файл справочника',
+            '--file -f [path\\to\\file]\t\tУказать файл справочника',
+            '--serve [--socket path | --port N]\tЗапустить сервер справочника, '
+            'запросы принимаются в формате JSON построчно, см. client.py',
+            '--profile[=cprofile[:path]]\tПри выходе вывести время операций и счетчики '
+            'чтения и записи или сохранить профиль cProfile, '
+            f'также включается переменной окружения {profiling.ENVIRONMENT_VARIABLE}',
+            '',
+            'Пакетные команды, выполняются без интерфейса:',
+            'search, phone, get, add, delete, import, export, convert, dedup',
+            'Подробнее: main.py [команда] --help',
         ])
         print('\n'.join(text))
         return
@@ -67,12 +133,12 @@ def main():
         try:
             filepath = os.path.split(args[index + 1])
         except IndexError:
-            print('Укажите имя файла')
+            print('Укажите имя файла')
             return
 
         file = process_file(
             columns=columns,
-            data_folder=filepath[0],
+            data_folder=filepath[0] or '.',
             filename=filepath[1]
         )
 
@@ -80,12 +146,18 @@ def main():
             print('Директория не найдена. Возможно целевая папка не создана.')
             return
 
+    if '--serve' in args:
+        return serve(file, columns, args)
+
     Phonebook(file, columns).run()
           
 
 
 if __name__ == '__main__':
+    # batch commands return exit code, interactive mode returns None
+    exit_code = None
     try:
-        main()
-    except (KeyboardInterrupt, SystemExit):
-        print('До свидания!')
\ No newline at end of file
+        exit_code = main()
+    except KeyboardInterrupt:
+        print('До свидания!')
+    sys.exit(exit_code)
\ No newline at end of file
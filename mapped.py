@@ -0,0 +1,120 @@
+import os
+import csv
+import mmap
+
+
+class MappedFile:
+    def __init__(self, filename: str, delimiter: str = ';'):
+        """
+        Read-only memory-mapped phonebook file. Lines and fields are found
+        directly in mapped bytes and only returned fields are decoded.
+        Should be used as context manager
+
+        :param filename: path to phonebook file
+        :param delimiter: csv delimiter
+        """
+        self.filename = filename
+        self.delimiter = delimiter.encode('utf-8')
+        self._file = None
+        self.data = b''
+
+
+    def __enter__(self):
+        self._file = open(self.filename, 'rb')
+        # empty files can't be mapped
+        if os.fstat(self._file.fileno()).st_size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, *exc):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b''
+        self._file.close()
+
+
+    def __len__(self):
+        return len(self.data)
+
+    def lines(self, start: int = 0, end: int = None):
+        """
+        A generator that returns (offset, line) for lines between offsets,
+        line is returned without line break
+
+        :param start: offset of first line
+        :param end: offset where scanning stops, None(default) for end of file
+        """
+        data = self.data
+        if end is None:
+            end = len(data)
+
+        position = start
+        while position < end:
+            line_end = data.find(b'\n', position, end)
+            if line_end == -1:
+                line_end = end
+            yield position, data[position:line_end]
+            position = line_end + 1
+
+    def header_end(self) -> int:
+        """Returns offset of first row after header line"""
+        line_end = self.data.find(b'\n')
+        return len(self.data) if line_end == -1 else line_end + 1
+
+    def first_field(self, line: bytes) -> bytes:
+        """Returns raw first field of line, e.g. record ID, nothing is decoded"""
+        return line.split(self.delimiter, 1)[0]
+
+    def row(self, line: bytes) -> list:
+        """
+        Returns list of decoded fields of line.
+        Quoted fields may contain delimiter, such lines are parsed with csv
+        """
+        text = line.decode('utf-8').rstrip('\r')
+        if '"' in text:
+            return next(csv.reader([text], delimiter=self.delimiter.decode('utf-8')), [])
+        return text.split(self.delimiter.decode('utf-8'))
+
+    def rows(self, start: int = 0, chunk_size: int = 1024 * 1024):
+        """
+        A generator that returns decoded rows from offset to end of file.
+        File is decoded by chunks of complete lines, so whole file
+        is never copied to memory at once. Empty lines are skipped
+
+        :param start: offset of first line
+        :param chunk_size: approximate size of decoded chunk in bytes
+        """
+        data = self.data
+        delimiter = self.delimiter.decode('utf-8')
+        end = len(data)
+
+        position = start
+        while position < end:
+            chunk_end = data.find(b'\n', min(position + chunk_size, end) - 1)
+            chunk_end = end if chunk_end == -1 else chunk_end + 1
+
+            text = data[position:chunk_end].decode('utf-8')
+            position = chunk_end
+
+            # quoted fields are handled by csv, empty lines give empty rows
+            for row in csv.reader(text.splitlines(), delimiter=delimiter):
+                if row:
+                    yield row
+
+    def read_lines(self, offset: int, skip: int, count: int) -> list:
+        """
+        Returns list of raw lines starting from offset
+
+        :param offset: offset of line to start from
+        :param skip: count of lines to skip first
+        :param count: count of lines to return
+        """
+        lines = []
+        for _, line in self.lines(offset):
+            if skip:
+                skip -= 1
+                continue
+            if len(lines) == count:
+                break
+            lines.append(line)
+        return lines
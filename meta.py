@@ -0,0 +1,114 @@
+import os
+import json
+import uuid
+import zlib
+
+from mapped import MappedFile
+
+
+class Metadata:
+    def __init__(self, filename: str, read_ids):
+        """
+        Sidecar file with next record ID, rows count and checksum of phonebook file.
+        Stored values are trusted only while file size and mtime match,
+        otherwise they are recalculated with single pass over file.
+        Generation changes whenever file is rewritten and is kept by appends
+
+        :param filename: path to phonebook file, metadata gets ".meta" suffix
+        :param read_ids: function that takes mapped file and returns raw IDs of all rows
+        """
+        self.filename = filename
+        self.meta_filename = filename + '.meta'
+        self.read_ids = read_ids
+
+
+    def _read(self) -> dict:
+        try:
+            with open(self.meta_filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, meta: dict):
+        """Replaces metadata file atomically"""
+        temp = f'{self.meta_filename}.{os.getpid()}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp, self.meta_filename)
+
+    def _stat(self, meta: dict) -> dict:
+        stat = os.stat(self.filename)
+        meta['size'] = stat.st_size
+        meta['mtime'] = stat.st_mtime_ns
+        return meta
+
+
+    def scan(self, min_next_id: int = 1) -> dict:
+        """
+        Recalculates metadata from file and saves it
+
+        :param min_next_id: next ID is never lower than this,
+                            so IDs of deleted records are not reused
+        """
+        rows = 0
+        max_id = 0
+
+        with MappedFile(self.filename) as mapped:
+            # checksum is calculated over mapping without copying file
+            checksum = zlib.crc32(mapped.data)
+            for record_id in self.read_ids(mapped):
+                rows += 1
+                if record_id.isdigit():
+                    max_id = max(max_id, int(record_id))
+
+        meta = self._stat({
+            'next_id': max(max_id + 1, min_next_id),
+            'rows': rows,
+            'checksum': checksum,
+            # random, so it never repeats even if metadata was lost
+            'generation': uuid.uuid4().hex,
+        })
+        self._write(meta)
+        return meta
+
+    def current(self) -> dict:
+        """Returns metadata that matches current state of file"""
+        meta = self._read()
+        if meta is None or 'generation' not in meta:
+            return self.scan(meta.get('next_id', 1) if meta else 1)
+
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return meta
+
+        if meta.get('size') != stat.st_size or meta.get('mtime') != stat.st_mtime_ns:
+            # file was changed by someone who doesn't know about metadata
+            return self.scan(meta.get('next_id', 1))
+        return meta
+
+    def next_id(self) -> int:
+        """Returns ID that will be assigned to next record"""
+        return self.current()['next_id']
+
+    def appended(self, meta: dict, data: bytes, rows: int, next_id: int):
+        """
+        Updates metadata after rows were appended to file,
+        checksum is extended with appended bytes only
+
+        :param meta: metadata before append
+        :param data: appended bytes
+        :param rows: count of appended rows
+        :param next_id: ID for next record after append
+        """
+        self._write(self._stat({
+            'next_id': next_id,
+            'rows': meta['rows'] + rows,
+            'checksum': zlib.crc32(data, meta['checksum']),
+            'generation': meta['generation'],
+        }))
+
+    def rewritten(self) -> dict:
+        """Recalculates metadata after file was rewritten, next ID is kept"""
+        meta = self._read() or {}
+        return self.scan(meta.get('next_id', 1))
@@ -0,0 +1,136 @@
+import os
+from array import array
+
+import sidecar
+from mapped import MappedFile
+
+
+class OffsetIndex:
+    # bump when pickled structure changes
+    version = 1
+
+    def __init__(self, filename: str, stride: int = 1000):
+        """
+        Byte offsets of every Nth row of phonebook file,
+        lets to read any page of rows with single seek.
+        Rows are expected to take one line each
+
+        :param filename: path to phonebook file, index gets ".offsets" suffix
+        :param stride: offset is stored for every stride-th row
+        """
+        self.filename = filename
+        self.index_filename = filename + '.offsets'
+        self.stride = stride
+
+        self.offsets = array('q')
+        self.rows = 0
+        # (mtime, size, inode) of file index was built for
+        self.signature = None
+        self.dirty = False
+
+
+    def _file_signature(self) -> tuple:
+        stat = os.stat(self.filename)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _add_lines(self, data, start: int, end: int = None):
+        """
+        Counts lines of data and stores offsets of every stride-th row
+
+        :param data: bytes or mapped file data of complete lines
+        :param start: offset of first line in data
+        :param end: offset where counting stops, None(default) for end of data
+        """
+        position = start
+        if end is None:
+            end = len(data)
+        while position < end:
+            if self.rows % self.stride == 0:
+                self.offsets.append(position)
+            self.rows += 1
+
+            position = data.find(b'\n', position, end) + 1
+            if position == 0:
+                break
+
+    def build(self):
+        """Scans whole file without copying it to memory, header line is skipped"""
+        self.offsets = array('q')
+        self.rows = 0
+
+        with MappedFile(self.filename) as mapped:
+            self._add_lines(mapped.data, mapped.header_end())
+
+        self.signature = self._file_signature()
+        self.dirty = True
+
+    def ensure(self):
+        """Makes index match current file, loads saved index or builds new one"""
+        signature = self._file_signature()
+        if self.signature == signature:
+            return
+        if self.load() and self.signature == signature:
+            return
+        self.build()
+
+    def appended(self, old_signature: tuple, data: bytes):
+        """
+        Updates index after rows were appended to file
+
+        :param old_signature: (mtime, size, inode) of file before append
+        :param data: appended bytes
+        """
+        if self.signature is None or self.signature != old_signature:
+            # index is outdated anyway, it will be rebuilt when needed
+            self.signature = None
+            return
+
+        # offsets are relative to data, shift them to position in file
+        first = len(self.offsets)
+        self._add_lines(data, 0)
+        for i in range(first, len(self.offsets)):
+            self.offsets[i] += old_signature[1]
+        self.signature = self._file_signature()
+        self.dirty = True
+
+    def read(self, mapped: MappedFile, start: int, count: int) -> list:
+        """
+        Returns list of raw lines of rows from start to start + count
+
+        :param mapped: opened mapped phonebook file
+        :param start: number of first row, starting from 0
+        :param count: count of rows
+        """
+        self.ensure()
+        if start >= self.rows or count <= 0:
+            return []
+
+        return mapped.read_lines(
+            self.offsets[start // self.stride],
+            start % self.stride,
+            min(count, self.rows - start)
+        )
+
+
+    def save(self):
+        """Saves index to file"""
+        sidecar.save(self.index_filename, {
+            'version': self.version,
+            'stride': self.stride,
+            'signature': self.signature,
+            'rows': self.rows,
+            'offsets': self.offsets,
+        })
+        self.dirty = False
+
+    def load(self) -> bool:
+        """Loads saved index, returns False if there is no valid or trusted saved index"""
+        data = sidecar.load(self.index_filename)
+        if not isinstance(data, dict) or data.get('version') != self.version or data.get('stride') != self.stride:
+            return False
+
+        self.signature = data['signature']
+        self.rows = data['rows']
+        self.offsets = data['offsets']
+        self.dirty = False
+        return True
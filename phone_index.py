@@ -0,0 +1,107 @@
+import re
+import bisect
+
+
+class PhoneIndex:
+    def __init__(self):
+        """
+        Sorted index of phone numbers digits to record IDs,
+        supports exact, prefix and suffix lookups by binary search
+        """
+        # sorted lists of (digits, record ID) and (reversed digits, record ID)
+        self._numbers = []
+        self._reversed = []
+
+
+    @staticmethod
+    def normalize(number: str) -> str:
+        """
+        Returns digits of number in canonical form, numbers are indexed and looked for
+        in this form. 8 at the beginning of russian number is same as +7,
+        so "8 912 ..." and "+7 912 ..." give same digits
+        """
+        digits = re.sub(r'\D', '', number)
+        if len(digits) == 11 and digits.startswith('8'):
+            digits = '7' + digits[1:]
+        return digits
+
+    def _record_numbers(self, values: list) -> set:
+        numbers = (self.normalize(value) for value in values)
+        return {number for number in numbers if number}
+
+    @classmethod
+    def build(cls, rows, columns: list):
+        """
+        Builds index from scratch
+
+        :param rows: iterable of rows, first value of row is record ID
+        :param columns: positions of phone columns in row
+        """
+        index = cls()
+        for row in rows:
+            for number in index._record_numbers(row[column] for column in columns):
+                index._numbers.append((number, row[0]))
+                index._reversed.append((number[::-1], row[0]))
+
+        index._numbers.sort()
+        index._reversed.sort()
+        return index
+
+    def add(self, record_id: str, values: list):
+        """
+        Adds record numbers to index
+
+        :param record_id: record ID
+        :param values: list of phone numbers of record
+        """
+        for number in self._record_numbers(values):
+            bisect.insort(self._numbers, (number, record_id))
+            bisect.insort(self._reversed, (number[::-1], record_id))
+
+    def remove(self, record_id: str, values: list):
+        """
+        Removes record numbers from index
+
+        :param record_id: record ID
+        :param values: list of phone numbers of record that were indexed
+        """
+        for number in self._record_numbers(values):
+            for items, key in [(self._numbers, number), (self._reversed, number[::-1])]:
+                position = bisect.bisect_left(items, (key, record_id))
+                if position < len(items) and items[position] == (key, record_id):
+                    del items[position]
+
+    def update(self, record_id: str, old_values: list, new_values: list):
+        """Reindexes record after its numbers were changed"""
+        old_numbers = self._record_numbers(old_values)
+        new_numbers = self._record_numbers(new_values)
+        if old_numbers != new_numbers:
+            self.remove(record_id, old_numbers - new_numbers)
+            self.add(record_id, new_numbers - old_numbers)
+
+
+    def find(self, number: str, mode: str = 'exact') -> set:
+        """
+        Returns IDs of records that have matching number
+
+        :param number: number to look for, it's normalized like indexed numbers
+        :param mode: "exact", "prefix" or "suffix" match
+        """
+        digits = self.normalize(number)
+        if not digits:
+            return set()
+
+        if mode == 'suffix':
+            items, key = self._reversed, digits[::-1]
+        else:
+            items, key = self._numbers, digits
+
+        start = bisect.bisect_left(items, (key,))
+        if mode == 'exact':
+            # any digits string with key as prefix is bigger than key + '\0'
+            end = bisect.bisect_left(items, (key + '\0',), start)
+        else:
+            # ':' goes right after digits, so it bounds all numbers with prefix
+            end = bisect.bisect_left(items, (key + ':',), start)
+
+        return {record_id for _, record_id in items[start:end]}
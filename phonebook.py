@@ -1,22 +1,28 @@
 ﻿from typing import Union
 
-import os
-import csv
 import re
 
+from base_store import ConflictError
+from cache import LRUCache
+from screen import Screen
+from storage import open_store
+
+
+# list commands that change order of all records, None is file order
+SORT_COMMANDS = {'s': None, 'si': 'id', 'sf': 'surname', 'sc': 'company'}
+ORDER_NAMES = {None: 'как в файле', 'id': 'по ИД', 'surname': 'по фамилии', 'company': 'по компании'}
+
 
 class Phonebook:
-    def __init__(self, filename: str, columns: list):
+    def __init__(self, filename: str, columns: list, cache_size: int = 128):
         """
         Main logic class, allows to work with phonebook
 
         :param filename: path to phonebook file
         :param columns: list of columns in file
+        :param cache_size: count of search results and pages kept in cache
         """
 
-        # clears console for better visuals
-        self._clear()
-
         self.filename = filename
         self.record_check = False
         self.chosen_record = None
@@ -24,81 +30,75 @@ class Phonebook:
         self.page = 1
         self.pages = 1
         self.items_on_page = 9
+        # order of list of all records, see SORT_COMMANDS
+        self.order = None
 
         self.columns = columns
-        
+        self.store = open_store(filename, columns)
+        self.screen = Screen()
+
+        # results are cached by query and generation, generation is bumped by every change
+        self.cache = LRUCache(cache_size)
+        self.generation = 0
+
 
     def _clear(self):
-        """Clears console"""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        """Starts new screen, it replaces old one when input is requested"""
+        self.screen.clear()
 
     
     def get_records(self):
         """Returns list of dicts of records from file"""
-        with open(self.filename, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f, delimiter=';')
-            return list(reader)
+        return self.store.records()
         
     def write_records(self, records: list):
         """Rewrites all records to file with header"""
-        with open(self.filename, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(
-                f=f,
-                fieldnames=self.columns,
-                delimiter=';',
-                lineterminator='\n'
-            )
-            writer.writeheader()
-            writer.writerows(records)
+        self.store.write(records)
+        self._changed()
+
+
+    def _changed(self):
+        """Bumps data generation after records were changed, cached results become stale"""
+        self.generation += 1
+        # old results can't be hit anymore, so they are dropped right away
+        self.cache.clear()
+
+    def _cached(self, key: tuple, compute):
+        """
+        Returns cached result for key or computes and caches it.
+        Changes made by other processes change store state, so they make results stale too
+
+        :param key: tuple of kind of result and normalized query
+        :param compute: function without arguments that returns result
+        """
+        return self.cache.get(key + (self.generation, self.store.state()), compute)
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Returns query as cache key, case and extra spaces don't change results"""
+        return ' '.join(query.lower().split())
 
 
-    def pagination(self, data: list) -> list:
-        """Returns paginated list of records according to current page"""
-        if len(data) > self.items_on_page:
-            self.pages = (len(data) - 1) // self.items_on_page + 1
+    def pagination(self, data: list = None) -> list:
+        """
+        Returns paginated list of records according to current page
+
+        :param data: list of records, None(default) to read only current page of all records
+        """
+        total = self.store.count() if data is None else len(data)
+        self.pages = max(1, (total - 1) // self.items_on_page + 1)
+        self.page = min(self.page, self.pages)
 
         start_index = (self.page - 1) * self.items_on_page
         end_index = start_index + self.items_on_page
 
+        if data is None:
+            if self.order is not None:
+                return self.store.sorted_page(self.order, start_index, self.items_on_page)
+            return self.store.page(start_index, self.items_on_page)
         return data[start_index:end_index]
     
     
-    def reverse_readline(self, buf_size=8192):
-        """
-        A generator that returns the lines of a file in reverse order
-        source: https://stackoverflow.com/questions/2301789/how-to-read-a-file-in-reverse-order
-        """
-        with open(self.filename, 'rb') as fh:
-            segment = None
-            offset = 0
-            fh.seek(0, os.SEEK_END)
-            file_size = remaining_size = fh.tell()
-            while remaining_size > 0:
-                offset = min(file_size, offset + buf_size)
-                fh.seek(file_size - offset)
-                buffer = fh.read(min(remaining_size, buf_size)).decode(encoding='utf-8')
-                remaining_size -= buf_size
-                lines = buffer.split('\n')
-                # The first line of the buffer is probably not a complete line so
-                # we'll save it and append it to the last line of the next buffer
-                # we read
-                if segment is not None:
-                    # If the previous chunk starts right from the beginning of line
-                    # do not concat the segment to the last line of new chunk.
-                    # Instead, yield the segment first 
-                    if buffer[-1] != '\n':
-                        lines[-1] += segment
-                    else:
-                        yield segment
-                segment = lines[0]
-                for index in range(len(lines) - 1, 0, -1):
-                    if lines[index]:
-                        yield lines[index]
-            # Don't yield None if the file was empty
-            if segment is not None:
-                yield segment
-
-
     def add_record(self):
         """
         Record adding logic, preforms simple input validation and writes to file
@@ -112,31 +112,21 @@ class Phonebook:
                 'Номер должен начинаться с +, 7 или 8\n'
         ]
         
-        print('\n'.join(text))
+        self.screen.print('\n'.join(text))
 
         data = {}
         user_input = None
-        last_id = None
 
-        # get last line for id
-        for line in self.reverse_readline():
-            # in case file has empty lines
-            try:
-                last_id = int(line.split(';')[0])
-            except ValueError:
-                continue
-            
-            break
+        # ID is assigned by store on write, other process could take this one before
+        next_id = self.store.next_id()
         
         # columns stands for steps when adding new records
         for step in self.columns:
             text.append(f"{step}: ")
-            last_id += 1
 
             # automatically assign ID
             if step == 'ИД':
-                text[-1] += str(last_id)
-                data[step] = last_id
+                text[-1] += str(next_id)
                 continue
 
             # break from this for cycle into main menu
@@ -149,9 +139,9 @@ class Phonebook:
 
                 # print out incorrect input message after clear
                 if not check:
-                    print('Некорректный ввод, попробуйте еще раз')
+                    self.screen.print('Некорректный ввод, попробуйте еще раз')
                     
-                user_input = input(f'{step} > ')
+                user_input = self.screen.input(f'{step} > ')
             
                 # break from this cycle and prevent executing unnecessary code
                 if user_input == 'q':
@@ -181,18 +171,56 @@ class Phonebook:
 
                 # clear console and reprint text for better visuals
                 self._clear()
-                print('\n'.join(text))
+                self.screen.print('\n'.join(text))
                 break
         
         # when data collection done, write it to file
-        with open(self.filename, 'a', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(
-                f=f,
-                fieldnames=self.columns,
-                delimiter=';',
-                lineterminator='\n'
-            )
-            writer.writerow(data)
+        self.store.add(data)
+        self._changed()
+
+    
+    def create_record(self, data: dict) -> Union[dict, bool]:
+        """
+        Non-interactive record adding, validates data the same way as add_record,
+        assigns ID and writes record to file
+
+        Returns:
+         - written record if data is valid
+         - False if data is not valid
+        """
+        record, error = self._check_record(data)
+        if error:
+            return False
+
+        record = self.store.add(record)
+        self._changed()
+        return record
+
+
+    def _check_record(self, data: dict) -> tuple:
+        """
+        helper function, validates all record fields except ID
+        with _check_name and _check_number, empty fields are allowed
+
+        Returns:
+         - (record with cleaned values, None) if data is valid
+         - (None, name of first invalid column) if data is not valid
+        """
+        record = {}
+        for column in self.columns[1:]:
+            value = str(data.get(column) or '')
+
+            if value:
+                if 'номер' in column:
+                    value = self._check_number(value)
+                else:
+                    value = self._check_name(value)
+                if not value:
+                    return None, column
+
+            record[column] = value
+
+        return record, None
 
     
     def _check_name(self, name: str) -> bool:
@@ -233,11 +261,12 @@ class Phonebook:
         # indicators to print success or not found message after clearing console
         success_indicator = False
         not_found = False
+        conflict = False
 
         while True:
             self._clear()
             
-            print('\n'.join(
+            self.screen.print('\n'.join(
                 [
                     '-- Удаление записи --',
                     'Для удаления записи отправьте её ИД',
@@ -246,13 +275,16 @@ class Phonebook:
             ))
 
             if success_indicator:
-                print(f'Запись удалена!')
+                self.screen.print(f'Запись удалена!')
                 success_indicator = False
             elif not_found:
-                print('Запись не найдена')
+                self.screen.print('Запись не найдена')
                 not_found = False
+            elif conflict:
+                self.screen.print('Запись была изменена другим пользователем, проверьте её и повторите удаление')
+                conflict = False
 
-            user_input = input('>>> ')
+            user_input = self.screen.input('>>> ')
 
             if user_input == 'q':
                 break
@@ -261,74 +293,127 @@ class Phonebook:
             if not user_input.isdigit():
                 continue
 
-            records = self.get_records()
-            
-            # iterate over records copy but modify original
-            for record in records.copy():
-                if record['ИД'] == user_input:
-
-                    # additional check before deleting
-                    delete_input = input(
-                        'Подтвердите удаление[y/n]:\n'
-                        f'ФИО: {record["Имя"]} {record["Фамилия"]} {record["Отчество"]}\n'
-                        f'Компания: {record["Компания"]}\n'
-                        f'Рабочий номер: {record["Рабочий номер"]}, '
-                        f'Личный номер: {record["Личный номер"]}\n'
-                        '>>> '
+            # O(1) lookup by ID instead of scanning all records
+            record = self.store.get(user_input)
+            if record is None:
+                not_found = True
+                continue
+
+            # additional check before deleting
+            delete_input = self.screen.input(
+                'Подтвердите удаление[y/n]:\n'
+                f'ФИО: {record["Имя"]} {record["Фамилия"]} {record["Отчество"]}\n'
+                f'Компания: {record["Компания"]}\n'
+                f'Рабочий номер: {record["Рабочий номер"]}, '
+                f'Личный номер: {record["Личный номер"]}\n'
+                '>>> '
+            )
+
+            if delete_input.lower() == 'y':
+                # record is deleted only if nobody changed it after it was shown
+                try:
+                    success_indicator = self.store.delete(
+                        user_input, self.store.version(record)
                     )
+                    not_found = not success_indicator
+                    if success_indicator:
+                        self._changed()
+                except ConflictError:
+                    conflict = True
 
-                    if delete_input.lower() == 'y':
-                        records.remove(record)
-                        self.write_records(records)
-                        success_indicator = True
-                    else:
-                        success_indicator = False
-                        continue
-                else:
-                    not_found = True
-                    continue
 
-            continue
 
+    def _render_page(self, records: list = None) -> tuple:
+        """
+        Returns (lines of current page, page, pages count), page is fixed if it's out of range
 
+        :param records: list of records to show, None(default) for all
+        """
+        page_records = self.pagination(records)
+
+        # passed records could be changed after edit, so take actual ones from store
+        if records is not None:
+            page_records = [self.store.get(row['ИД']) for row in page_records]
+            page_records = [row for row in page_records if row is not None]
+
+        lines = []
+        for row in page_records:
+            lines.extend(self._record_lines(row))
+        return lines, self.page, self.pages
+
+    @staticmethod
+    def _record_lines(row) -> list:
+        """Returns lines of record as it's shown in list"""
+        return [
+            f"-- {row['ИД']} -- ",
+            f"ФИО: {row['Имя']} {row['Фамилия']} {row['Отчество']}",
+            f"Компания: {row['Компания']}",
+            f"Рабочий номер: {row['Рабочий номер']}, "
+            f"Личный номер: {row['Личный номер']}",
+        ]
 
-    def show_records(self, records: list = None):
+    def show_records(self, records: list = None, key: tuple = None):
         """
         Prints list of all records or print passed records
         
         :param records: list of records to show, None(default) for all
+        :param key: cache key of passed records, e.g. query they were found by,
+            pages of passed records are not cached without it
         """
+        self.page = 1
+        no_order = False
         while True:
-            if not records:
-                records = self.get_records()
-
             self._clear()
             text = [
-                '-- Список записей --',
+                '-- Список записей --',
                 'Для выхода в главное меню введите "q"',
                 'Для перехода на другую страницу введите "<"\\"p" или ">"\\"n"',
                 'Отправьте номер записи для изменения\n'
             ]
+            if records is None:
+                text[-1:-1] = [
+                    'Для сортировки по ИД, фамилии или компании введите "si", "sf" или "sc", '
+                    'для порядка файла "s"',
+                    'Для перехода к записям на букву введите "/" и начало, например "/К"',
+                ]
 
-            page_records = self.pagination(list(records))
-            
-            # generate printed message
-            for row in page_records:
-                text.extend([
-                    f"-- {row['ИД']} -- ",
-                    f"ФИО: {row['Имя']} {row['Фамилия']} {row['Отчество']}",
-                    f"Компания: {row['Компания']}",
-                    f"Рабочий номер: {row['Рабочий номер']}, "
-                    f"Личный номер: {row['Личный номер']}",
-                ])
+            # paging back and forth shows cached pages until records are changed
+            if records is None or key is not None:
+                order = self.order if records is None else None
+                lines, self.page, self.pages = self._cached(
+                    ('page', key, order, self.page, self.items_on_page),
+                    lambda: self._render_page(records)
+                )
+            else:
+                lines, self.page, self.pages = self._render_page(records)
+            text.extend(lines)
             
             text.append(f'\nСтраница: {self.page}/{self.pages}')
-            print('\n'.join(text))
+            if records is None:
+                text.append(f'Сортировка: {ORDER_NAMES[self.order]}')
+            if no_order:
+                text.append('Переход доступен только в отсортированном списке')
+                no_order = False
+            self.screen.print('\n'.join(text))
 
-            user_input = input('>>> ')
+            user_input = self.screen.input('>>> ')
 
             if user_input == 'q':
                 break
+
+            # sorting and jumping by binary search in sorted index, only for all records
+            if records is None and user_input in SORT_COMMANDS:
+                self.order = SORT_COMMANDS[user_input]
+                self.page = 1
+                continue
+
+            if records is None and user_input.startswith('/') and user_input[1:].strip():
+                if self.order is None:
+                    no_order = True
+                    continue
+                position = self.store.sorted_position(self.order, user_input[1:].strip())
+                self.page = position // self.items_on_page + 1
+                continue
             
             # page changing handlers
             if user_input in ['<', 'p']:
@@ -344,15 +429,14 @@ class Phonebook:
             # goto edit if record selected
             if user_input.isdigit():
                 self.chosen_record = int(user_input)
-                self.edit_menu(records)
+                self.edit_menu()
                 continue
             
     
-    def edit_menu(self, records: list, record_number: int = None):
+    def edit_menu(self, record_number: int = None):
         """
         Entrypoint to record editing menu
 
-        :param records: list of records to update records printed after edit
         :param record_number: record ID to edit
         """
 
@@ -365,12 +449,23 @@ class Phonebook:
         if not record_number:
             record_number = self.chosen_record
 
+        conflict = False
         while True:
+            # changes are saved only if record wasn't changed by someone else meanwhile
+            record = self.store.get(record_number)
+            if record is None:
+                break
+            version = self.store.version(record)
+
             self._clear()
 
-            print('\n'.join(
+            self.screen.print('\n'.join(
                 [
                     f'-- Редактирование записи {record_number} --',
+                    f'ФИО: {record["Имя"]} {record["Фамилия"]} {record["Отчество"]}',
+                    f'Компания: {record["Компания"]}',
+                    f'Рабочий номер: {record["Рабочий номер"]}, '
+                    f'Личный номер: {record["Личный номер"]}',
                     '1. Изменить ФИО',
                     '2. Изменить компанию',
                     '3. Изменить номер телефона',
@@ -378,118 +473,122 @@ class Phonebook:
                 ]
             ))
 
-            user_input = input('>>> ')
+            if conflict:
+                self.screen.print('Запись была изменена другим пользователем, повторите изменение')
+                conflict = False
+
+            user_input = self.screen.input('>>> ')
 
             if user_input == 'q':
                 break
 
             if user_input in ['1', '2', '3']:
-                edit_menu[user_input](record_number, records)
+                try:
+                    edit_menu[user_input](record_number, version)
+                except ConflictError:
+                    conflict = True
+                    continue
                 break
 
-    def edit_name(self, record_number: int, records: list):
+    def edit_name(self, record_number: int, version: int = None):
         """
         edit first name, last name and surname
         
         :param record_number: record ID to edit
-        :param records: list of records to update
+        :param version: version of record that is edited
         """
         self._clear()
         
-        print('Введите новое ФИО, что бы пропустить шаг поле можно оставить пустым\n'
+        self.screen.print('Введите новое ФИО, что бы пропустить шаг поле можно оставить пустым\n'
               'Для возврата назад введите "q"')
 
-        
-        
         steps = ['Имя', 'Фамилия', 'Отчество']
-        new_data = []
+        new_data = {}
         for step in steps:
             while True:
-                user_input = input(f'{step} > ')
+                user_input = self.screen.input(f'{step} > ')
 
-                if user_input == 'q' or not user_input:
+                if user_input == 'q':
+                    return
+
+                # empty input skips step
+                if not user_input:
                     break
 
                 name = self._check_name(user_input)
 
                 if not name:
-                    print('Некорректный ввод, попробуйте еще раз')
+                    self.screen.print('Некорректный ввод, попробуйте еще раз')
                     continue
+
+                new_data[step] = name
                 break
-            
-            new_data.append(name)
 
-        for record in records:
-            if record['ИД'] == str(record_number):
-                record['Имя'], record['Фамилия'], record['Отчество'] = new_data
-                
-        self.write_records(records)
+        self.store.update(record_number, new_data, version)
+        self._changed()
 
 
-    def edit_company(self, record_number: int, records: list):
+    def edit_company(self, record_number: int, version: int = None):
         """
         edit company name
 
         :param record_number: record ID to edit
-        :param records: list of records to update
+        :param version: version of record that is edited
         """
         self._clear()
 
-        print('Введите новое название компании, что бы вернуться назад введите "q"')
+        self.screen.print('Введите новое название компании, что бы вернуться назад введите "q"')
         
         while True:
-            user_input = input('Название компании > ')
+            user_input = self.screen.input('Название компании > ')
 
             if user_input == 'q':
-                break
+                return
 
             if not user_input:
-                print('Некорректный ввод, попробуйте еще раз')
+                self.screen.print('Некорректный ввод, попробуйте еще раз')
                 continue
             break
 
-        for record in records:
-            if record['ИД'] == str(record_number):
-                record['Компания'] = user_input
-        
-        self.write_records(records)
+        self.store.update(record_number, {'Компания': user_input}, version)
+        self._changed()
 
 
-    def edit_phone(self, record_number: int, records: list):
+    def edit_phone(self, record_number: int, version: int = None):
         """
         edit phone number
 
         :param record_number: record ID to edit
-        :param records: list of records to update
+        :param version: version of record that is edited
         """
         self._clear()
 
-        print('Введите новый номер телефона, что бы пропустить шаг поле можно оставить пустым\n'
+        self.screen.print('Введите новый номер телефона, что бы пропустить шаг поле можно оставить пустым\n'
               'Для возврата назад введите "q"')
         
-        steps = ['Рабочий номер', 'Личный номер']
-        new_data = []
+        steps = ['Рабочий номер', 'Личный номер']
+        new_data = {}
         for step in steps:
             while True:
-                user_input = input(f'{step} > ')
+                user_input = self.screen.input(f'{step} > ')
                 
-                if user_input == 'q' or not user_input:
+                if user_input == 'q':
+                    return
+
+                # empty input skips step
+                if not user_input:
                     break
                 
                 number = self._check_number(user_input)
                 if not number:
-                    print('Некорректный ввод, попробуйте еще раз')
+                    self.screen.print('Некорректный ввод, попробуйте еще раз')
                     continue
 
+                new_data[step] = number
                 break
 
-            new_data.append(number)
-
-        for record in records:
-            if record['ИД'] == str(record_number):
-                record['Рабочий номер'], record['Личный номер'] = new_data
-    
-        self.write_records(records)
+        self.store.update(record_number, new_data, version)
+        self._changed()
 
 
     def search_records(self, search_term: str = None):
@@ -504,7 +603,7 @@ class Phonebook:
         while True:
             self._clear()
 
-            print('\n'.join(
+            self.screen.print('\n'.join(
                 [
                     '-- Поиск по записям --',
                     'Напишите условие для поиска, '
@@ -514,33 +613,31 @@ class Phonebook:
             ))
 
             if not check:
-                print('Некорректный ввод, попробуйте еще раз')
-                continue
+                self.screen.print('Некорректный ввод, попробуйте еще раз')
+                check = True
             elif not_found:
-                print('Ничего не найдено')
+                self.screen.print('Ничего не найдено')
                 not_found = False
             
             if search_term:
                 user_input = search_term
             else:
-                user_input = input('>>> ')
+                user_input = self.screen.input('>>> ')
 
             if user_input == 'q':
-                break
+                return
 
             if not user_input:
                 check = False
                 continue
             
-            # main search logic, looks for matches in lowercase
-            search_result = []
-            with open(self.filename, 'r', encoding='utf-8') as f:
-                data = csv.DictReader(f, delimiter=';')
-                for record in data:
-                    values = [value.lower() for value in record.values()]
-                    search_terms = user_input.lower().split()
-                    if all(term in str(values) for term in search_terms):
-                        search_result.append(record)
+            # main search logic, every term must be a beginning of any word in record,
+            # if nothing is found terms are looked for in any part of words
+            query = self._normalize(user_input)
+            search_result = self._cached(
+                ('search', query),
+                lambda: self.store.search(query) or self.store.scan(query)
+            )
 
             if not search_result:
                 not_found = True
@@ -548,33 +645,277 @@ class Phonebook:
             
             break
 
-        self.show_records(search_result)
+        self.show_records(search_result, ('search', query))
+
+
+    def fuzzy_search_records(self):
+        """
+        performs search by names and company that tolerates typos,
+        words can be written in Latin letters, e.g. Ivanov finds Иванов
+        """
+        check = True
+        not_found = False
+        while True:
+            self._clear()
+
+            self.screen.print('\n'.join(
+                [
+                    '-- Нечеткий поиск по имени и компании --',
+                    'Напишите имя, фамилию или компанию, можно с опечатками '
+                    'или латинскими буквами',
+                    'Для возврата назад введите "q"',
+                ]
+            ))
+
+            if not check:
+                self.screen.print('Некорректный ввод, попробуйте еще раз')
+                check = True
+            elif not_found:
+                self.screen.print('Ничего не найдено')
+                not_found = False
+
+            user_input = self.screen.input('>>> ')
+
+            if user_input == 'q':
+                return
+
+            if not user_input.strip():
+                check = False
+                continue
+
+            # most similar records are shown first
+            query = self._normalize(user_input)
+            search_result = self._cached(('fuzzy', query), lambda: self.store.fuzzy_search(query))
+
+            if not search_result:
+                not_found = True
+                continue
+
+            break
+
+        self.show_records(search_result, ('fuzzy', query))
+
+
+    def search_by_phone(self):
+        """
+        performs lookup by work or personal number,
+        "*" at the beginning looks for number ending, e.g. *4567,
+        "*" at the end looks for number beginning, e.g. +7912*
+        """
+        check = True
+        not_found = False
+        while True:
+            self._clear()
+
+            self.screen.print('\n'.join(
+                [
+                    '-- Поиск по номеру телефона --',
+                    'Введите номер полностью, его начало со "*" в конце (+7912*) '
+                    'или окончание со "*" в начале (*4567)',
+                    'Для возврата назад введите "q"',
+                ]
+            ))
+
+            if not check:
+                self.screen.print('Некорректный ввод, попробуйте еще раз')
+                check = True
+            elif not_found:
+                self.screen.print('Ничего не найдено')
+                not_found = False
+
+            user_input = self.screen.input('>>> ')
+
+            if user_input == 'q':
+                return
+
+            if user_input.startswith('*'):
+                mode = 'suffix'
+            elif user_input.endswith('*'):
+                mode = 'prefix'
+            else:
+                mode = 'exact'
+
+            number = user_input.strip('*')
+            # full numbers are checked same way as on input
+            if mode == 'exact':
+                number = self._check_number(number)
+
+            if not number or not re.search(r'\d', number):
+                check = False
+                continue
+
+            search_result = self._cached(
+                ('phone', number, mode), lambda: self.store.find_by_phone(number, mode)
+            )
+
+            if not search_result:
+                not_found = True
+                continue
+
+            break
+
+        self.show_records(search_result, ('phone', number, mode))
+
+
+    def live_search(self):
+        """
+        performs search while query is typed, first page of results is shown after every key.
+        Results of previous query are narrowed instead of searching again
+        """
+        from live_search import LiveSearch
+
+        search = LiveSearch(self.store)
+        # without terminal keys can't be read one by one, so query is entered by lines
+        keys = self.screen.reads_keys()
+        query = ''
+        not_found = False
+        while True:
+            ids = search.search(query)
+
+            self._clear()
+            self.screen.print('\n'.join(
+                [
+                    '-- Поиск по мере ввода --',
+                    'Результаты обновляются при вводе каждой буквы, показывается первая страница',
+                    'Для просмотра всех результатов нажмите Enter, для возврата назад '
+                    + ('нажмите Esc' if keys else 'введите "q"'),
+                    '',
+                ]
+            ))
+            if not_found:
+                self.screen.print('Ничего не найдено')
+                not_found = False
+            elif query.strip():
+                self.screen.print(f'Найдено: {len(ids)}')
+                for row in search.first(ids, self.items_on_page):
+                    self.screen.print('\n'.join(self._record_lines(row)))
+
+            if keys:
+                self.screen.print(f'\n>>> {query}', end='')
+                pressed = self.screen.read_keys()
+            else:
+                user_input = self.screen.input('\n>>> ')
+                if user_input == 'q':
+                    return
+                # entered line replaces query, empty line shows all results
+                pressed = '\n' if not user_input else ''
+                query = user_input or query
+
+            for key in pressed:
+                if key == '\x1b':
+                    return
+                if key in '\r\n':
+                    break
+                if key in '\x7f\b':
+                    query = query[:-1]
+                elif key.isprintable():
+                    query += key
+            else:
+                continue
+
+            if not query.strip():
+                continue
+            # all results are found same way as by search_records
+            normalized = self._normalize(query)
+            search_result = self._cached(
+                ('search', normalized),
+                lambda: self.store.search(normalized) or self.store.scan(normalized)
+            )
+            if not search_result:
+                not_found = True
+                continue
+            self.show_records(search_result, ('search', normalized))
+            # records could be changed in list, so narrowed results are not valid anymore
+            search = LiveSearch(self.store)
+
+
+    def find_duplicates(self):
+        """
+        Finds records of same person and offers to merge them group by group,
+        accepted groups are merged at once after review, see dedup.py
+        """
+        # imported here, dedup module imports this one
+        from dedup import Deduplicator
+
+        self._clear()
+        self.screen.print('-- Поиск дубликатов --\nПоиск...')
+        self.screen.flush()
+
+        deduplicator = Deduplicator(self)
+        groups = deduplicator.groups()
+
+        accepted = []
+        for number, group in enumerate(groups, 1):
+            self._clear()
+            text = [
+                '-- Поиск дубликатов --',
+                f'Группа {number} из {len(groups)}',
+                '',
+            ]
+            for record in group:
+                text.extend(self._record_lines(record))
+
+            merged = {**group[0], **deduplicator.merge(group)}
+            text.extend(['', 'Запись после объединения:'] + self._record_lines(merged))
+            text.extend([
+                '',
+                'y - объединить, n - пропустить, a - объединить эту и все следующие группы,',
+                'q - закончить просмотр, выбранные группы будут объединены',
+            ])
+            self.screen.print('\n'.join(text))
+
+            user_input = self.screen.input('>>> ').lower()
+            if user_input == 'q':
+                break
+            if user_input == 'a':
+                accepted.extend(groups[number - 1:])
+                break
+            if user_input == 'y':
+                accepted.append(group)
+
+        self._clear()
+        text = ['-- Поиск дубликатов --']
+        if deduplicator.skipped_blocks:
+            text.append(
+                f'Не проверено слишком больших блоков похожих записей: '
+                f'{len(deduplicator.skipped_blocks)}, записей в них: '
+                f'{sum(deduplicator.skipped_blocks)}'
+            )
+        if not groups:
+            text.append('Дубликаты не найдены')
+        else:
+            merged, deleted, skipped = deduplicator.apply(accepted)
+            text.append(f'Объединено групп: {merged}, удалено записей: {deleted}')
+            if skipped:
+                text.append(
+                    f'Пропущено групп: {skipped}, их записи были изменены другим пользователем'
+                )
+        self.screen.print('\n'.join(text))
+        self.screen.input('Для возврата в главное меню нажмите Enter')
 
 
     def generate_data(self):
         """
-        simple generator for other methods tests
+        generator of realistic records for other methods tests, see dataset.py
         """
         while True:
             self._clear()
 
-            user_input = input('Количество записей: ')
+            user_input = self.screen.input('Количество записей: ')
 
             if user_input == 'q':
                 break
 
             if user_input.isdigit():
-                with open(self.filename, 'a', encoding='utf-8') as f:
-                    writer = csv.writer(f, delimiter=';', lineterminator='\n')
-                    for i in range(int(user_input)):
-                        i += 1
-                        row = [i, ]
-                        for column in self.columns[1:]:
-                            row.append(f'{column}{i}')
-                        writer.writerow(row)
+                # imported here, generator is used only by this menu item
+                from dataset import generate_records
+
+                # IDs are assigned by store and continue after existing records
+                self.store.add_many(list(generate_records(int(user_input))))
+                self._changed()
                 break
             else:
-                print('Неккоректный ввод, введите целое число')
+                self.screen.print('Неккоректный ввод, введите целое число')
                 continue
         
 
@@ -583,19 +924,26 @@ class Phonebook:
         method to print main menu, all methods come back here when they finish working
         """
 
+        # clears console for better visuals
+        self._clear()
+
         # made to simplify selection
         main_menu = {
             '1': self.add_record,
             '2': self.delete_record,
             '3': self.show_records,
             '4': self.search_records,
-            '5': self.generate_data
+            '5': self.generate_data,
+            '6': self.search_by_phone,
+            '7': self.fuzzy_search_records,
+            '8': self.find_duplicates,
+            '9': self.live_search,
         }
 
         while True:
             self._clear()
 
-            print('\n'.join(
+            self.screen.print('\n'.join(
                 [
                     '-- Главное меню --',
                     '1. Добавить запись',
@@ -603,13 +951,17 @@ class Phonebook:
                     '3. Показать все записи',
                     '4. Поиск по записям',
                     '5. Сгенерировать данные',
+                    '6. Поиск по номеру телефона',
+                    '7. Нечеткий поиск по имени',
+                    '8. Поиск дубликатов',
+                    '9. Поиск по мере ввода',
                     'q. Выход',
                     'Для изменения записи найдите её через поиск или '
                     'выберите при отображении всех записей'
                 ]
             ))
 
-            user_input = input('>>> ')
+            user_input = self.screen.input('>>> ')
             
             # avoid printing unnecessary information and quit
             if user_input == 'q':
@@ -618,15 +970,19 @@ class Phonebook:
             # choises must be digits, except for quit
             if not user_input.isdigit():
                 self._clear()
-                print('Неккоректный ввод, выберите пункт меню из предложенных: ')
+                self.screen.print('Неккоректный ввод, выберите пункт меню из предложенных: ')
                 continue
             
             try:
                 main_menu[user_input]()
             except KeyError:
                 self._clear()
-                print('Неккоректный ввод, выберите пункт меню из предложенных: ')
+                self.screen.print('Неккоректный ввод, выберите пункт меню из предложенных: ')
+
+        # let background compaction finish before exit
+        self.store.close()
 
-        print('До свидания!')
+        self.screen.print('До свидания!')
+        self.screen.flush()
         return
             
@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+import atexit
+import functools
+import importlib
+import threading
+
+
+# enables profiling when flag can't be passed, e.g. PHONEBOOK_PROFILE=1 or =cprofile:out.prof
+ENVIRONMENT_VARIABLE = 'PHONEBOOK_PROFILE'
+FLAG = '--profile'
+DEFAULT_OUTPUT = 'phonebook.prof'
+
+# methods that are timed, they are wrapped only when profiling is enabled,
+# so there is no overhead at all without it. Inherited methods are timed in parent class
+TIMED = [
+    ('phonebook', 'Phonebook', [
+        'add_record', 'create_record', 'delete_record', 'show_records', 'edit_menu',
+        'edit_name', 'edit_company', 'edit_phone', 'search_records',
+        'fuzzy_search_records', 'search_by_phone', 'find_duplicates', 'live_search',
+        'generate_data', 'pagination', '_render_page', '_clear',
+    ]),
+    ('store', 'RecordStore', [
+        'load', '_catch_up', '_restore', '_save_snapshot', '_ensure_index',
+        '_ensure_phone_index', '_ensure_fuzzy_index', '_ensure_sort_index', 'get', 'records',
+        'search', 'search_ids', 'scan', 'fuzzy_search', 'find_by_phone', 'count', 'page',
+        'sorted_page', 'sorted_position', 'add_many', 'update', 'delete', 'change_many',
+        'write', 'compact', 'close', '_write_temp',
+    ]),
+    ('binary_store', 'BinaryStore', ['get', '_write_temp']),
+    ('sqlite_store', 'SqliteStore', [
+        'get', 'records', 'search', 'search_ids', 'find_by_phone', 'count', 'page',
+        'sorted_page', 'sorted_position', 'add_many', 'update', 'delete', 'write',
+    ]),
+    ('base_store', 'BaseStore', ['scan', 'fuzzy_search', 'change_many']),
+    ('journal', 'Journal', ['append', 'truncate']),
+    ('meta', 'Metadata', ['scan']),
+    ('dedup', 'Deduplicator', ['groups', 'apply']),
+    ('live_search', 'LiveSearch', ['search', '_narrow', 'first']),
+    ('offsets', 'OffsetIndex', ['build', 'load', 'save']),
+    ('mapped', 'MappedFile', ['__enter__']),
+]
+
+# methods which results are counted: (module, class, method, counter, function of result)
+COUNTED = [
+    ('store', 'RecordStore', '_lazy_rows', 'строк прочитано', len),
+    ('binary_store', 'BinaryStore', '_lazy_rows', 'строк прочитано', len),
+    ('store', 'RecordStore', '_encode_rows', 'байт записано', len),
+    ('binary_store', 'BinaryStore', '_encode_rows', 'байт записано', len),
+    ('store', 'RecordStore', '_write_temp', 'байт записано', os.path.getsize),
+    ('binary_store', 'BinaryStore', '_write_temp', 'байт записано', os.path.getsize),
+    ('mapped', 'MappedFile', '__enter__', 'байт отображено в память', len),
+]
+
+# methods which growth of file is counted: (module, class, method, counter)
+GROWTH = [
+    ('journal', 'Journal', 'append', 'байт записано'),
+]
+
+# generators which items are counted: (module, class, method, counter)
+GENERATORS = [
+    ('store', 'RecordStore', '_read_rows', 'строк разобрано'),
+    ('binary_store', 'BinaryStore', '_read_rows', 'строк разобрано'),
+    ('journal', 'Journal', 'entries', 'записей журнала прочитано'),
+]
+
+
+# objects which stats() are printed in summary, every instance created while profiling
+# is enabled is reported: (module, class, name)
+REPORTED = [
+    ('cache', 'LRUCache', 'кэш результатов'),
+]
+
+
+class Profiler:
+    def __init__(self):
+        """Collects time of calls and counters, see enable"""
+        # name -> [calls, total seconds, max seconds]
+        self.timings = {}
+        self.counters = {}
+        # (name, object) of objects which stats are reported, see REPORTED
+        self.reported = []
+        self._lock = threading.Lock()
+
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = [0, 0.0, 0.0]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> str:
+        """Returns table of timed calls sorted by total time and counters"""
+        lines = [
+            '-- Профилирование --',
+            f'{"вызов":<36} {"вызовов":>8} {"всего, мс":>11} {"среднее, мс":>12} {"макс, мс":>10}',
+        ]
+        # time includes nested calls, e.g. search includes load of records
+        timings = sorted(self.timings.items(), key=lambda item: -item[1][1])
+        for name, (calls, total, longest) in timings:
+            lines.append(
+                f'{name:<36} {calls:>8} {total * 1000:>11.1f} '
+                f'{total * 1000 / calls:>12.3f} {longest * 1000:>10.1f}'
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{name}: {value}')
+        for name, reported in self.reported:
+            stats = ', '.join(f'{key}={value}' for key, value in reported.stats().items())
+            lines.append(f'{name}: {stats}')
+        return '\n'.join(lines)
+
+
+# collects data while profiling is enabled
+profiler = None
+
+
+def _wrap_timed(name: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.add_time(name, time.perf_counter() - start)
+    return wrapper
+
+
+def _wrap_counted(counter: str, measure, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        profiler.count(counter, measure(result))
+        return result
+    return wrapper
+
+
+def _wrap_growth(counter: str, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        size = self.size()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            profiler.count(counter, self.size() - size)
+    return wrapper
+
+
+def _wrap_generator(counter: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        count = 0
+        try:
+            for item in func(*args, **kwargs):
+                count += 1
+                yield item
+        finally:
+            profiler.count(counter, count)
+    return wrapper
+
+
+def _wrap_reported(name: str, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        func(self, *args, **kwargs)
+        with profiler._lock:
+            profiler.reported.append((name, self))
+    return wrapper
+
+
+def _patch(module_name: str, class_name: str, method: str, wrap):
+    """Replaces method of class with wrapped one, only methods defined in class are patched"""
+    cls = getattr(importlib.import_module(module_name), class_name)
+    if method in cls.__dict__:
+        setattr(cls, method, wrap(cls.__dict__[method]))
+
+
+def enable(mode: str = 'summary', output: str = None):
+    """
+    Enables profiling until exit, results are written to stderr or file on exit
+
+    :param mode: "summary" to time phonebook operations and I/O calls
+        and count rows and bytes, "cprofile" to dump cProfile stats
+    :param output: path to cProfile dump, phonebook.prof by default
+    """
+    global profiler
+    if profiler is not None:
+        return
+
+    profiler = Profiler()
+
+    if mode == 'cprofile':
+        import cProfile
+
+        output = output or DEFAULT_OUTPUT
+        profile = cProfile.Profile()
+
+        def dump():
+            profile.disable()
+            profile.dump_stats(output)
+            print(f'Профиль сохранен в {output}, для просмотра: python -m pstats {output}',
+                  file=sys.stderr)
+
+        atexit.register(dump)
+        profile.enable()
+        return
+
+    # counters go first, so time of call includes counting
+    for module_name, class_name, method, counter, measure in COUNTED:
+        _patch(module_name, class_name, method,
+               functools.partial(_wrap_counted, counter, measure))
+    for module_name, class_name, method, counter in GROWTH:
+        _patch(module_name, class_name, method, functools.partial(_wrap_growth, counter))
+    for module_name, class_name, method, counter in GENERATORS:
+        _patch(module_name, class_name, method, functools.partial(_wrap_generator, counter))
+    for module_name, class_name, name in REPORTED:
+        _patch(module_name, class_name, '__init__', functools.partial(_wrap_reported, name))
+    for module_name, class_name, methods in TIMED:
+        for method in methods:
+            _patch(module_name, class_name, method,
+                   functools.partial(_wrap_timed, f'{class_name}.{method}'))
+
+    atexit.register(lambda: print(profiler.summary(), file=sys.stderr))
+
+
+def setup(args: list) -> list:
+    """
+    Enables profiling if --profile flag or environment variable is set,
+    returns arguments without flag. Flag takes same values as variable:
+    --profile or --profile=summary for summary, --profile=cprofile[:path] for cProfile dump
+
+    :param args: command line arguments
+    """
+    value = os.environ.get(ENVIRONMENT_VARIABLE, '')
+    rest = []
+    for arg in args:
+        if arg == FLAG or arg.startswith(FLAG + '='):
+            value = arg.partition('=')[2] or 'summary'
+        else:
+            rest.append(arg)
+
+    if value and value != '0':
+        mode, _, output = value.partition(':')
+        enable('cprofile' if mode == 'cprofile' else 'summary', output or None)
+    return rest
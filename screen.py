@@ -0,0 +1,165 @@
+import os
+import re
+import sys
+import codecs
+import select
+import shutil
+
+# keys are read one by one with termios on Unix and msvcrt on Windows
+try:
+    import tty
+    import termios
+except ImportError:
+    termios = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+# ANSI escape sequences
+HOME = '\x1b[H'
+CLEAR_SCREEN = '\x1b[2J'
+CLEAR_LINE = '\x1b[K'
+CLEAR_BELOW = '\x1b[J'
+
+# sequences sent by arrows and other special keys, single Esc is kept
+KEY_SEQUENCE = re.compile(r'\x1b[\[O][0-9;]*[A-Za-z~]')
+
+
+class Screen:
+    def __init__(self, stream=None, ansi: bool = None):
+        """
+        Console output of interface. Screen is built in buffer and written
+        with single write when input is requested. Screen is cleared with ANSI
+        escape sequences and when previous screen is still shown, only changed
+        lines are redrawn. Dumb terminals and redirected output get plain text
+
+        :param stream: output stream, stdout by default
+        :param ansi: use escape sequences, detected by terminal when None(default)
+        """
+        self.stream = stream or sys.stdout
+        self.ansi = self._supports_ansi() if ansi is None else ansi
+
+        self._buffer = []
+        self._cleared = False
+        # lines of screen that is shown now, None if it's unknown
+        self._shown = None
+        # bytes of letter could be split between reads
+        self._decoder = codecs.getincrementaldecoder('utf-8')('ignore')
+
+
+    def _supports_ansi(self) -> bool:
+        if not hasattr(self.stream, 'isatty') or not self.stream.isatty():
+            return False
+        if os.environ.get('TERM', '') == 'dumb':
+            return False
+        if os.name == 'nt':
+            # empty command turns on processing of escape sequences in Windows console
+            os.system('')
+        return True
+
+    def clear(self):
+        """Starts new screen, old one is replaced when new one is shown"""
+        self._buffer = []
+        self._cleared = True
+
+    def print(self, *values, sep: str = ' ', end: str = '\n'):
+        """Adds text to screen, same as builtin print"""
+        self._buffer.append(sep.join(str(value) for value in values) + end)
+
+    def input(self, prompt: str = '') -> str:
+        """Shows screen with prompt at the end and reads line"""
+        self._buffer.append(prompt)
+        self.flush()
+        # entered text is shown after prompt, so prompt line must be redrawn next time
+        if self._shown is not None:
+            self._shown[-1] = None
+        return input()
+
+    def reads_keys(self) -> bool:
+        """Returns True if keys can be read without waiting for Enter, see read_keys"""
+        if not sys.stdin.isatty():
+            return False
+        return msvcrt is not None or termios is not None
+
+    def read_keys(self) -> str:
+        """
+        Shows screen and waits for key press, keys are returned without waiting for Enter.
+        Keys pressed while previous keys were handled are returned together,
+        so fast typing is handled at once. Special keys except Esc are dropped
+        """
+        self.flush()
+        # typed text is drawn by screen, so prompt line must be redrawn next time
+        if self._shown is not None:
+            self._shown[-1] = None
+
+        if msvcrt is not None:
+            keys = []
+            while True:
+                key = msvcrt.getwch()
+                if key in '\x00\xe0':
+                    # special key, its code follows
+                    msvcrt.getwch()
+                else:
+                    keys.append(key)
+                if not msvcrt.kbhit():
+                    return ''.join(keys)
+
+        fd = sys.stdin.fileno()
+        attributes = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            data = os.read(fd, 1024)
+            while select.select([fd], [], [], 0)[0]:
+                data += os.read(fd, 1024)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+        return KEY_SEQUENCE.sub('', self._decoder.decode(data))
+
+    def flush(self):
+        """Writes buffered text with single write"""
+        text = ''.join(self._buffer)
+        self._buffer = []
+
+        if not self._cleared:
+            # text goes after what is shown, e.g. after entered line
+            self._shown = None
+            self._write(text)
+            return
+        self._cleared = False
+
+        if not self.ansi:
+            # screen can't be cleared, screens are separated with empty line
+            self._write('\n' + text)
+            return
+
+        lines = text.split('\n')
+        if self._fits(lines) and self._shown is not None:
+            self._write(self._diff(lines))
+        else:
+            self._write(HOME + CLEAR_SCREEN + text)
+        self._shown = lines
+
+    def _fits(self, lines: list) -> bool:
+        """Returns True if every line takes single row and screen isn't scrolled"""
+        columns, rows = shutil.get_terminal_size()
+        return len(lines) < rows and all(len(line) < columns for line in lines)
+
+    def _diff(self, lines: list) -> str:
+        """Returns escape sequences that turn shown screen into passed lines"""
+        shown = self._shown
+        parts = []
+        for number, line in enumerate(lines):
+            # last line is prompt, entered text after it is always erased
+            if number < len(shown) and shown[number] == line and number != len(lines) - 1:
+                continue
+            parts.append(f'\x1b[{number + 1};1H{line}{CLEAR_LINE}')
+
+        # cursor stays after prompt, old lines below it are erased
+        parts.append(CLEAR_BELOW)
+        return ''.join(parts)
+
+    def _write(self, text: str):
+        self.stream.write(text)
+        self.stream.flush()
@@ -0,0 +1,229 @@
+import re
+import bisect
+from array import array
+
+import sidecar
+
+
+class TokenIndex:
+    # bump when pickled structure changes
+    version = 2
+
+    def __init__(self):
+        """
+        Inverted index of normalized tokens to record IDs,
+        supports prefix lookups and multi-term AND queries
+        """
+        self._postings = {}
+        # sorted list of all tokens, used to find tokens by prefix
+        self._tokens = []
+        # (tokens, bounds, IDs) of saved index, postings are unpacked on first use, see load
+        self._packed = None
+        self.dirty = False
+
+
+    @staticmethod
+    def tokenize(text: str) -> set:
+        """Splits text into lowercase words, punctuation is dropped"""
+        return set(re.findall(r'\w+', text.lower()))
+
+    def _record_tokens(self, values: list) -> set:
+        tokens = set()
+        for value in values:
+            tokens |= self.tokenize(value)
+        return tokens
+
+    @staticmethod
+    def _is_number(record_id: str) -> bool:
+        """Returns True if ID can be packed into integer and restored exactly"""
+        return record_id.isdigit() and record_id.isascii() and len(record_id) < 19 \
+            and (record_id[0] != '0' or record_id == '0')
+
+    def _posting(self, token: str) -> set:
+        """Returns set of IDs of records with token or None, packed posting is unpacked"""
+        posting = self._postings.get(token)
+        if posting is not None or self._packed is None:
+            return posting
+
+        tokens, bounds, ids = self._packed
+        position = bisect.bisect_left(tokens, token)
+        if position == len(tokens) or tokens[position] != token:
+            return None
+        # token could be removed after load, then it's not in list of tokens anymore
+        current = bisect.bisect_left(self._tokens, token)
+        if current == len(self._tokens) or self._tokens[current] != token:
+            return None
+
+        posting = self._postings[token] = set(map(str, ids[bounds[position]:bounds[position + 1]]))
+        return posting
+
+
+    @classmethod
+    def build(cls, rows):
+        """
+        Builds index from scratch, faster than adding records one by one
+
+        :param rows: iterable of rows, first value of row is record ID
+        """
+        index = cls()
+        postings = index._postings
+        for row in rows:
+            for token in index._record_tokens(row):
+                posting = postings.get(token)
+                if posting is None:
+                    posting = postings[token] = set()
+                posting.add(row[0])
+
+        index._tokens = sorted(postings)
+        index.dirty = True
+        return index
+
+    def _add_tokens(self, record_id: str, tokens: set):
+        for token in tokens:
+            posting = self._posting(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                bisect.insort(self._tokens, token)
+            posting.add(record_id)
+        self.dirty = True
+
+    def _remove_tokens(self, record_id: str, tokens: set):
+        for token in tokens:
+            posting = self._posting(token)
+            if posting is None:
+                continue
+            posting.discard(record_id)
+            if not posting:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+        self.dirty = True
+
+    def add(self, record_id: str, values: list):
+        """
+        Adds record tokens to index
+
+        :param record_id: record ID
+        :param values: list of record field values
+        """
+        self._add_tokens(record_id, self._record_tokens(values))
+
+    def remove(self, record_id: str, values: list):
+        """
+        Removes record tokens from index
+
+        :param record_id: record ID
+        :param values: list of record field values that were indexed
+        """
+        self._remove_tokens(record_id, self._record_tokens(values))
+
+    def update(self, record_id: str, old_values: list, new_values: list):
+        """Reindexes record after its fields were changed, only changed tokens are touched"""
+        old_tokens = self._record_tokens(old_values)
+        new_tokens = self._record_tokens(new_values)
+        self._remove_tokens(record_id, old_tokens - new_tokens)
+        self._add_tokens(record_id, new_tokens - old_tokens)
+
+
+    def _prefix_ids(self, prefix: str) -> set:
+        """Returns IDs of records that have any token starting with prefix"""
+        start = bisect.bisect_left(self._tokens, prefix)
+        end = bisect.bisect_left(self._tokens, prefix + '\uffff', start)
+
+        if end - start == 1:
+            return self._posting(self._tokens[start])
+
+        ids = set()
+        for token in self._tokens[start:end]:
+            ids |= self._posting(token)
+        return ids
+
+    def search(self, query: str) -> set:
+        """
+        Returns IDs of records matching every term of query,
+        each term is matched as a prefix of record words
+
+        :param query: search terms separated with spaces
+        """
+        terms = self.tokenize(query)
+        if not terms:
+            return set()
+
+        postings = []
+        for term in terms:
+            ids = self._prefix_ids(term)
+            # no need to look further, intersection will be empty
+            if not ids:
+                return set()
+            postings.append(ids)
+
+        # intersect starting from smallest posting list
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+
+    def _pack(self) -> tuple:
+        """
+        Returns (tokens, bounds, IDs): IDs of token are IDs[bounds[i]:bounds[i + 1]].
+        Arrays of integers are loaded much faster than sets of strings.
+        Returns None if some IDs are not integers
+        """
+        bounds = array('q', [0])
+        ids = array('q')
+        for token in self._tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                # posting wasn't unpacked since load, it's copied as is
+                tokens, packed_bounds, packed_ids = self._packed
+                position = bisect.bisect_left(tokens, token)
+                ids.extend(packed_ids[packed_bounds[position]:packed_bounds[position + 1]])
+            elif all(self._is_number(record_id) for record_id in posting):
+                ids.extend(int(record_id) for record_id in posting)
+            else:
+                return None
+            bounds.append(len(ids))
+        return self._tokens, bounds, ids
+
+    def save(self, filename: str, signature):
+        """
+        Saves index to file
+
+        :param filename: path to index file
+        :param signature: state of phonebook files index was built for
+        """
+        data = {'version': self.version, 'signature': signature}
+        packed = self._pack()
+        if packed is not None:
+            data['packed'] = packed
+        else:
+            data['postings'] = {token: self._posting(token) for token in self._tokens}
+
+        sidecar.save(filename, data)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, filename: str, signature):
+        """
+        Returns index saved to file or None if file is missing, can't be trusted
+        or was built for other state of phonebook files
+
+        :param filename: path to index file
+        :param signature: current state of phonebook files
+        """
+        data = sidecar.load(filename)
+        if not isinstance(data, dict) or data.get('version') != cls.version or data.get('signature') != signature:
+            return None
+
+        index = cls()
+        if 'packed' in data:
+            index._packed = data['packed']
+            # list of tokens changes with index, packed one is kept for lookups
+            index._tokens = list(index._packed[0])
+        else:
+            index._postings = data['postings']
+            index._tokens = sorted(index._postings)
+        return index
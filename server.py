@@ -0,0 +1,276 @@
+import os
+import json
+import signal
+import asyncio
+
+from base_store import ConflictError
+from phonebook import Phonebook
+
+
+# operations that change records, they are queued and applied in batches
+WRITE_OPERATIONS = ['add', 'edit', 'delete']
+
+
+class RequestError(Exception):
+    """Raised when request can't be served, message is sent to client"""
+
+
+class PhonebookServer:
+    def __init__(self, phonebook: Phonebook, batch_delay: float = 0.002):
+        """
+        Serves phonebook over socket with line-delimited JSON protocol.
+        Every request is single line with JSON object:
+         - {"op": "search", "query": "Иванов"}
+         - {"op": "get", "id": "1"} or {"op": "get", "ids": ["1", "2"]}
+         - {"op": "phone", "number": "4567", "mode": "suffix"}
+         - {"op": "add", "record": {"Имя": "..."}}
+         - {"op": "edit", "id": "1", "fields": {"Имя": "..."}, "version": 123}
+         - {"op": "delete", "id": "1", "version": 123}
+        Response is single line: {"ok": true, "result": ...} or {"ok": false, "error": "..."},
+        responses are sent in order of requests. Version is optional, see BaseStore.version.
+        Records are kept loaded, writes of all clients are grouped into batches
+
+        :param phonebook: phonebook to serve
+        :param batch_delay: seconds to wait for other writes before batch is applied
+        """
+        self.phonebook = phonebook
+        self.store = phonebook.store
+        self.columns = phonebook.columns
+        self.batch_delay = batch_delay
+
+        self._writes = None
+        self._writer = None
+
+
+    async def serve(self, path: str = None, host: str = '127.0.0.1', port: int = None):
+        """
+        Serves clients until cancelled, unix socket is used if path is passed
+
+        :param path: path to unix socket
+        :param host: host for TCP socket
+        :param port: port for TCP socket
+        """
+        self._writes = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_batches())
+
+        # records and indexes are loaded before first client comes
+        self.store.search('')
+        self.store.count()
+
+        if path is not None:
+            if os.path.exists(path):
+                os.remove(path)
+            server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            server = await asyncio.start_server(self._handle, host=host, port=port)
+        print(f'Сервер справочника запущен: {path or f"{host}:{port}"}', flush=True)
+
+        # SIGTERM stops server the same way as Ctrl+C, so socket file is removed
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            pass
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._writer.cancel()
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves requests of single client in order they were sent"""
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    # last request can come without line break
+                    line = e.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError:
+                    # rest of line is skipped, so next request is read from its start
+                    await self._send(writer, {'ok': False, 'error': 'Слишком длинный запрос'})
+                    await self._skip_line(reader)
+                    continue
+                if not line.strip():
+                    continue
+
+                await self._send(writer, await self._respond(line))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, response: dict):
+        writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    @staticmethod
+    async def _skip_line(reader: asyncio.StreamReader):
+        """Reads and drops data up to the end of line, line can be longer than reader limit"""
+        while True:
+            try:
+                await reader.readuntil(b'\n')
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+
+    async def _respond(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': 'Некорректный JSON'}
+
+        try:
+            if not isinstance(request, dict):
+                raise RequestError('Запрос должен быть JSON объектом')
+
+            if request.get('op') in WRITE_OPERATIONS:
+                future = asyncio.get_running_loop().create_future()
+                self._writes.put_nowait((request, future))
+                result = await future
+            else:
+                result = self._read(request)
+            return {'ok': True, 'result': result}
+        except RequestError as e:
+            return {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # client always gets response, otherwise it would wait for it forever
+            return {'ok': False, 'error': f'Ошибка сервера: {e}'}
+
+    @staticmethod
+    def _id(value) -> str:
+        """Returns record ID from request, ID can be sent as string or number"""
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            raise RequestError('ИД записи должен быть строкой или числом')
+        return str(value)
+
+    @staticmethod
+    def _text(request: dict, key: str, default: str = '') -> str:
+        """Returns string parameter of request"""
+        value = request.get(key, default)
+        if not isinstance(value, str):
+            raise RequestError(f'Параметр {key} должен быть строкой')
+        return value
+
+    @staticmethod
+    def _version(request: dict) -> int:
+        """Returns version of record from request or None if it's not passed"""
+        version = request.get('version')
+        if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+            raise RequestError('Версия записи должна быть числом')
+        return version
+
+    def _records(self, records: list) -> list:
+        return [dict(record) for record in records]
+
+    def _read(self, request: dict):
+        """Runs lookup, lookups are fast and run right in event loop"""
+        op = request.get('op')
+
+        if op == 'search':
+            # like in interface, query index can't serve is looked for in any part of words
+            query = self._text(request, 'query')
+            return self._records(self.store.search(query) or self.store.scan(query))
+
+        if op == 'phone':
+            mode = self._text(request, 'mode', 'exact')
+            if mode not in ['exact', 'prefix', 'suffix']:
+                raise RequestError(f'Неизвестный режим поиска: {mode}')
+            return self._records(self.store.find_by_phone(self._text(request, 'number'), mode))
+
+        if op == 'get':
+            if 'ids' in request:
+                if not isinstance(request['ids'], list):
+                    raise RequestError('Параметр ids должен быть списком')
+                ids = [self._id(record_id) for record_id in request['ids']]
+                records = (self.store.get(record_id) for record_id in ids)
+                return self._records(record for record in records if record is not None)
+            record = self.store.get(self._id(request.get('id', '')))
+            return None if record is None else dict(record)
+
+        raise RequestError(f'Неизвестная операция: {op}')
+
+
+    async def _write_batches(self):
+        """Collects writes that come at the same time and applies them together"""
+        while True:
+            batch = [await self._writes.get()]
+            await asyncio.sleep(self.batch_delay)
+            while not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            self._apply(batch)
+
+    def _apply(self, batch: list):
+        """
+        Applies batch of writes under single lock,
+        all added records are written with single append
+        """
+        adds = []
+        try:
+            with self.store.batch():
+                for request, future in batch:
+                    # client could disconnect while request was queued
+                    if future.cancelled():
+                        continue
+                    try:
+                        if request['op'] == 'add':
+                            adds.append((self._check(request.get('record')), future))
+                        elif request['op'] == 'edit':
+                            future.set_result(self._edit(request))
+                        else:
+                            future.set_result(self._delete(request))
+                    except ConflictError:
+                        future.set_exception(
+                            RequestError('Запись была изменена другим пользователем')
+                        )
+                    except RequestError as e:
+                        future.set_exception(e)
+
+                if adds:
+                    records = self.store.add_many([record for record, _ in adds])
+                    for record, (_, future) in zip(records, adds):
+                        if not future.cancelled():
+                            future.set_result(record)
+        except Exception as e:
+            # clients must not wait forever if file can't be written
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RequestError(f'Ошибка записи: {e}'))
+
+    def _check(self, data, partial: bool = False) -> dict:
+        """
+        Validates record values as interface does
+
+        :param data: dict of values by columns
+        :param partial: only passed columns are returned, e.g. for edit
+        """
+        if not isinstance(data, dict):
+            raise RequestError('Данные записи должны быть JSON объектом')
+        unknown = [column for column in data if column not in self.columns[1:]]
+        if unknown:
+            raise RequestError('Неизвестные поля: ' + ', '.join(unknown))
+
+        record, error = self.phonebook._check_record(data)
+        if error:
+            raise RequestError(f'Некорректное значение поля: {error}')
+        if partial:
+            return {column: record[column] for column in data}
+        return record
+
+    def _edit(self, request: dict) -> dict:
+        record_id = self._id(request.get('id', ''))
+        fields = self._check(request.get('fields'), partial=True)
+        if not self.store.update(record_id, fields, self._version(request)):
+            raise RequestError('Запись не найдена')
+        return dict(self.store.get(record_id))
+
+    def _delete(self, request: dict) -> bool:
+        if not self.store.delete(self._id(request.get('id', '')), self._version(request)):
+            raise RequestError('Запись не найдена')
+        return True
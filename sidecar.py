@@ -0,0 +1,53 @@
+import os
+import stat
+import pickle
+
+
+# errors raised by unpickling of damaged file or file saved by other version of program
+LOAD_ERRORS = (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError)
+
+# group and others write permissions, files with them are not loaded
+_WRITABLE = stat.S_IWGRP | stat.S_IWOTH
+
+
+def save(filename: str, data):
+    """
+    Pickles data to sidecar file, file is replaced atomically.
+    File is writable only by its owner, otherwise it wouldn't be loaded, see load
+
+    :param filename: path to sidecar file
+    :param data: object to save
+    """
+    temp = f'{filename}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(f.fileno(), stat.S_IMODE(os.fstat(f.fileno()).st_mode) & ~_WRITABLE)
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, filename)
+
+
+def load(filename: str):
+    """
+    Returns data unpickled from sidecar file or None if file is missing, damaged
+    or can't be trusted. Unpickling can run any code, so file placed by other user
+    into shared folder is not loaded: file must be owned by current user
+    and must not be writable by others. Opened file is checked, so it can't be
+    replaced between check and reading
+
+    :param filename: path to sidecar file
+    """
+    try:
+        with open(filename, 'rb') as f:
+            if not _trusted(os.fstat(f.fileno())):
+                return None
+            return pickle.load(f)
+    except LOAD_ERRORS:
+        return None
+
+
+def _trusted(file_stat: os.stat_result) -> bool:
+    """Returns True if file belongs to current user and nobody else can change it"""
+    # owners and permission bits are not used on Windows, access is controlled by ACL
+    if not hasattr(os, 'getuid'):
+        return True
+    return file_stat.st_uid == os.getuid() and not file_stat.st_mode & _WRITABLE
@@ -0,0 +1,68 @@
+import sidecar
+
+
+class Snapshot:
+    # bump when pickled structure of snapshot, table or phone index changes
+    version = 4
+
+    def __init__(
+        self,
+        columns: list,
+        table,
+        phone_index,
+        sort_indexes: dict,
+        signature: tuple,
+        generation: str,
+        checksum: int
+    ):
+        """
+        Parsed records saved next to phonebook file, so next start
+        doesn't parse file again. Snapshot is valid only for file it was
+        taken from: same mtime, size and inode, same generation and checksum
+        from metadata. Rows and journal entries written after snapshot
+        are applied over it, see RecordStore._restore
+
+        :param columns: list of columns in file
+        :param table: RecordTable of records
+        :param phone_index: PhoneIndex of records or None if it wasn't built
+        :param sort_indexes: dict of built SortIndex by order
+        :param signature: signatures of file and journal snapshot was taken at
+        :param generation: generation of file from metadata
+        :param checksum: checksum of file from metadata
+        """
+        self.columns = columns
+        self.table = table
+        self.phone_index = phone_index
+        self.sort_indexes = sort_indexes
+        self.signature = signature
+        self.generation = generation
+        self.checksum = checksum
+
+
+    def save(self, filename: str):
+        """
+        Saves snapshot to file, file is replaced atomically
+
+        :param filename: path to snapshot file
+        """
+        sidecar.save(filename, {'version': self.version, **self.__dict__})
+
+    @classmethod
+    def load(cls, filename: str, columns: list):
+        """
+        Returns snapshot saved to file or None if file is missing, damaged,
+        can't be trusted or was saved by other version or for other columns
+
+        :param filename: path to snapshot file
+        :param columns: list of columns in file
+        """
+        data = sidecar.load(filename)
+        if not isinstance(data, dict) or data.pop('version', None) != cls.version \
+                or data.get('columns') != columns:
+            return None
+
+        snapshot = cls.__new__(cls)
+        snapshot.__dict__.update(data)
+        # unpickled table gets copy of columns, list of store is shared instead like in loaded table
+        snapshot.table.columns = columns
+        return snapshot
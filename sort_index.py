@@ -0,0 +1,98 @@
+from array import array
+
+
+# empty values are replaced with biggest character, so they go after filled ones
+LAST = '\U0010ffff'
+
+
+def sort_key(values: list, id_key: tuple) -> tuple:
+    """
+    Returns sort key of record: values are compared case insensitive,
+    empty values go after filled ones, records with same values go in ID order.
+    Key is flat tuple of strings, it's compared much faster than nested tuples
+
+    :param values: values of columns records are sorted by
+    :param id_key: sort key of record ID
+    """
+    return (*map(value_key, values), id_key)
+
+
+def value_key(value: str) -> str:
+    """Returns sort key of single value"""
+    return value.lower() or LAST
+
+
+class SortIndex:
+    def __init__(self, positions=()):
+        """
+        Sorted array of positions of records in table.
+        Keys are not stored, they are taken from table by key function when compared,
+        so index takes 8 bytes per record. Changed records are moved
+        by binary search and insertion, so records are never sorted again
+
+        :param positions: positions of records sorted by their keys
+        """
+        self.positions = array('q', positions)
+
+
+    @classmethod
+    def build(cls, positions, key):
+        """
+        Builds index from scratch
+
+        :param positions: iterable of positions of records
+        :param key: function that returns sort key of position
+        """
+        return cls(sorted(positions, key=key))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def bisect(self, target: tuple, key) -> int:
+        """
+        Returns place of first position which key is not less than target
+
+        :param target: sort key or its beginning, e.g. key of first value only
+        :param key: function that returns sort key of position
+        """
+        positions = self.positions
+        low, high = 0, len(positions)
+        while low < high:
+            middle = (low + high) // 2
+            if key(positions[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def add(self, position: int, key):
+        """
+        Inserts position to its place
+
+        :param position: position of record in table
+        :param key: function that returns sort key of position
+        """
+        self.positions.insert(self.bisect(key(position), key), position)
+
+    def remove(self, position: int, old_key: tuple, key):
+        """
+        Removes position, record could be changed already,
+        so key it was inserted with is passed
+
+        :param position: position of record in table
+        :param old_key: sort key of record when it was inserted
+        :param key: function that returns sort key of position
+        """
+        place = self.bisect(old_key, lambda other: old_key if other == position else key(other))
+        if place < len(self.positions) and self.positions[place] == position:
+            del self.positions[place]
+
+    def update(self, position: int, old_key: tuple, key):
+        """Moves position after its record was changed, if its key has changed"""
+        if key(position) != old_key:
+            self.remove(position, old_key, key)
+            self.add(position, key)
+
+    def slice(self, start: int, count: int) -> list:
+        """Returns list of positions from start to start + count in sort order"""
+        return self.positions[start:start + count].tolist()
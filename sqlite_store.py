@@ -0,0 +1,431 @@
+import re
+import sqlite3
+
+from base_store import BaseStore, ConflictError, ORDERS
+from phone_index import PhoneIndex
+from search_index import TokenIndex
+from table import Record
+
+
+# bump when stored values change, older databases are migrated when opened, see _migrate
+SCHEMA_VERSION = 1
+
+
+class SqliteStore(BaseStore):
+    def __init__(self, filename: str, columns: list, timeout: float = 30):
+        """
+        Storage of records in sqlite database.
+        Name, company and digits of phone columns are indexed,
+        search uses FTS5 table that is kept in sync by triggers.
+        Concurrent access is handled by sqlite locking
+
+        :param filename: path to database file
+        :param columns: list of columns, first column is record ID
+        :param timeout: seconds to wait for lock held by other process
+        """
+        self.filename = filename
+        self.columns = columns
+        self.phone_columns = [
+            position for position, column in enumerate(columns) if 'номер' in column
+        ]
+
+        # changes are committed explicitly, see _transaction
+        self.connection = sqlite3.connect(filename, timeout=timeout, isolation_level=None)
+        # sqlite lower() changes only ASCII letters, sorted views need Cyrillic too
+        self.connection.create_function('py_lower', 1, str.lower, deterministic=True)
+        self._create_schema()
+
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _create_schema(self):
+        quote = self._quote
+        id_column, *columns = self.columns
+
+        fields = [f'{quote(id_column)} INTEGER PRIMARY KEY AUTOINCREMENT']
+        fields += [f"{quote(column)} TEXT NOT NULL DEFAULT ''" for column in columns]
+        for position in self.phone_columns:
+            # digits and reversed digits of phones, for prefix and suffix lookups
+            fields += [f"digits{position} TEXT NOT NULL DEFAULT ''",
+                       f"reversed{position} TEXT NOT NULL DEFAULT ''"]
+
+        statements = [f'CREATE TABLE IF NOT EXISTS records ({", ".join(fields)})']
+        for position, column in enumerate(self.columns):
+            if position == 0:
+                continue
+            if position in self.phone_columns:
+                for name in (f'digits{position}', f'reversed{position}'):
+                    statements.append(
+                        f'CREATE INDEX IF NOT EXISTS records_{name} ON records({name})'
+                    )
+            else:
+                statements.append(
+                    f'CREATE INDEX IF NOT EXISTS records_column{position} '
+                    f'ON records({quote(column)})'
+                )
+
+        # external content table, text is not stored twice
+        names = ', '.join(quote(column) for column in self.columns)
+
+        def values(row: str) -> str:
+            return ', '.join(f'{row}.{quote(column)}' for column in self.columns)
+
+        insert = f'INSERT INTO records_fts(rowid, {names}) ' \
+            f'VALUES (new.{quote(id_column)}, {values("new")});'
+        delete = f'INSERT INTO records_fts(records_fts, rowid, {names}) ' \
+            f"VALUES ('delete', old.{quote(id_column)}, {values('old')});"
+
+        statements += [
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5('
+            f'{names}, content=records, content_rowid={quote(id_column)}, '
+            f"tokenize=\"unicode61 remove_diacritics 0 tokenchars '_'\")",
+            f'CREATE TRIGGER IF NOT EXISTS records_insert AFTER INSERT ON records '
+            f'BEGIN {insert} END',
+            f'CREATE TRIGGER IF NOT EXISTS records_delete AFTER DELETE ON records '
+            f'BEGIN {delete} END',
+            f'CREATE TRIGGER IF NOT EXISTS records_update AFTER UPDATE ON records '
+            f'BEGIN {delete} {insert} END',
+        ]
+
+        with self._transaction():
+            for statement in statements:
+                self.connection.execute(statement)
+            version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self._migrate(version)
+                self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _migrate(self, version: int):
+        """
+        Brings values of database created by older version up to date,
+        called inside transaction
+
+        :param version: schema version of database
+        """
+        if version < 1:
+            # digits of phones are stored in canonical form, 8 is replaced with 7
+            for position in self.phone_columns:
+                column = self._quote(self.columns[position])
+                rows = self.connection.execute(
+                    f'SELECT {self._quote(self.columns[0])}, {column}, digits{position} '
+                    f'FROM records'
+                ).fetchall()
+                changed = []
+                for record_id, value, stored in rows:
+                    digits = PhoneIndex.normalize(value)
+                    if digits != stored:
+                        changed.append((digits, digits[::-1], record_id))
+                self.connection.executemany(
+                    f'UPDATE records SET digits{position} = ?, reversed{position} = ? '
+                    f'WHERE {self._quote(self.columns[0])} = ?',
+                    changed
+                )
+
+    def _transaction(self):
+        """Returns context manager of write transaction, lock is taken at start"""
+        return _Transaction(self.connection)
+
+    def _select(self) -> str:
+        return 'SELECT ' + ', '.join(self._quote(column) for column in self.columns) + \
+            ' FROM records'
+
+    def _record(self, row: tuple) -> Record:
+        return Record(self.columns, [str(value) for value in row])
+
+    def _values(self, record: dict) -> dict:
+        """Returns dict of values by columns with digits of phones, ID is not included"""
+        values = {column: str(record.get(column, '')) for column in self.columns[1:]}
+        for position in self.phone_columns:
+            digits = PhoneIndex.normalize(values[self.columns[position]])
+            values[f'digits{position}'] = digits
+            values[f'reversed{position}'] = digits[::-1]
+        return values
+
+    def _insert(self, values: dict, record_id: int = None) -> int:
+        names = list(values)
+        params = [values[name] for name in names]
+        if record_id is not None:
+            names.insert(0, self.columns[0])
+            params.insert(0, record_id)
+
+        placeholders = ', '.join('?' * len(names))
+        names = ', '.join(self._quote(name) for name in names)
+        cursor = self.connection.execute(
+            f'INSERT INTO records ({names}) VALUES ({placeholders})', params
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def _id(record_id) -> int:
+        """Returns record ID as integer or None if there can't be such record"""
+        record_id = str(record_id).strip()
+        return int(record_id) if re.fullmatch(r'\d{1,18}', record_id) else None
+
+
+    @classmethod
+    def create(cls, filename: str, columns: list):
+        cls(filename, columns).close()
+
+    def get(self, record_id) -> Record:
+        record_id = self._id(record_id)
+        if record_id is None:
+            return None
+        row = self.connection.execute(
+            f'{self._select()} WHERE {self._quote(self.columns[0])} = ?', (record_id,)
+        ).fetchone()
+        return None if row is None else self._record(row)
+
+    def records(self) -> list:
+        return list(self.iter_records())
+
+    def iter_records(self):
+        # rows are fetched from cursor while they are consumed
+        rows = self.connection.execute(f'{self._select()} ORDER BY {self._quote(self.columns[0])}')
+        for row in rows:
+            yield self._record(row)
+
+    def search(self, query: str) -> list:
+        """
+        Returns list of records containing all words of query,
+        words are matched by prefix, records are in ID order
+
+        :param query: search terms separated with spaces
+        """
+        match = self._match(query)
+        if not match:
+            return []
+
+        id_column = self._quote(self.columns[0])
+        rows = self.connection.execute(
+            f'{self._select()} WHERE {id_column} IN '
+            f'(SELECT rowid FROM records_fts WHERE records_fts MATCH ?) ORDER BY {id_column}',
+            (match,)
+        )
+        return [self._record(row) for row in rows]
+
+    def search_ids(self, query: str) -> set:
+        match = self._match(query)
+        if not match:
+            return set()
+
+        rows = self.connection.execute(
+            'SELECT rowid FROM records_fts WHERE records_fts MATCH ?', (match,)
+        )
+        return {str(row[0]) for row in rows}
+
+    @staticmethod
+    def _match(query: str) -> str:
+        """Returns FTS5 query that matches every term by prefix, empty if there are no terms"""
+        return ' '.join(f'"{term}"*' for term in sorted(TokenIndex.tokenize(query)))
+
+    def find_by_phone(self, number: str, mode: str = 'exact') -> list:
+        """
+        Returns list of records with matching work or personal number
+
+        :param number: number to look for, it's normalized like stored numbers
+        :param mode: "exact", "prefix" or "suffix" match
+        """
+        digits = PhoneIndex.normalize(number)
+        if not digits or not self.phone_columns:
+            return []
+
+        conditions = []
+        params = []
+        for position in self.phone_columns:
+            if mode == 'exact':
+                conditions.append(f'digits{position} = ?')
+                params.append(digits)
+            else:
+                name, key = (f'reversed{position}', digits[::-1]) if mode == 'suffix' \
+                    else (f'digits{position}', digits)
+                # ':' goes right after digits, so range covers all numbers with prefix
+                conditions.append(f'({name} >= ? AND {name} < ?)')
+                params += [key, key + ':']
+
+        rows = self.connection.execute(
+            f'{self._select()} WHERE {" OR ".join(conditions)} '
+            f'ORDER BY {self._quote(self.columns[0])}',
+            params
+        )
+        return [self._record(row) for row in rows]
+
+    def count(self) -> int:
+        return self.connection.execute('SELECT count(*) FROM records').fetchone()[0]
+
+    def page(self, start: int, count: int) -> list:
+        rows = self.connection.execute(
+            f'{self._select()} ORDER BY {self._quote(self.columns[0])} LIMIT ? OFFSET ?',
+            (count, start)
+        )
+        return [self._record(row) for row in rows]
+
+    def _order_by(self, order: str) -> str:
+        """Returns ORDER BY terms of order, same as sort keys of other storages"""
+        terms = []
+        for column in ORDERS[order]:
+            column = self._quote(column)
+            # empty values go last, values are compared case insensitive
+            terms += [f"{column} = ''", f'py_lower({column})']
+        return ', '.join(terms + [self._quote(self.columns[0])])
+
+    def sorted_page(self, order: str, start: int, count: int) -> list:
+        rows = self.connection.execute(
+            f'{self._select()} ORDER BY {self._order_by(order)} LIMIT ? OFFSET ?',
+            (count, start)
+        )
+        return [self._record(row) for row in rows]
+
+    def sorted_position(self, order: str, prefix: str) -> int:
+        if ORDERS[order]:
+            column = self._quote(ORDERS[order][0])
+            condition, params = f"{column} != '' AND py_lower({column}) < ?", (prefix.lower(),)
+        elif prefix.isdigit():
+            condition, params = f'{self._quote(self.columns[0])} < ?', (int(prefix),)
+        else:
+            # IDs are numbers, so any other prefix goes after all of them
+            return self.count()
+        return self.connection.execute(
+            f'SELECT count(*) FROM records WHERE {condition}', params
+        ).fetchone()[0]
+
+    def next_id(self) -> int:
+        # sequence is kept after deletes, so IDs are never reused
+        row = self.connection.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'records'"
+        ).fetchone()
+        return 1 if row is None else row[0] + 1
+
+
+    def add_many(self, records: list) -> list:
+        """
+        Inserts records in single transaction and returns them with IDs
+
+        :param records: list of dicts of values by columns
+        """
+        added = []
+        with self._transaction():
+            for record in records:
+                values = self._values(record)
+                record_id = self._insert(values)
+                added.append({
+                    self.columns[0]: str(record_id),
+                    **{column: values[column] for column in self.columns[1:]}
+                })
+        return added
+
+    def _check_version(self, record_id: int, version: int):
+        """Raises ConflictError if record has other version, called inside transaction"""
+        if version is None:
+            return
+        record = self.get(record_id)
+        if record is not None and self.version(record) != version:
+            raise ConflictError(str(record_id))
+
+    def update(self, record_id, changes: dict, version: int = None) -> bool:
+        """
+        Updates record fields with single UPDATE by primary key,
+        returns False if record not found
+
+        :param record_id: record ID
+        :param changes: dict of new values by columns
+        :param version: version of record changes are based on, see BaseStore.version
+        """
+        record_id = self._id(record_id)
+        if record_id is None:
+            return False
+
+        values = {}
+        for column, value in changes.items():
+            position = self.columns.index(column)
+            if position == 0:
+                continue
+            value = str(value)
+            values[column] = value
+            if position in self.phone_columns:
+                digits = PhoneIndex.normalize(value)
+                values[f'digits{position}'] = digits
+                values[f'reversed{position}'] = digits[::-1]
+
+        if not values:
+            return self.get(record_id) is not None
+
+        assignments = ', '.join(f'{self._quote(name)} = ?' for name in values)
+        with self._transaction():
+            self._check_version(record_id, version)
+            cursor = self.connection.execute(
+                f'UPDATE records SET {assignments} WHERE {self._quote(self.columns[0])} = ?',
+                [*values.values(), record_id]
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, record_id, version: int = None) -> bool:
+        record_id = self._id(record_id)
+        if record_id is None:
+            return False
+
+        with self._transaction():
+            self._check_version(record_id, version)
+            cursor = self.connection.execute(
+                f'DELETE FROM records WHERE {self._quote(self.columns[0])} = ?', (record_id,)
+            )
+        return cursor.rowcount > 0
+
+    def write(self, records: list):
+        """
+        Replaces all records with passed ones in single transaction.
+        Records keep their IDs, records without digit or with repeated ID get new ones
+
+        :param records: list of dicts of records
+        """
+        ids = set()
+        with self._transaction():
+            self.connection.execute('DELETE FROM records')
+            for record in records:
+                record_id = self._id(record.get(self.columns[0], ''))
+                if record_id in ids:
+                    record_id = None
+                ids.add(self._insert(self._values(record), record_id))
+
+    def state(self) -> tuple:
+        """
+        Returns (data version, count of changes), data version changes
+        when other connections commit, count of changes when this one does
+        """
+        data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        return data_version, self.connection.total_changes
+
+    def batch(self):
+        """Returns context manager that runs several changes in single transaction"""
+        return self._transaction()
+
+    def close(self):
+        self.connection.close()
+
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        """
+        Write transaction, committed on success and rolled back on error.
+        Transaction started inside other one joins it
+
+        :param connection: connection in autocommit mode
+        """
+        self.connection = connection
+        self.nested = False
+
+    def __enter__(self):
+        self.nested = self.connection.in_transaction
+        if not self.nested:
+            # lock is taken at start, so transaction never fails on upgrade to write lock
+            self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, *exc):
+        if self.nested:
+            return
+        if exc_type is None:
+            self.connection.execute('COMMIT')
+        else:
+            self.connection.execute('ROLLBACK')
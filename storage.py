@@ -0,0 +1,56 @@
+import os
+import importlib
+
+from base_store import BaseStore
+
+
+# (module, class) of storage by file extension, module is imported
+# only when file of its format is opened, e.g. sqlite3 isn't imported for csv files
+STORES = {
+    '.csv': ('store', 'RecordStore'),
+    '.pbk': ('binary_store', 'BinaryStore'),
+    '.db': ('sqlite_store', 'SqliteStore'),
+    '.sqlite': ('sqlite_store', 'SqliteStore'),
+    '.sqlite3': ('sqlite_store', 'SqliteStore'),
+}
+
+
+def store_class(filename: str) -> type:
+    """Returns storage class for file by it's extension, csv is used by default"""
+    module_name, class_name = STORES.get(os.path.splitext(filename)[1].lower(), STORES['.csv'])
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def open_store(filename: str, columns: list) -> BaseStore:
+    """
+    Returns storage of records for file, format is chosen by extension
+
+    :param filename: path to phonebook file
+    :param columns: list of columns in file
+    """
+    return store_class(filename)(filename, columns)
+
+
+def create_file(filename: str, columns: list):
+    """Creates empty phonebook file in format chosen by extension"""
+    store_class(filename).create(filename, columns)
+
+
+def convert(source: str, target: str, columns: list) -> int:
+    """
+    Rewrites all records of source file to target file,
+    formats are chosen by extensions. Returns count of records
+
+    :param source: path to existing phonebook file
+    :param target: path to new phonebook file, replaced if exists
+    :param columns: list of columns in files
+    """
+    source_store = open_store(source, columns)
+    target_store = open_store(target, columns)
+    try:
+        records = source_store.records()
+        target_store.write(records)
+    finally:
+        source_store.close()
+        target_store.close()
+    return len(records)
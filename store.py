@@ -0,0 +1,1112 @@
+import io
+import os
+import csv
+import threading
+from itertools import chain
+
+from base_store import BaseStore, ConflictError, ORDERS
+from journal import Journal
+from locking import FileLock
+from meta import Metadata
+from offsets import OffsetIndex
+from mapped import MappedFile
+from search_index import TokenIndex
+from fuzzy_index import TrigramIndex
+from phone_index import PhoneIndex
+from sort_index import SortIndex, sort_key, value_key
+from snapshot import Snapshot
+from table import Record, RecordTable
+
+
+# files smaller than this are scanned in single process, starting workers costs more
+SCAN_SHARD_SIZE = 4 * 1024 * 1024
+
+
+class RecordStore(BaseStore):
+    def __init__(
+        self,
+        filename: str,
+        columns: list,
+        delimiter: str = ';',
+        compact_threshold: int = 1024 * 1024
+    ):
+        """
+        In-memory storage of phonebook records, loads file once
+        and reloads it only when file was changed on disk.
+        Edits and deletes are written to journal and folded back
+        into file by compaction
+
+        :param filename: path to phonebook file
+        :param columns: list of columns in file
+        :param delimiter: csv delimiter
+        :param compact_threshold: journal size in bytes that starts background compaction
+        """
+        self.filename = filename
+        self.columns = columns
+        self.delimiter = delimiter
+
+        self.journal = Journal(filename)
+        self.meta = Metadata(filename, self._read_ids)
+
+        # used to read pages straight from file while records are not loaded
+        self.offsets = OffsetIndex(filename)
+        self._overlay = None
+        # (signatures of files, sorted numbers of rows deleted by journal), see _deleted_rows
+        self._deleted_rows_cache = None
+        self.compact_threshold = compact_threshold
+        self._compaction = None
+
+        # guards rows and files against background compaction
+        self._lock = threading.RLock()
+
+        # index of digits of phone columns
+        self.phone_index = None
+        self.phone_columns = [
+            position for position, column in enumerate(columns) if 'номер' in column
+        ]
+
+        # sorted positions of records by order, built on first sorted view
+        self.sort_indexes = {}
+
+        # names and company are indexed for fuzzy search
+        self.name_columns = [
+            position for position in range(1, len(columns))
+            if position not in self.phone_columns
+        ]
+
+        # records are stored by columns, phones and IDs as integers
+        self._table = self._new_table()
+
+        # state of file and journal when they were loaded last time
+        self._signature = None
+        self._generation = None
+
+        # full-text index, kept in memory and saved to file on close
+        self.index = None
+        self.index_filename = filename + '.index'
+
+        # trigram index of names, built on first fuzzy search
+        self.fuzzy_index = None
+        self.fuzzy_filename = filename + '.fuzzy'
+
+        # parsed records saved on close, so next start doesn't parse file
+        self.snapshot_filename = filename + '.snapshot'
+        # (file signature, names of saved indexes) of saved snapshot
+        self._snapshot_state = None
+
+
+    def _base_signature(self) -> tuple:
+        """Returns (mtime, size, inode) of file or None if file doesn't exist"""
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        # replaced file could keep size and mtime, but never inode
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _file_signature(self) -> tuple:
+        """Returns signatures of file and journal, used to detect changes on disk"""
+        base = self._base_signature()
+        if base is None:
+            return None
+        return base, self.journal.signature()
+
+    def _ensure_loaded(self):
+        """
+        Loads file if it wasn't loaded yet or was changed on disk.
+        If other processes only appended records or journal entries,
+        just appended data is applied
+        """
+        with self._lock, FileLock(self.filename, shared=True):
+            signature = self._file_signature()
+            if self._signature is not None and self._signature == signature:
+                return
+            if not self._catch_up(signature):
+                self.load()
+
+    def _catch_up(self, signature: tuple) -> bool:
+        """
+        Applies rows and journal entries appended since last load,
+        returns False if file was rewritten and has to be loaded again.
+        Should be called under lock
+
+        :param signature: current signature of file and journal
+        """
+        if self._signature is None or signature is None:
+            return False
+
+        (_, old_size, _), old_journal = self._signature
+        (_, size, _), journal = signature
+        old_journal_size = old_journal[1] if old_journal else 0
+        journal_size = journal[1] if journal else 0
+        if size < old_size or journal_size < old_journal_size:
+            return False
+
+        # compaction and rewrite change generation, appends keep it
+        if self._signature[0] != signature[0] \
+                and self.meta.current()['generation'] != self._generation:
+            return False
+
+        # rows go first, journal entries could refer to appended rows
+        if size > old_size:
+            for row in self._read_rows(old_size):
+                self._append_row(row)
+        self._replay(old_journal_size, journal_size)
+        self._signature = signature
+        return True
+
+    def load(self):
+        """
+        Reads all records from file into memory and applies journal over them.
+        Records are restored from snapshot if it's valid for file
+        """
+        # shared lock keeps file and journal consistent with each other while they are read
+        with self._lock, FileLock(self.filename, shared=True):
+            self._drop_indexes()
+            if self._restore():
+                return
+
+            self._table = self._new_table()
+            self._generation = None
+            if os.path.exists(self.filename):
+                self._generation = self.meta.current()['generation']
+                for row in self._read_rows():
+                    self._append_row(row)
+
+            signature = self._file_signature()
+            journal = signature[1] if signature else None
+            self._replay(0, journal[1] if journal else 0)
+            self._signature = signature
+
+    def _restore(self) -> bool:
+        """
+        Restores records from snapshot, returns False if there is no valid snapshot.
+        Rows and journal entries written after snapshot was taken are applied over it.
+        Should be called under lock
+        """
+        signature = self._file_signature()
+        if signature is None:
+            return False
+        snapshot = Snapshot.load(self.snapshot_filename, self.columns)
+        if snapshot is None:
+            return False
+
+        # file rewritten since snapshot gets other generation, file changed by someone
+        # who doesn't know about metadata gets new generation and checksum too
+        meta = self.meta.current()
+        if meta['generation'] != snapshot.generation:
+            return False
+        if signature[0] == snapshot.signature[0] and meta['checksum'] != snapshot.checksum:
+            return False
+
+        self._table = snapshot.table
+        self.phone_index = snapshot.phone_index
+        self.sort_indexes = snapshot.sort_indexes
+        self._signature = snapshot.signature
+        self._generation = snapshot.generation
+        if signature != snapshot.signature and not self._catch_up(signature):
+            self._table = self._new_table()
+            self._drop_indexes()
+            self._signature = None
+            return False
+
+        self._snapshot_state = snapshot.signature[0], self._snapshot_indexes()
+        return True
+
+    def _snapshot_indexes(self) -> set:
+        """Returns names of built indexes that are saved to snapshot with records"""
+        names = set(self.sort_indexes)
+        if self.phone_index is not None:
+            names.add('phone')
+        return names
+
+    def _save_snapshot(self):
+        """
+        Saves records to snapshot if file was changed since snapshot was taken.
+        Journal entries are not a reason to save it, they are applied over snapshot on load.
+        Should be called under lock
+        """
+        if self._signature is None:
+            return
+        state = self._signature[0], self._snapshot_indexes()
+        saved = self._snapshot_state
+        if saved is not None and saved[0] == state[0] and state[1] <= saved[1]:
+            return
+
+        with FileLock(self.filename, shared=True):
+            # records in memory could be behind file changed by other process
+            if self._signature != self._file_signature():
+                return
+            meta = self.meta.current()
+            if meta['generation'] != self._generation:
+                return
+            Snapshot(
+                self.columns, self._table, self.phone_index, self.sort_indexes,
+                self._signature, self._generation, meta['checksum']
+            ).save(self.snapshot_filename)
+        self._snapshot_state = state
+
+    def _replay(self, start: int, end: int):
+        """Applies journal entries between byte offsets to records in memory"""
+        for entry in self.journal.entries(end, start):
+            if entry.get('op') == 'update':
+                self._apply_update(entry['id'], entry['fields'])
+            elif entry.get('op') == 'delete':
+                self._apply_delete(entry['id'])
+
+    def _new_table(self) -> RecordTable:
+        return RecordTable(self.columns, self.phone_columns)
+
+    def _drop_indexes(self):
+        """
+        Drops indexes, they are built again on first query.
+        Used on load and before bulk changes, so records are not indexed one by one
+        """
+        self.index = None
+        self.phone_index = None
+        self.fuzzy_index = None
+        self.sort_indexes = {}
+
+    def _ensure_index(self):
+        """Loads or builds full-text index if it was dropped"""
+        self._ensure_loaded()
+        with self._lock:
+            if self.index is not None:
+                return
+
+            # index saved on previous run is valid only for same files state
+            self.index = TokenIndex.load(self.index_filename, self._signature)
+            if self.index is None:
+                self.index = TokenIndex.build(self._table.rows())
+
+    def _ensure_phone_index(self):
+        """Builds phone index if it was dropped and wasn't restored from snapshot"""
+        self._ensure_loaded()
+        with self._lock:
+            if self.phone_index is None:
+                self.phone_index = PhoneIndex.build(self._table.rows(), self.phone_columns)
+
+    def _ensure_fuzzy_index(self):
+        """Builds trigram index of names if it wasn't built yet"""
+        self._ensure_loaded()
+        with self._lock:
+            if self.fuzzy_index is not None:
+                return
+
+            self.fuzzy_index = TrigramIndex.load(self.fuzzy_filename, self._signature)
+            if self.fuzzy_index is None:
+                self.fuzzy_index = TrigramIndex.build(
+                    (row[0], self._names(row)) for row in self._table.rows()
+                )
+
+    def _ensure_sort_index(self, order: str):
+        """Builds sorted index of order if it was dropped and wasn't restored from snapshot"""
+        self._ensure_loaded()
+        with self._lock:
+            if order in self.sort_indexes:
+                return
+
+            # ranks of values give same order as keys, but are computed once per distinct value
+            table = self._table
+            ranks = [table.ranks(self.columns.index(column), value_key) for column in ORDERS[order]]
+            ids = table.ids
+            if ids.other or ids.data and min(ids.data) < 0:
+                def id_key(position: int):
+                    return self.id_key(ids.get(position))
+            else:
+                # digit IDs go in numeric order
+                id_key = ids.data.__getitem__
+
+            self.sort_indexes[order] = SortIndex.build(
+                (position for position in range(table.size) if table.alive[position]),
+                lambda position: (*(rank[position] for rank in ranks), id_key(position))
+            )
+
+    def _position_key(self, order: str):
+        """Returns function that returns sort key of record at position of table"""
+        table = self._table
+        columns = [self.columns.index(column) for column in ORDERS[order]]
+
+        def key(position: int) -> tuple:
+            return sort_key(
+                [table.get(position, column) for column in columns],
+                self.id_key(table.ids.get(position))
+            )
+        return key
+
+    def _row_key(self, order: str, row: list) -> tuple:
+        """Returns sort key of row, used for old values of changed row"""
+        return sort_key(
+            [row[self.columns.index(column)] for column in ORDERS[order]], self.id_key(row[0])
+        )
+
+    def _index_add(self, row: list):
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.add(row[0], self._names(row))
+        if self.phone_index is not None:
+            self.phone_index.add(row[0], self._phones(row))
+        if self.index is not None:
+            self.index.add(row[0], row)
+
+    def _index_update(self, old_row: list, row: list):
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.update(row[0], self._names(old_row), self._names(row))
+        if self.phone_index is not None:
+            self.phone_index.update(row[0], self._phones(old_row), self._phones(row))
+        if self.index is not None:
+            self.index.update(row[0], old_row, row)
+
+    def _index_remove(self, row: list):
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.remove(row[0], self._names(row))
+        if self.phone_index is not None:
+            self.phone_index.remove(row[0], self._phones(row))
+        if self.index is not None:
+            self.index.remove(row[0], row)
+
+    def _phones(self, row: list) -> list:
+        return [row[position] for position in self.phone_columns]
+
+    def _names(self, row: list) -> list:
+        return [row[position] for position in self.name_columns]
+
+    def _align(self, row: list) -> list:
+        """Pads or cuts row to columns count"""
+        width = len(self.columns)
+        if len(row) < width:
+            return row + [''] * (width - len(row))
+        if len(row) > width:
+            return row[:width]
+        return row
+
+    def _append_row(self, row: list):
+        """Adds row to memory and index, row is aligned to columns count"""
+        row = self._align(row)
+        position = self._table.append(row)
+        self._index_add(row)
+        for order, index in self.sort_indexes.items():
+            index.add(position, self._position_key(order))
+
+    def _apply_update(self, record_id: str, fields: dict) -> bool:
+        position = self._table.find(record_id)
+        if position is None:
+            return False
+
+        old_row = self._table.row(position)
+        row = list(old_row)
+        for column, value in fields.items():
+            row[self.columns.index(column)] = str(value)
+        self._table.set_row(position, row)
+        self._index_update(old_row, row)
+        for order, index in self.sort_indexes.items():
+            index.update(position, self._row_key(order, old_row), self._position_key(order))
+        return True
+
+    def _apply_delete(self, record_id: str) -> bool:
+        position = self._table.find(record_id)
+        if position is None:
+            return False
+
+        self._index_remove(self._table.row(position))
+        for order, index in self.sort_indexes.items():
+            key = self._position_key(order)
+            index.remove(position, key(position), key)
+        self._table.delete(position)
+        return True
+
+    def _to_dict(self, row: list) -> dict:
+        return dict(zip(self.columns, row))
+
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._table)
+
+    def __contains__(self, record_id):
+        self._ensure_loaded()
+        return self._table.find(str(record_id)) is not None
+
+    def get(self, record_id) -> Record:
+        """
+        Returns record by it's ID or None if record not found
+
+        :param record_id: record ID
+        """
+        self._ensure_loaded()
+        position = self._table.find(str(record_id))
+        if position is None:
+            return None
+        return self._table.record(position)
+
+    def records(self) -> list:
+        """Returns list of all records in file order"""
+        self._ensure_loaded()
+        table = self._table
+        return [table.record(position) for position in range(table.size) if table.alive[position]]
+
+    def iter_records(self):
+        """
+        A generator that returns all records in file order straight from file
+        with journal applied, records are not loaded into memory.
+        Records are returned as they were when first record was read:
+        mapping of file and journal are taken under lock, and mapping
+        keeps rewritten file readable, so lock isn't held while records are consumed
+        """
+        with self._lock, FileLock(self.filename, shared=True):
+            if not os.path.exists(self.filename):
+                return
+            updates, deleted = self._journal_overlay()
+            rows = self._read_rows()
+            # file is mapped when generator starts, rows appended later are beyond mapping
+            first = next(rows, None)
+
+        if first is None:
+            return
+        for row in chain([first], rows):
+            row = self._align(row)
+            if row[0] in deleted:
+                continue
+            record = self._to_dict(row)
+            record.update(updates.get(row[0], {}))
+            yield record
+
+    def search(self, query: str) -> list:
+        """
+        Returns list of records containing all words of query,
+        words are matched by prefix, records are in file order
+
+        :param query: search terms separated with spaces
+        """
+        self._ensure_index()
+        return self._by_ids(self.index.search(query))
+
+    def search_ids(self, query: str) -> set:
+        """
+        Returns IDs of records found by search, records are not read
+
+        :param query: search terms separated with spaces
+        """
+        self._ensure_index()
+        return self.index.search(query)
+
+    def find_by_phone(self, number: str, mode: str = 'exact') -> list:
+        """
+        Returns list of records with matching work or personal number
+
+        :param number: number to look for, it's normalized like indexed numbers
+        :param mode: "exact", "prefix" or "suffix" match
+        """
+        self._ensure_phone_index()
+        return self._by_ids(self.phone_index.find(number, mode))
+
+    def fuzzy_search(self, query: str, limit: int = None) -> list:
+        """
+        Returns list of records with names or company similar to every word of query,
+        most similar records go first. Words may have typos and may be written
+        in Latin letters instead of Cyrillic ones, e.g. "Ivnaov" finds "Иванов"
+
+        :param query: words separated with spaces
+        :param limit: count of returned records, None(default) for all
+        """
+        self._ensure_fuzzy_index()
+        with self._lock:
+            ranked = self.fuzzy_index.search(query)
+            ranked.sort(key=lambda item: (-item[1], self.id_key(item[0])))
+            positions = (self._table.find(record_id) for record_id, _ in ranked[:limit])
+            return [self._table.record(position) for position in positions if position is not None]
+
+    def scan(self, query: str, workers: int = None) -> list:
+        """
+        Returns list of records containing every term of query anywhere in values,
+        records are in ID order. Index isn't used, so any part of word matches.
+        File is split into shards by line boundaries and shards are scanned
+        in parallel processes, workers return only IDs and offsets of matches
+
+        :param query: search terms separated with spaces
+        :param workers: count of processes, CPU count by default
+        """
+        # terms are prepared once, not for every row
+        terms = query.lower().split()
+        if not terms:
+            return []
+        workers = workers or os.cpu_count() or 1
+
+        with self._lock, FileLock(self.filename, shared=True):
+            if not os.path.exists(self.filename):
+                return []
+
+            # rows changed in journal are checked here with their actual values
+            updates, deleted = self._journal_overlay()
+            touched = set(updates)
+
+            with MappedFile(self.filename, self.delimiter) as mapped:
+                shards = self._shards(mapped, max(1, min(workers, len(mapped) // SCAN_SHARD_SIZE)))
+                if len(shards) > 1:
+                    # imported here, process pool takes long to import and is rarely used
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # pool is closed before lock is released, so file can't change under workers
+                    with ProcessPoolExecutor(len(shards)) as pool:
+                        futures = [
+                            pool.submit(
+                                _scan_shard, type(self), self.filename, self.columns,
+                                self.delimiter, shard, terms, touched
+                            )
+                            for shard in shards
+                        ]
+                        results = [future.result() for future in futures]
+                else:
+                    results = [
+                        self._scan_range(mapped, start, end, terms, touched)
+                        for start, end in shards
+                    ]
+
+                records = []
+                for matches, changed in results:
+                    for record_id, offset in matches + changed:
+                        if record_id in deleted:
+                            continue
+                        record = self._to_dict(self._align(self._row_at(mapped, offset)))
+                        record.update(updates.get(record_id, {}))
+                        if record_id not in touched or self._contains(record.values(), terms):
+                            records.append(record)
+
+        return sorted(records, key=lambda record: self.id_key(record[self.columns[0]]))
+
+    def _by_ids(self, ids: set) -> list:
+        """Returns list of records with passed IDs in file order"""
+        positions = (self._table.find(record_id) for record_id in ids)
+        positions = sorted(position for position in positions if position is not None)
+        return [self._table.record(position) for position in positions]
+
+    def _journal_overlay(self) -> tuple:
+        """
+        Returns (updates by record ID, set of deleted IDs) from journal,
+        used to apply journal over rows read straight from file
+        """
+        signature = self.journal.signature()
+        if self._overlay is None or self._overlay[0] != signature:
+            updates = {}
+            deleted = set()
+            for entry in self.journal.entries():
+                if entry.get('op') == 'update':
+                    updates.setdefault(entry['id'], {}).update(entry['fields'])
+                elif entry.get('op') == 'delete':
+                    deleted.add(entry['id'])
+            self._overlay = signature, updates, deleted
+        return self._overlay[1], self._overlay[2]
+
+    def _lazy(self) -> bool:
+        """Returns True if pages can be read straight from file without loading records"""
+        return self._signature is None
+
+    def _deleted_rows(self) -> list:
+        """
+        Returns sorted numbers of rows of file deleted by journal, they are skipped
+        when pages are read straight from file. Rows are found with single pass
+        over IDs of rows, nothing else is decoded. Should be called under lock
+        """
+        deleted = self._journal_overlay()[1]
+        if not deleted:
+            return []
+
+        signature = self._file_signature()
+        if self._deleted_rows_cache is None or self._deleted_rows_cache[0] != signature:
+            keys = {record_id.encode('utf-8') for record_id in deleted}
+            with MappedFile(self.filename, self.delimiter) as mapped:
+                rows = [
+                    number for number, record_id in enumerate(self._row_ids(mapped))
+                    if record_id in keys
+                ]
+            self._deleted_rows_cache = signature, rows
+        return self._deleted_rows_cache[1]
+
+    def count(self) -> int:
+        """Returns count of records, file is not parsed if records are not loaded"""
+        with self._lock, FileLock(self.filename, shared=True):
+            if self._lazy():
+                return self._lazy_count() - len(self._deleted_rows())
+        return len(self)
+
+    def page(self, start: int, count: int) -> list:
+        """
+        Returns list of records from start to start + count in file order.
+        While records are not loaded only requested rows are read from file,
+        rows deleted by journal are skipped
+
+        :param start: number of first record, starting from 0
+        :param count: count of records
+        """
+        with self._lock, FileLock(self.filename, shared=True):
+            if self._lazy():
+                updates, deleted = self._journal_overlay()
+                # number of first row in file, deleted rows before it shift it
+                row = start
+                for number in self._deleted_rows():
+                    if number > row:
+                        break
+                    row += 1
+
+                records = []
+                while len(records) < count:
+                    rows = self._lazy_rows(row, count - len(records))
+                    if not rows:
+                        break
+                    row += len(rows)
+                    for values in rows:
+                        record = self._to_dict(self._align(values))
+                        if record[self.columns[0]] in deleted:
+                            continue
+                        record.update(updates.get(record[self.columns[0]], {}))
+                        records.append(record)
+                return records
+
+        self._ensure_loaded()
+        with self._lock:
+            table = self._table
+            return [table.record(position) for position in table.positions(start, count)]
+
+    def sorted_page(self, order: str, start: int, count: int) -> list:
+        """
+        Returns list of records from start to start + count in passed order,
+        records are taken by positions from sorted index
+
+        :param order: key of ORDERS
+        :param start: number of first record, starting from 0
+        :param count: count of records
+        """
+        with self._lock:
+            self._ensure_sort_index(order)
+            positions = self.sort_indexes[order].slice(start, count)
+            return [self._table.record(position) for position in positions]
+
+    def sorted_position(self, order: str, prefix: str) -> int:
+        """
+        Returns number of first record in passed order which first sorted value
+        starts with prefix or goes after it, found by binary search in sorted index
+
+        :param order: key of ORDERS
+        :param prefix: beginning of value, e.g. first letter of surname
+        """
+        with self._lock:
+            self._ensure_sort_index(order)
+            return self.sort_indexes[order].bisect(
+                self._prefix_key(order, prefix), self._position_key(order)
+            )
+
+    def next_id(self) -> int:
+        """Returns ID that will be assigned to next added record, file is not parsed"""
+        with FileLock(self.filename, shared=True):
+            return self.meta.next_id()
+
+
+    def add_many(self, records: list) -> list:
+        """
+        Appends records to the end of file with single write and returns them with IDs.
+        IDs are allocated from metadata under exclusive lock,
+        so concurrent appends never get same IDs.
+        When many records are added, indexes are rebuilt on next query
+        instead of being updated per record
+
+        :param records: list of dicts of values by columns
+        """
+        if not records:
+            return []
+
+        rows = [[str(record.get(column, '')) for column in self.columns] for record in records]
+
+        with self._lock, FileLock(self.filename):
+            meta = self.meta.current()
+            next_id = meta['next_id']
+            for row in rows:
+                row[0] = str(next_id)
+                next_id += 1
+
+            data = self._encode_rows(rows)
+
+            # records in memory are still valid only if nobody changed file after load
+            in_sync = self._signature is not None and self._signature == self._file_signature()
+            file_signature = self._base_signature()
+
+            with open(self.filename, 'ab') as f:
+                f.write(data)
+            self.meta.appended(meta, data, len(rows), next_id)
+            self._appended(file_signature, data)
+
+            if in_sync:
+                if len(rows) > 1:
+                    self._drop_indexes()
+                for row in rows:
+                    self._append_row(row)
+                self._signature = self._file_signature()
+
+        self._maybe_compact()
+        return [self._to_dict(row) for row in rows]
+
+    def _check_version(self, record_id: str, version: int) -> bool:
+        """
+        Returns False if record not found, raises ConflictError if record
+        has other version. Should be called under exclusive lock
+        """
+        self._ensure_loaded()
+        position = self._table.find(record_id)
+        if position is None:
+            return False
+        if version is not None and self.version(self._table.record(position)) != version:
+            raise ConflictError(record_id)
+        return True
+
+    def update(self, record_id, changes: dict, version: int = None) -> bool:
+        """
+        Updates record fields, returns False if record not found.
+        Changes of other processes are applied first under exclusive lock,
+        so passed version is compared with actual record
+
+        :param record_id: record ID
+        :param changes: dict of new values by columns
+        :param version: version of record changes are based on, see BaseStore.version
+        """
+        record_id = str(record_id)
+        changes = {column: str(value) for column, value in changes.items()}
+
+        with self._lock, FileLock(self.filename):
+            if not self._check_version(record_id, version):
+                return False
+            self._apply_update(record_id, changes)
+            self.journal.update(record_id, changes)
+            self._signature = self._file_signature()
+
+        self._maybe_compact()
+        return True
+
+    def delete(self, record_id, version: int = None) -> bool:
+        """
+        Deletes record, returns False if record not found
+
+        :param record_id: record ID
+        :param version: version of record that is deleted, see BaseStore.version
+        """
+        record_id = str(record_id)
+
+        with self._lock, FileLock(self.filename):
+            if not self._check_version(record_id, version):
+                return False
+            self._apply_delete(record_id)
+            self.journal.delete(record_id)
+            self._signature = self._file_signature()
+
+        self._maybe_compact()
+        return True
+
+    def change_many(self, changes: list) -> int:
+        """
+        Updates and deletes several records under single exclusive lock,
+        all changes are written to journal with single append.
+        Versions of all records are checked before anything is changed
+
+        :param changes: list of (record ID, dict of new values or None to delete record,
+            version of record or None)
+        """
+        changes = [
+            (
+                str(record_id),
+                None if fields is None
+                else {column: str(value) for column, value in fields.items()},
+                version
+            )
+            for record_id, fields, version in changes
+        ]
+
+        with self._lock, FileLock(self.filename):
+            found = [self._check_version(record_id, version) for record_id, _, version in changes]
+            entries = []
+            for (record_id, fields, _), exists in zip(changes, found):
+                if not exists:
+                    continue
+                if fields is None:
+                    self._apply_delete(record_id)
+                    entries.append(Journal.delete_entry(record_id))
+                else:
+                    self._apply_update(record_id, fields)
+                    entries.append(Journal.update_entry(record_id, fields))
+            if entries:
+                self.journal.append(entries)
+                self._signature = self._file_signature()
+
+        self._maybe_compact()
+        return len(entries)
+
+    def state(self) -> tuple:
+        """Returns signatures of file and journal, any change of records changes them"""
+        return self._file_signature()
+
+    def batch(self):
+        """Returns context manager that holds exclusive lock for several changes"""
+        return _Batch(self)
+
+    def write(self, records: list):
+        """
+        Replaces all records with passed ones and rewrites file
+
+        :param records: list of dicts of records
+        """
+        self.wait_compaction()
+
+        with self._lock:
+            self._table = self._new_table()
+            self._drop_indexes()
+            for record in records:
+                self._append_row([str(record.get(column, '')) for column in self.columns])
+
+            with FileLock(self.filename):
+                self._write_file(self._table)
+                self.journal.truncate()
+                self._generation = self.meta.rewritten()['generation']
+                self._signature = self._file_signature()
+
+
+    # file format specific methods, other formats override them
+
+    @classmethod
+    def create(cls, filename: str, columns: list, delimiter: str = ';'):
+        """Creates empty file with header only"""
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f, delimiter=delimiter, lineterminator='\n').writerow(columns)
+
+    def _read_rows(self, start: int = None):
+        """
+        A generator that returns rows of file in file order
+
+        :param start: offset of first row, None(default) for first row after header
+        """
+        with MappedFile(self.filename, self.delimiter) as mapped:
+            # header is skipped, empty lines are skipped by rows
+            yield from mapped.rows(mapped.header_end() if start is None else start)
+
+    def _row_ids(self, mapped: MappedFile):
+        """
+        A generator that returns raw IDs of all rows in file order,
+        empty for rows without ID. Only ID field is taken from lines, nothing is decoded
+        """
+        for _, line in mapped.lines(mapped.header_end()):
+            yield mapped.first_field(line).strip()
+
+    def _read_ids(self, mapped: MappedFile):
+        """A generator that returns raw IDs of all rows, used to recalculate metadata"""
+        return (record_id for record_id in self._row_ids(mapped) if record_id)
+
+    def _encode_rows(self, rows: list) -> bytes:
+        """Returns bytes that are appended to file to add rows"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=self.delimiter, lineterminator='\n')
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def _appended(self, file_signature: tuple, data: bytes):
+        """Called after rows were appended to file, keeps row offsets up to date"""
+        self.offsets.appended(file_signature, data)
+
+    def _shards(self, mapped: MappedFile, count: int) -> list:
+        """
+        Splits rows of file into about count (start, end) byte ranges,
+        every range starts at the beginning of line
+        """
+        start = mapped.header_end()
+        end = len(mapped)
+        size = (end - start) // count + 1
+
+        bounds = [start]
+        for number in range(1, count):
+            line_end = mapped.data.find(b'\n', start + size * number, end)
+            if line_end == -1:
+                break
+            bounds.append(max(line_end + 1, bounds[-1]))
+        bounds.append(end)
+        return [(first, last) for first, last in zip(bounds, bounds[1:]) if first < last]
+
+    def _scan_range(self, mapped: MappedFile, start: int, end: int, terms: list, touched: set):
+        """
+        Returns (matches, touched) lists of (ID, offset) of rows in byte range,
+        rows with touched IDs are returned regardless of values to be checked by caller
+
+        :param mapped: mapped file
+        :param start: offset of first line of range
+        :param end: offset where range ends
+        :param terms: lowercase search terms
+        :param touched: IDs of rows changed in journal
+        """
+        matches = []
+        changed = []
+        contains = self._contains
+        for offset, line in mapped.lines(start, end):
+            # raw line is checked first, most rows are dropped without parsing
+            text = line.decode('utf-8').lower()
+            if not all(term in text for term in terms):
+                if touched:
+                    record_id = mapped.first_field(line).decode('utf-8').strip()
+                    if record_id in touched:
+                        changed.append((record_id, offset))
+                continue
+
+            row = mapped.row(line)
+            if not row:
+                continue
+            if row[0] in touched:
+                changed.append((row[0], offset))
+            elif contains(row, terms):
+                matches.append((row[0], offset))
+        return matches, changed
+
+    def _row_at(self, mapped: MappedFile, offset: int) -> list:
+        """Returns row of file starting at offset"""
+        return mapped.row(next(mapped.lines(offset))[1])
+
+    def _lazy_count(self) -> int:
+        """Returns count of rows in file without loading them"""
+        self.offsets.ensure()
+        return self.offsets.rows
+
+    def _lazy_rows(self, start: int, count: int) -> list:
+        """Returns rows from start to start + count read straight from file"""
+        with MappedFile(self.filename, self.delimiter) as mapped:
+            lines = self.offsets.read(mapped, start, count)
+            rows = [mapped.row(line) for line in lines]
+        # in case file has empty lines
+        return [row for row in rows if row]
+
+    def _write_temp(self, table: RecordTable) -> str:
+        """
+        Writes alive rows with header to temporary file next to phonebook file
+
+        :param table: table of records to write
+        """
+        temp = f'{self.filename}.{os.getpid()}.tmp'
+        with open(temp, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=self.delimiter, lineterminator='\n')
+            writer.writerow(self.columns)
+            writer.writerows(table.rows())
+        return temp
+
+    def _write_file(self, table: RecordTable):
+        """Rewrites all rows to file, file is replaced atomically"""
+        os.replace(self._write_temp(table), self.filename)
+
+    def _needs_compaction(self) -> bool:
+        return self.journal.size() >= self.compact_threshold
+
+    def _maybe_compact(self):
+        """Starts background compaction when journal passes threshold"""
+        if not self._needs_compaction():
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+
+        self._compaction = threading.Thread(target=self.compact)
+        self._compaction.start()
+
+    def compact(self):
+        """
+        Folds journal into phonebook file.
+        Changes made while file is being written stay in journal,
+        records appended during compaction are carried over to new file
+        """
+        # sizes must match snapshot exactly, so nobody may write while it's taken.
+        # File stays open till the end, so its inode can't be reused by other file
+        with self._lock, FileLock(self.filename, shared=True):
+            self._ensure_loaded()
+            table = self._table.copy()
+            (_, file_size, _), journal = self._signature
+            journal_size = journal[1] if journal else 0
+            source = open(self.filename, 'rb')
+
+        try:
+            # slow part runs without lock on snapshot of table
+            temp = self._write_temp(table)
+
+            with self._lock, FileLock(self.filename):
+                if not os.path.samestat(os.fstat(source.fileno()), os.stat(self.filename)):
+                    # file was compacted or rewritten by other process meanwhile
+                    os.remove(temp)
+                    return
+
+                in_sync = self._signature == self._file_signature()
+
+                # copy records that were appended while rows were written
+                source.seek(file_size)
+                tail = source.read()
+                source.close()
+                if tail:
+                    with open(temp, 'ab') as f:
+                        f.write(tail)
+
+                os.replace(temp, self.filename)
+                self.journal.truncate(journal_size)
+                generation = self.meta.rewritten()['generation']
+
+                # appends of other processes are in file, but not in memory yet
+                if in_sync:
+                    self._signature = self._file_signature()
+                    self._generation = generation
+                else:
+                    self._signature = None
+        finally:
+            source.close()
+
+    def wait_compaction(self):
+        """Blocks until background compaction is finished"""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self):
+        """Finishes pending work and saves indexes and snapshot, should be called before exit"""
+        self.wait_compaction()
+
+        with self._lock:
+            if self.index is not None and self.index.dirty:
+                self.index.save(self.index_filename, self._signature)
+            if self.fuzzy_index is not None and self.fuzzy_index.dirty:
+                self.fuzzy_index.save(self.fuzzy_filename, self._signature)
+            if self.offsets.signature is not None and self.offsets.dirty:
+                self.offsets.save()
+            self._save_snapshot()
+
+
+def _scan_shard(
+    store_class: type,
+    filename: str,
+    columns: list,
+    delimiter: str,
+    shard: tuple,
+    terms: list,
+    touched: set
+) -> tuple:
+    """Scans shard of file in worker process, see RecordStore.scan"""
+    store = store_class(filename, columns, delimiter)
+    with MappedFile(filename, delimiter) as mapped:
+        return store._scan_range(mapped, shard[0], shard[1], terms, touched)
+
+
+class _Batch:
+    def __init__(self, store: RecordStore):
+        """
+        Holds store and file locks, changes made inside batch
+        take locks again without waiting, see FileLock
+
+        :param store: store to lock
+        """
+        self.store = store
+        self.file_lock = FileLock(store.filename)
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        try:
+            self.file_lock.acquire()
+        except BaseException:
+            self.store._lock.release()
+            raise
+        return self.store
+
+    def __exit__(self, *exc):
+        self.file_lock.release()
+        self.store._lock.release()
@@ -0,0 +1,283 @@
+import bisect
+from array import array
+from collections.abc import Mapping
+from itertools import compress
+
+
+class Record(Mapping):
+    __slots__ = ('_columns', '_values')
+
+    def __init__(self, columns: list, values: list):
+        """
+        Read-only record view, behaves like dict of values by columns.
+        Columns list is shared between all records
+
+        :param columns: list of columns
+        :param values: list of values in columns order
+        """
+        self._columns = columns
+        self._values = values
+
+    def __getitem__(self, column):
+        try:
+            return self._values[self._columns.index(column)]
+        except ValueError:
+            raise KeyError(column) from None
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class IntColumn:
+    # markers for values that are not stored in array
+    EMPTY = -1
+    OTHER = -2
+
+    def __init__(self):
+        """
+        Column of digit strings stored as 64-bit integers.
+        Values that can't be restored from integer exactly,
+        e.g. with leading zeros, are kept in separate dict
+        """
+        self.data = array('q')
+        self.other = {}
+
+
+    def encode(self, value: str) -> int:
+        """Returns integer for value or OTHER if value can't be stored as integer"""
+        if not value:
+            return self.EMPTY
+        if value.isdigit() and value.isascii() and len(value) < 19 \
+                and (value[0] != '0' or value == '0'):
+            return int(value)
+        return self.OTHER
+
+    def append(self, value: str):
+        number = self.encode(value)
+        if number == self.OTHER:
+            self.other[len(self.data)] = value
+        self.data.append(number)
+
+    def set(self, position: int, value: str):
+        number = self.encode(value)
+        if number == self.OTHER:
+            self.other[position] = value
+        else:
+            self.other.pop(position, None)
+        self.data[position] = number
+
+    def get(self, position: int) -> str:
+        number = self.data[position]
+        if number >= 0:
+            return str(number)
+        if number == self.EMPTY:
+            return ''
+        return self.other[position]
+
+    def copy(self):
+        column = IntColumn()
+        column.data = array('q', self.data)
+        column.other = dict(self.other)
+        return column
+
+
+class StringColumn:
+    def __init__(self):
+        """
+        Dictionary-encoded column, every distinct value is stored once
+        and rows keep only 32-bit codes of values
+        """
+        self.values = ['']
+        self.codes = {'': 0}
+        self.data = array('I')
+
+
+    def _code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: str):
+        self.data.append(self._code(value))
+
+    def set(self, position: int, value: str):
+        self.data[position] = self._code(value)
+
+    def get(self, position: int) -> str:
+        return self.values[self.data[position]]
+
+    def copy(self):
+        # values are only appended and codes never change,
+        # so copy can share dictionary with original column
+        column = StringColumn()
+        column.values = self.values
+        column.codes = self.codes
+        column.data = array('I', self.data)
+        return column
+
+
+class RecordTable:
+    def __init__(self, columns: list, int_columns: list):
+        """
+        Column-oriented storage of records.
+        First column is record ID, rows are addressed by position,
+        deleted rows are only marked, so positions stay valid
+
+        :param columns: list of columns
+        :param int_columns: positions of columns with digits only values, e.g. phones
+        """
+        self.columns = columns
+        self._columns = [
+            IntColumn() if position == 0 or position in int_columns else StringColumn()
+            for position in range(len(columns))
+        ]
+        self.ids = self._columns[0]
+        self.alive = bytearray()
+        self.deleted = 0
+        # array of positions of alive rows, built for pages when first row is deleted
+        self._alive_positions = None
+
+        # while IDs are appended in ascending order they are found by binary search,
+        # dict of ID to position is built only when order is broken
+        self._positions = None
+        self._last_id = -1
+
+
+    def __len__(self):
+        return len(self.alive) - self.deleted
+
+    @property
+    def size(self) -> int:
+        """Returns count of positions including deleted rows"""
+        return len(self.alive)
+
+    def append(self, row: list) -> int:
+        """Adds row, returns its position"""
+        position = len(self.alive)
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self.alive.append(1)
+        if self._alive_positions is not None:
+            self._alive_positions.append(position)
+
+        number = self.ids.data[position]
+        if self._positions is not None:
+            # first record wins when file has duplicated IDs
+            self._positions.setdefault(row[0], position)
+        elif number < self._last_id or number < 0:
+            self._build_positions()
+        else:
+            self._last_id = number
+        return position
+
+    def _build_positions(self):
+        self._positions = {}
+        for position in range(len(self.alive)):
+            if self.alive[position]:
+                self._positions.setdefault(self.ids.get(position), position)
+
+    def find(self, record_id: str) -> int:
+        """Returns position of alive record with passed ID or None"""
+        if self._positions is not None:
+            return self._positions.get(record_id)
+
+        number = self.ids.encode(record_id)
+        if number < 0:
+            return None
+
+        data = self.ids.data
+        position = bisect.bisect_left(data, number)
+        while position < len(data) and data[position] == number:
+            if self.alive[position]:
+                return position
+            position += 1
+        return None
+
+    def row(self, position: int) -> list:
+        """Returns list of values of row"""
+        return [column.get(position) for column in self._columns]
+
+    def get(self, position: int, column: int) -> str:
+        """Returns single value of row, used when other values are not needed"""
+        return self._columns[column].get(position)
+
+    def ranks(self, column: int, key) -> list:
+        """
+        Returns list of ranks of values of string column by positions:
+        values are ranked by key, values with same key get same rank.
+        Key is computed once for every distinct value, so rows are sorted
+        by ranks much faster than by keys of values
+
+        :param column: position of string column
+        :param key: function that returns sort key of value
+        """
+        column = self._columns[column]
+        keys = [key(value) for value in column.values]
+        ranks = [0] * len(keys)
+        rank, previous = -1, None
+        for code in sorted(range(len(keys)), key=keys.__getitem__):
+            if keys[code] != previous:
+                rank, previous = rank + 1, keys[code]
+            ranks[code] = rank
+        return [ranks[code] for code in column.data]
+
+    def set_row(self, position: int, row: list):
+        """Replaces values of row, ID is not changed"""
+        for column, value in zip(self._columns[1:], row[1:]):
+            column.set(position, value)
+
+    def delete(self, position: int):
+        self.alive[position] = 0
+        self.deleted += 1
+        if self._alive_positions is not None:
+            place = bisect.bisect_left(self._alive_positions, position)
+            del self._alive_positions[place]
+        if self._positions is not None:
+            self._positions.pop(self.ids.get(position), None)
+
+    def positions(self, start: int, count: int) -> list:
+        """
+        Returns positions of alive rows from start to start + count in file order.
+        While nothing is deleted number of row is its position,
+        otherwise positions are taken from array of alive positions
+
+        :param start: number of first alive row, starting from 0
+        :param count: count of rows
+        """
+        if not self.deleted:
+            return list(range(start, min(start + count, len(self.alive))))
+        if self._alive_positions is None:
+            self._alive_positions = array('q', compress(range(len(self.alive)), self.alive))
+        return self._alive_positions[start:start + count].tolist()
+
+    def rows(self):
+        """A generator that returns lists of values of alive rows in file order"""
+        alive = self.alive
+        for position in range(len(alive)):
+            if alive[position]:
+                yield self.row(position)
+
+    def record(self, position: int) -> Record:
+        return Record(self.columns, self.row(position))
+
+    def copy(self):
+        """Returns copy of table, used as snapshot by background compaction"""
+        table = RecordTable.__new__(RecordTable)
+        table.columns = self.columns
+        table._columns = [column.copy() for column in self._columns]
+        table.ids = table._columns[0]
+        table.alive = bytearray(self.alive)
+        table.deleted = self.deleted
+        table._positions = None if self._positions is None else dict(self._positions)
+        table._alive_positions = None if self._alive_positions is None \
+            else array('q', self._alive_positions)
+        table._last_id = self._last_id
+        return table
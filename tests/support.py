@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from storage import create_file, open_store
+
+
+COLUMNS = ['ИД', 'Имя', 'Фамилия', 'Отчество', 'Компания', 'Рабочий номер', 'Личный номер']
+
+
+def make_records(count: int, start: int = 0) -> list:
+    """Returns list of records without IDs, values contain delimiter and quotes"""
+    return [
+        {
+            'Имя': f'Имя{number}',
+            'Фамилия': f'Фамилия "{number}"',
+            'Отчество': '' if number % 3 else f'Отчество{number}',
+            'Компания': f'ООО Рога; и копыта {number % 7}',
+            'Рабочий номер': f'7495{number:07d}',
+            'Личный номер': '' if number % 2 else f'7916{number:07d}',
+        }
+        for number in range(start, start + count)
+    ]
+
+
+def record(**values) -> dict:
+    """Returns record without ID, values are passed by latin names of columns"""
+    names = {
+        'first_name': 'Имя', 'surname': 'Фамилия', 'patronymic': 'Отчество',
+        'company': 'Компания', 'work': 'Рабочий номер', 'mobile': 'Личный номер',
+    }
+    return {column: values.get(name, '') for name, column in names.items()}
+
+
+class StoreTestCase(unittest.TestCase):
+    """Test case with temporary folder for phonebook files"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def new_store(self, name: str, records: list = ()):
+        """Creates phonebook file with records and returns opened store"""
+        filename = self.path(name)
+        create_file(filename, COLUMNS)
+        store = open_store(filename, COLUMNS)
+        self.addCleanup(store.close)
+        if records:
+            store.add_many(list(records))
+        return store
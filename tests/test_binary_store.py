@@ -0,0 +1,53 @@
+import unittest
+
+from binary_store import BinaryStore
+from storage import convert
+from tests.support import COLUMNS, StoreTestCase, make_records
+
+
+class BinaryStoreTest(StoreTestCase):
+    def write_csv(self, name: str, ids: list) -> str:
+        """Writes csv file with records of passed IDs, returns its path"""
+        filename = self.path(name)
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(';'.join(COLUMNS) + '\n')
+            for record_id in ids:
+                f.write(f'{record_id};Имя{record_id};;;;;\n')
+        return filename
+
+    def test_get_reads_single_record(self):
+        store = self.new_store('phonebook.pbk', make_records(100))
+        store.close()
+
+        reopened = BinaryStore(store.filename, COLUMNS)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get('42')['Имя'], 'Имя41')
+        self.assertIsNone(reopened.get('1000'))
+        # found in ID index, records are not loaded
+        self.assertIsNone(reopened._signature)
+
+    def test_ids_with_leading_zeros(self):
+        source = self.write_csv('phonebook.csv', ['7', '007', 'abc'])
+        convert(source, self.path('phonebook.pbk'), COLUMNS)
+
+        store = BinaryStore(self.path('phonebook.pbk'), COLUMNS)
+        self.addCleanup(store.close)
+        self.assertEqual(store.get('7')['Имя'], 'Имя7')
+        self.assertEqual(store.get('007')['Имя'], 'Имя007')
+        self.assertEqual(store.get('abc')['Имя'], 'Имяabc')
+        self.assertIsNone(store.get('07'))
+
+    def test_appended_records_before_compaction(self):
+        store = self.new_store('phonebook.pbk', make_records(10))
+        store.compact()
+        store.add_many(make_records(2, 10))
+        store.close()
+
+        reopened = BinaryStore(store.filename, COLUMNS)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get('12')['Имя'], 'Имя11')
+        self.assertEqual(reopened.count(), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
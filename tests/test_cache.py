@@ -0,0 +1,67 @@
+import unittest
+
+from cache import LRUCache
+from phonebook import Phonebook
+from storage import open_store
+from tests.support import COLUMNS, StoreTestCase, record
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(2)
+        self.assertEqual(cache.get('a', lambda: 1), 1)
+        self.assertEqual(cache.get('b', lambda: 2), 2)
+        # cached value is returned, compute isn't called
+        self.assertEqual(cache.get('a', lambda: 10), 1)
+        # "b" was used least recently, so it's dropped
+        cache.get('c', lambda: 3)
+        self.assertEqual(cache.get('b', lambda: 20), 20)
+        self.assertEqual(cache.get('a', lambda: 100), 100)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats(), {'size': 2, 'max_size': 2, 'hits': 1, 'misses': 5, 'hit_rate': 0.167})
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()['misses'], 5)
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        self.assertEqual(cache.get('a', lambda: 1), 1)
+        self.assertEqual(cache.get('a', lambda: 2), 2)
+        self.assertEqual(cache.stats()['hit_rate'], 0.0)
+
+
+class PhonebookCacheTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.new_store('phonebook.csv', [record(first_name='Анна', surname='Смирнова')]).close()
+        self.phonebook = Phonebook(self.path('phonebook.csv'), COLUMNS)
+        self.addCleanup(self.phonebook.store.close)
+
+    def search(self, query: str) -> list:
+        return self.phonebook._cached(('search', query), lambda: self.phonebook.store.search(query))
+
+    def test_changes_make_results_stale(self):
+        self.assertEqual(len(self.search('смир')), 1)
+        self.search('смир')
+        self.assertEqual(self.phonebook.cache.hits, 1)
+
+        self.phonebook.create_record(record(first_name='Иван', surname='Смирнов'))
+        self.assertEqual(len(self.phonebook.cache), 0)
+        self.assertEqual(len(self.search('смир')), 2)
+        self.assertEqual(self.phonebook.cache.hits, 1)
+
+    def test_changes_of_other_process(self):
+        self.assertEqual(len(self.search('смир')), 1)
+
+        other = open_store(self.path('phonebook.csv'), COLUMNS)
+        self.addCleanup(other.close)
+        other.add(record(first_name='Иван', surname='Смирнов'))
+
+        # generation isn't changed, but state of store is
+        self.assertEqual(len(self.search('смир')), 2)
+        self.assertEqual(self.phonebook.cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import io
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from commands import parse_command, run_command
+from tests.support import COLUMNS, StoreTestCase, record
+
+
+class CommandsTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.new_store('phonebook.csv', [record(first_name='Анна'), record(first_name='Иван')]).close()
+
+    def run_command(self, *args) -> tuple:
+        """Returns (exit code, stdout, stderr) of command"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = run_command(parse_command(list(args)), self.path('phonebook.csv'), COLUMNS)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_get(self):
+        code, stdout, stderr = self.run_command('get', '2', '--format', 'jsonl')
+        self.assertEqual(code, 0)
+        self.assertIn('"Иван"', stdout)
+        self.assertEqual(stderr, '')
+
+    def test_get_missing(self):
+        code, stdout, stderr = self.run_command('get', '1', '7', '9', '--format', 'jsonl')
+        self.assertEqual(code, 1)
+        self.assertEqual(len(stdout.splitlines()), 1)
+        self.assertEqual(stderr, 'Записи не найдены: 7, 9\n')
+
+    def test_delete_missing(self):
+        code, stdout, stderr = self.run_command('delete', '1', '7')
+        self.assertEqual(code, 1)
+        self.assertEqual(stderr, 'Записи не найдены: 7\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
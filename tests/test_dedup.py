@@ -0,0 +1,98 @@
+import unittest
+
+import dedup
+from base_store import ConflictError
+from dedup import Deduplicator
+from phonebook import Phonebook
+from tests.support import COLUMNS, StoreTestCase, record
+
+
+class DedupTest(StoreTestCase):
+    def new_phonebook(self, records: list) -> Phonebook:
+        self.new_store('phonebook.csv', records).close()
+        phonebook = Phonebook(self.path('phonebook.csv'), COLUMNS)
+        self.addCleanup(phonebook.store.close)
+        return phonebook
+
+    @staticmethod
+    def ids(groups: list) -> list:
+        return [[found['ИД'] for found in group] for group in groups]
+
+    def test_groups(self):
+        phonebook = self.new_phonebook([
+            record(first_name='Иван', surname='Петров', mobile='+7 916 123-45-67'),
+            # swapped names with typo and 8 instead of 7
+            record(first_name='Петрова', surname='Иван', work='89161234567', company='Рога'),
+            # namesake with other number
+            record(first_name='Иван', surname='Петров', mobile='79160000000'),
+            record(first_name='Ivan', surname='Petrov', company='Рога'),
+            record(first_name='Анна', surname='Сидорова', patronymic='Ивановна'),
+            record(first_name='Анна', surname='Сидорова'),
+        ])
+        self.assertEqual(self.ids(Deduplicator(phonebook).groups()), [['1', '2', '4']])
+
+    def test_apply_merges_into_oldest_record(self):
+        phonebook = self.new_phonebook([
+            record(first_name='Иван', surname='Петров', mobile='79161234567'),
+            record(first_name='Иван', surname='Петров', patronymic='Сергеевич', mobile='79161234567'),
+            record(first_name='Анна', surname='Сидорова', company='Рога', work='74951112233'),
+            record(first_name='Анна', surname='Сидорова', company='Рога'),
+        ])
+        deduplicator = Deduplicator(phonebook)
+        groups = deduplicator.groups()
+        self.assertEqual(self.ids(groups), [['1', '2'], ['3', '4']])
+
+        self.assertEqual(deduplicator.apply(groups), (2, 2, 0))
+        store = phonebook.store
+        self.assertEqual([found['ИД'] for found in store.records()], ['1', '3'])
+        self.assertEqual(store.get('1')['Отчество'], 'Сергеевич')
+        # changes of all groups were written with single journal append
+        with open(store.journal.filename, encoding='utf-8') as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+    def test_changed_group_is_skipped(self):
+        phonebook = self.new_phonebook([
+            record(first_name='Иван', surname='Петров', mobile='79161234567'),
+            record(first_name='Иван', surname='Петров', mobile='79161234567'),
+        ])
+        deduplicator = Deduplicator(phonebook)
+        groups = deduplicator.groups()
+        phonebook.store.update('2', {'Компания': 'Рога'})
+
+        self.assertEqual(deduplicator.apply(groups), (0, 0, 1))
+        self.assertEqual(phonebook.store.count(), 2)
+
+    def test_big_blocks_are_split(self):
+        # switchboard number is shared by many people, pair differs by typo in surname,
+        # so they share only block of number
+        surnames = ['Андреев', 'Борисов', 'Васильев', 'Григорьев', 'Дмитриев', 'Егоров',
+                    'Козлов', 'Кузнецов', 'Ковалев', 'Карпов', 'Киселев', 'Комаров']
+        records = [record(first_name='Олег', surname=surname, work='74950000000') for surname in surnames]
+        records.append(record(first_name='Иван', surname='Иванов', work='74950000000'))
+        records.append(record(first_name='Иван', surname='Иваноф', work='74950000000'))
+        phonebook = self.new_phonebook(records)
+
+        original = dedup.MAX_BLOCK
+        self.addCleanup(setattr, dedup, 'MAX_BLOCK', original)
+        deduplicator = Deduplicator(phonebook)
+
+        dedup.MAX_BLOCK = 10
+        self.assertEqual(self.ids(deduplicator.groups()), [['13', '14']])
+        self.assertEqual(deduplicator.skipped_blocks, [])
+
+        # people with same initials are still too many, they are reported
+        dedup.MAX_BLOCK = 5
+        self.assertEqual(self.ids(deduplicator.groups()), [['13', '14']])
+        self.assertEqual(deduplicator.skipped_blocks, [6])
+
+    def test_change_many_checks_versions_first(self):
+        store = self.new_store('phonebook.db', [record(first_name='Иван'), record(first_name='Анна')])
+        with self.assertRaises(ConflictError):
+            store.change_many([('1', None, None), ('2', {'Имя': 'Ольга'}, 12345)])
+        self.assertEqual(store.count(), 2)
+        self.assertEqual(store.change_many([('1', None, None), ('2', {'Имя': 'Ольга'}, None)]), 2)
+        self.assertEqual([found['Имя'] for found in store.records()], ['Ольга'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import gzip
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from exporter import export_records
+from tests.support import StoreTestCase, record
+
+
+class ExportTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = self.new_store('phonebook.csv', [
+            record(first_name='Анна', surname='Смирнова', company='Рога; и копыта', work='74951234567'),
+            record(first_name='Иван', surname='Иванов', mobile='79161234567'),
+            record(first_name='Петр', surname='Смирнов'),
+        ])
+
+    def export(self, **options) -> str:
+        output = self.path('export.txt')
+        export_records(self.store, output, **options)
+        with open(output, encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def test_csv_with_fields(self):
+        self.assertEqual(
+            self.export(fields=['Фамилия', 'Компания']),
+            'Фамилия;Компания\nСмирнова;"Рога; и копыта"\nИванов;\nСмирнов;\n'
+        )
+
+    def test_jsonl(self):
+        lines = self.export(output_format='jsonl', fields=['ИД', 'Имя']).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'ИД': '1', 'Имя': 'Анна'}, {'ИД': '2', 'Имя': 'Иван'}, {'ИД': '3', 'Имя': 'Петр'},
+        ])
+
+    def test_vcard(self):
+        cards = self.export(output_format='vcard', query='Анна').split('END:VCARD\r\n')
+        self.assertEqual(len(cards), 2)
+        self.assertIn('N:Смирнова;Анна;;;\r\n', cards[0])
+        self.assertIn('ORG:Рога\\; и копыта\r\n', cards[0])
+        self.assertIn('TEL;TYPE=WORK,VOICE:74951234567\r\n', cards[0])
+        self.assertIn('UID:1\r\n', cards[0])
+
+    def test_query_like_search(self):
+        self.assertEqual(self.export(query='смирн', fields=['ИД']), 'ИД\n1\n3\n')
+        self.assertEqual(self.export(query='смирн петр', fields=['ИД']), 'ИД\n3\n')
+        # index finds nothing, terms are looked for in any part of words
+        self.assertEqual(self.export(query='мирн', fields=['ИД']), 'ИД\n1\n3\n')
+        self.assertEqual(self.export(query='мирн', fields=['ИД'], substring=True), 'ИД\n1\n3\n')
+        self.assertEqual(self.export(query='нет такого', fields=['ИД']), 'ИД\n')
+
+    def test_gzip(self):
+        output = self.path('export.csv.gz')
+        self.assertEqual(export_records(self.store, output, fields=['Имя']), 3)
+        with gzip.open(output, 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'Имя\nАнна\nИван\nПетр\n')
+
+    def test_stdout(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.assertEqual(export_records(self.store, query='иван', fields=['ИД']), 1)
+        self.assertEqual(stdout.getvalue(), 'ИД\n2\n')
+
+    def test_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            export_records(self.store, self.path('export.csv'), fields=['Имя', 'Город'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from fuzzy_index import TrigramIndex, distance, normalize
+from tests.support import StoreTestCase, record
+
+
+class DistanceTest(unittest.TestCase):
+    def test_distance(self):
+        self.assertEqual(distance('ivanov', 'ivanov', 2), 0)
+        # swap of neighbour letters is single typo
+        self.assertEqual(distance('ivnaov', 'ivanov', 2), 1)
+        self.assertEqual(distance('ivanv', 'ivanov', 2), 1)
+        self.assertEqual(distance('petrov', 'sidorov', 2), 3)
+        self.assertEqual(distance('ab', 'abcdef', 2), 3)
+
+    def test_normalize(self):
+        self.assertEqual(normalize('Щукин'), 'shchukin')
+        self.assertEqual(normalize('Maxwell'), 'maksvell')
+
+
+class TrigramIndexTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = TrigramIndex.build([
+            ('1', ['Иван', 'Иванов', '']),
+            ('2', ['Анна', 'Смирнова', 'Рога и копыта']),
+            ('3', ['Ivan', 'Petrov', '']),
+            ('4', ['Иван', 'Ивановский', '']),
+        ])
+
+    def ids(self, query: str) -> list:
+        return [record_id for record_id, _ in self.index.search(query)]
+
+    def test_typos_and_transliteration(self):
+        self.assertEqual(self.ids('Ivnaov'), ['1'])
+        self.assertEqual(self.ids('смирнвоа'), ['2'])
+        self.assertEqual(self.ids('Петроф'), ['3'])
+        self.assertEqual(self.ids('ivanovski'), ['4'])
+        # short words must be written without typos
+        self.assertEqual(sorted(self.ids('Иван')), ['1', '3', '4'])
+        self.assertEqual(self.ids('Ива'), [])
+
+    def test_every_word_and_ranking(self):
+        self.assertEqual(self.ids('иван петрво'), ['3'])
+        self.assertEqual(self.ids('анна сидорова'), [])
+        # exact word goes before one with typo
+        index = TrigramIndex.build([('1', ['Иваном']), ('2', ['Иванов'])])
+        ranked = index.search('иванов')
+        self.assertEqual([record_id for record_id, _ in ranked], ['2', '1'])
+        self.assertEqual(ranked[0][1], 1.0)
+        self.assertEqual(len(index.search('иванов', limit=1)), 1)
+
+    def test_changes_and_saving(self):
+        self.index.update('1', ['Иван', 'Иванов', ''], ['Иван', 'Кузнецов', ''])
+        self.assertEqual(self.ids('ivanov'), [])
+        self.assertEqual(self.ids('кузнетсов'), ['1'])
+        self.index.remove('2', ['Анна', 'Смирнова', 'Рога и копыта'])
+        self.assertEqual(self.ids('смирнова'), [])
+
+        filename = self.path('fuzzy.idx')
+        self.index.save(filename, 'signature')
+        self.assertIsNone(TrigramIndex.load(filename, 'other'))
+        self.assertEqual(TrigramIndex.load(filename, 'signature').search('kuznetsov'), self.index.search('kuznetsov'))
+
+
+class StoreFuzzySearchTest(StoreTestCase):
+    def test_fuzzy_search(self):
+        for extension in ['csv', 'pbk', 'db']:
+            with self.subTest(extension=extension):
+                store = self.new_store(f'phonebook.{extension}', [
+                    record(first_name='Иван', surname='Иваном'),
+                    record(first_name='Иван', surname='Иванов'),
+                    record(first_name='Анна', surname='Смирнова', company='Рога и копыта'),
+                    record(first_name='Иван', surname='Иванов'),
+                ])
+                self.assertEqual([found['ИД'] for found in store.fuzzy_search('Ivanov')], ['2', '4', '1'])
+                self.assertEqual([found['ИД'] for found in store.fuzzy_search('ivanov', 2)], ['2', '4'])
+                self.assertEqual(store.fuzzy_search('копита')[0]['Фамилия'], 'Смирнова')
+
+                store.update('2', {'Фамилия': 'Петров'})
+                store.delete('4')
+                self.assertEqual([found['ИД'] for found in store.fuzzy_search('Ivanov')], ['1'])
+                self.assertEqual([found['ИД'] for found in store.fuzzy_search('петроф')], ['2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
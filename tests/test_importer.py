@@ -0,0 +1,79 @@
+import csv
+import json
+import unittest
+
+from importer import BulkImporter, read_records
+from phonebook import Phonebook
+from tests.support import COLUMNS, StoreTestCase
+
+
+class ImporterTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.new_store('phonebook.csv').close()
+        self.phonebook = Phonebook(self.path('phonebook.csv'), COLUMNS)
+        self.addCleanup(self.phonebook.store.close)
+
+    def write(self, name: str, text: str) -> str:
+        filename = self.path(name)
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return filename
+
+    def report(self, source: str) -> list:
+        with open(source + '.rejected.csv', encoding='utf-8', newline='') as f:
+            return [(row['Строка'], row['Ошибка']) for row in csv.DictReader(f, delimiter=';')]
+
+    def test_jsonl(self):
+        lines = [
+            json.dumps({'Имя': 'Анна', 'Личный номер': '79161234567'}, ensure_ascii=False),
+            '{"Имя": "Иван"',
+            '["Иван"]',
+            json.dumps({'Имя': 'Петр', 'Город': 'Москва'}, ensure_ascii=False),
+            json.dumps({'Имя': ''}),
+            '',
+            json.dumps({'Имя': 'Ольга', 'Фамилия': 'Смирнова'}, ensure_ascii=False),
+        ]
+        source = self.write('import.jsonl', '\n'.join(lines) + '\n')
+
+        self.assertEqual(BulkImporter(self.phonebook, batch_size=2).run(source), (2, 4))
+        self.assertEqual([found['Имя'] for found in self.phonebook.store.records()], ['Анна', 'Ольга'])
+        report = self.report(source)
+        self.assertEqual([line for line, error in report], [lines[1], lines[2], lines[3], lines[4]])
+        self.assertEqual([error for line, error in report][:2], ['Некорректный JSON', 'Строка не является объектом'])
+        self.assertEqual(report[3][1], 'Пустая запись')
+
+    def test_csv(self):
+        source = self.write('import.csv', (
+            'Имя;Фамилия;Компания\n'
+            'Анна;Смирнова;"Рога и ""Копыта"""\n'
+            '\n'
+            ';;\n'
+            'Петр;Петров;"Рога;\nи копыта"\n'
+            'Иван;Иванов;Рога;лишнее\n'
+        ))
+
+        self.assertEqual(BulkImporter(self.phonebook).run(source), (1, 3))
+        self.assertEqual(self.phonebook.store.get('1')['Компания'], 'Рога и "Копыта"')
+        self.assertEqual(self.report(source), [
+            (';;', 'Пустая запись'),
+            ('Петр;Петров;"Рога;\nи копыта"', 'Компания'),
+            ('Иван;Иванов;Рога;лишнее', 'Лишние значения в строке'),
+        ])
+
+    def test_unknown_header(self):
+        source = self.write('import.csv', 'Имя;Город\nАнна;Москва\n')
+        with self.assertRaises(ValueError) as raised:
+            BulkImporter(self.phonebook).run(source)
+        self.assertEqual(str(raised.exception), 'Город')
+        self.assertEqual(self.phonebook.store.count(), 0)
+
+    def test_read_records(self):
+        source = self.write('import.csv', 'Имя;Фамилия\r\nАнна;Смирнова\r\n')
+        self.assertEqual(list(read_records(source, COLUMNS)), [
+            ({'Имя': 'Анна', 'Фамилия': 'Смирнова'}, 'Анна;Смирнова', None),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import unittest
+import multiprocessing
+
+import store as store_module
+from journal import Journal
+from store import RecordStore
+from tests.support import COLUMNS, StoreTestCase, make_records
+
+
+def _crash_compaction(filename: str, stage: str):
+    """
+    Changes records through journal and kills process in the middle of compaction,
+    runs in child process
+
+    :param filename: path to phonebook file
+    :param stage: "replace" to die before new file replaces old one,
+        "truncate" to die after that, before journal is truncated
+    """
+    store = RecordStore(filename, COLUMNS)
+    store.update('1', {'Имя': 'Измененное'})
+    store.delete('2')
+    store.add_many(make_records(1, 100))
+
+    if stage == 'replace':
+        replace = os.replace
+
+        def crash(source, target):
+            if target == filename:
+                os._exit(3)
+            replace(source, target)
+
+        store_module.os.replace = crash
+    else:
+        Journal.truncate = lambda self, offset=None: os._exit(3)
+    store.compact()
+
+
+class JournalTest(StoreTestCase):
+    def test_partial_line_is_skipped(self):
+        journal = Journal(self.path('phonebook.csv'))
+        journal.update('1', {'Имя': 'Иван'})
+        # process was killed while it was writing entry
+        with open(journal.filename, 'ab') as f:
+            f.write(b'{"op": "delete", "id"')
+        journal.delete('2')
+
+        self.assertEqual(list(journal.entries()), [
+            {'op': 'update', 'id': '1', 'fields': {'Имя': 'Иван'}},
+            {'op': 'delete', 'id': '2'},
+        ])
+
+    def test_changes_are_replayed_on_load(self):
+        store = self.new_store('phonebook.csv', make_records(3))
+        store.update('1', {'Имя': 'Измененное'})
+        store.delete('3')
+
+        reopened = RecordStore(store.filename, COLUMNS)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.records(), store.records())
+        self.assertEqual([record['ИД'] for record in reopened.records()], ['1', '2'])
+
+
+class CompactionCrashTest(StoreTestCase):
+    def check_crash(self, stage: str):
+        filename = self.path('phonebook.csv')
+        self.new_store('phonebook.csv', make_records(10)).close()
+
+        process = multiprocessing.Process(target=_crash_compaction, args=(filename, stage))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 3)
+
+        store = RecordStore(filename, COLUMNS)
+        self.addCleanup(store.close)
+        self.assertEqual(store.get('1')['Имя'], 'Измененное')
+        self.assertIsNone(store.get('2'))
+        self.assertEqual(store.get('11')['Имя'], 'Имя100')
+        self.assertEqual(store.count(), 10)
+
+        # next compaction finishes the job, nothing is lost or applied twice
+        store.compact()
+        reopened = RecordStore(filename, COLUMNS)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.records(), store.records())
+        self.assertEqual(reopened.add(make_records(1)[0])['ИД'], '12')
+
+    def test_crash_before_file_is_replaced(self):
+        self.check_crash('replace')
+
+    def test_crash_before_journal_is_truncated(self):
+        self.check_crash('truncate')
+
+
+if __name__ == '__main__':
+    unittest.main()
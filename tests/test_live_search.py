@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+
+from live_search import LiveSearch
+from tests.support import StoreTestCase, record
+
+
+class LiveSearchTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = self.new_store('phonebook.csv', [
+            record(first_name='Анна', surname='Смирнова', company='Рога'),
+            record(first_name='Иван', surname='Смирнов'),
+            record(first_name='Иван', surname='Иванов', company='Рога'),
+            record(first_name='Петр', surname='Смирнитский'),
+        ])
+
+    def typed(self, live: LiveSearch, query: str) -> list:
+        """Types query letter by letter, returns sorted IDs found for every prefix"""
+        return [sorted(live.search(query[:length])) for length in range(1, len(query) + 1)]
+
+    def test_narrowing(self):
+        for filter_limit in [0, 100]:
+            with self.subTest(filter_limit=filter_limit):
+                live = LiveSearch(self.store, filter_limit)
+                with mock.patch.object(self.store, 'search_ids', wraps=self.store.search_ids) as search_ids:
+                    self.assertEqual(self.typed(live, 'смирн ив'), [
+                        ['1', '2', '4'], ['1', '2', '4'], ['1', '2', '4'], ['1', '2', '4'], ['1', '2', '4'],
+                        ['1', '2', '4'], ['2'], ['2'],
+                    ])
+                # store is searched once, then previous results are narrowed
+                # by checking records or by index results of new terms, space adds no terms
+                calls = [call.args[0] for call in search_ids.call_args_list]
+                self.assertEqual(calls[0], 'с')
+                self.assertEqual(calls[1:], [] if filter_limit else ['см', 'сми', 'смир', 'смирн', 'и', 'ив'])
+
+    def test_erasing_letters(self):
+        live = LiveSearch(self.store)
+        self.typed(live, 'смирнов рога')
+        with mock.patch.object(self.store, 'search_ids') as search_ids:
+            self.assertEqual(live.search('смирнов рог'), {'1'})
+            self.assertEqual(live.search('смирнов'), {'1', '2'})
+            self.assertEqual(live.search('смир'), {'1', '2', '4'})
+        search_ids.assert_not_called()
+
+        # other query searches store again
+        self.assertEqual(live.search('иван'), {'2', '3'})
+        self.assertEqual(live.search(''), set())
+
+    def test_first(self):
+        self.store.add_many([record(first_name='Иван', surname='Смирнов') for _ in range(10)])
+        live = LiveSearch(self.store)
+        ids = live.search('смирнов')
+        self.assertEqual(len(ids), 12)
+        # IDs are in numeric order, not as strings
+        self.assertEqual([found['ИД'] for found in live.first(ids, 4)], ['1', '2', '5', '6'])
+        self.store.delete('2')
+        self.assertEqual([found['ИД'] for found in live.first(ids, 2)], ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
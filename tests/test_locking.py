@@ -0,0 +1,75 @@
+import unittest
+import multiprocessing
+
+from base_store import ConflictError
+from storage import open_store
+from store import RecordStore
+from tests.support import COLUMNS, StoreTestCase, make_records
+
+
+def _add_records(filename: str, start: int, count: int, batch: int):
+    """Adds records in several appends, runs in child process"""
+    store = RecordStore(filename, COLUMNS)
+    for offset in range(0, count, batch):
+        store.add_many(make_records(min(batch, count - offset), start + offset))
+    store.close()
+
+
+class ConcurrentAppendTest(StoreTestCase):
+    def test_appends_get_unique_ids(self):
+        filename = self.path('phonebook.csv')
+        self.new_store('phonebook.csv').close()
+
+        processes = [
+            multiprocessing.Process(target=_add_records, args=(filename, number * 1000, 200, 7))
+            for number in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        store = RecordStore(filename, COLUMNS)
+        self.addCleanup(store.close)
+        ids = [record['ИД'] for record in store.records()]
+        self.assertEqual(len(ids), 800)
+        self.assertEqual(sorted(ids, key=int), [str(number) for number in range(1, 801)])
+        self.assertEqual(len({record['Имя'] for record in store.records()}), 800)
+
+    def test_other_store_sees_changes(self):
+        store = self.new_store('phonebook.csv', make_records(2))
+        other = RecordStore(store.filename, COLUMNS)
+        self.addCleanup(other.close)
+        self.assertEqual(other.count(), 2)
+
+        store.add_many(make_records(1, 10))
+        store.update('1', {'Имя': 'Другое'})
+        store.delete('2')
+        self.assertEqual(other.records(), store.records())
+
+
+class ConflictTest(StoreTestCase):
+    def test_stale_version(self):
+        for extension in ['csv', 'pbk', 'db']:
+            with self.subTest(extension=extension):
+                store = self.new_store(f'phonebook.{extension}', make_records(3))
+                other = open_store(store.filename, COLUMNS)
+                self.addCleanup(other.close)
+
+                record = store.get('1')
+                version = store.version(record)
+                self.assertTrue(other.update('1', {'Имя': 'Другое'}))
+
+                with self.assertRaises(ConflictError):
+                    store.update('1', {'Фамилия': 'Новая'}, version)
+                with self.assertRaises(ConflictError):
+                    store.delete('1', version)
+
+                # nothing was changed by rejected calls
+                self.assertEqual(store.get('1'), {**record, 'Имя': 'Другое'})
+                self.assertTrue(store.update('1', {'Фамилия': 'Новая'}, other.version(other.get('1'))))
+
+
+if __name__ == '__main__':
+    unittest.main()
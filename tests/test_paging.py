@@ -0,0 +1,88 @@
+import unittest
+
+from mapped import MappedFile
+from offsets import OffsetIndex
+from storage import open_store
+from table import RecordTable
+from tests.support import COLUMNS, StoreTestCase, make_records
+
+
+class OffsetIndexTest(StoreTestCase):
+    def test_read(self):
+        store = self.new_store('phonebook.csv', make_records(25))
+        store.close()
+
+        index = OffsetIndex(store.filename, stride=4)
+        with MappedFile(store.filename) as mapped:
+            lines = index.read(mapped, 9, 3)
+            self.assertEqual([line.split(b';')[0] for line in lines], [b'10', b'11', b'12'])
+            self.assertEqual(len(index.read(mapped, 23, 10)), 2)
+            self.assertEqual(index.read(mapped, 25, 10), [])
+        self.assertEqual(index.rows, 25)
+        self.assertEqual(len(index.offsets), 7)
+
+    def test_saved_index_is_used(self):
+        store = self.new_store('phonebook.csv', make_records(10))
+        store.close()
+        index = OffsetIndex(store.filename, stride=4)
+        index.ensure()
+        index.save()
+
+        loaded = OffsetIndex(store.filename, stride=4)
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.offsets, index.offsets)
+
+
+class PageTest(StoreTestCase):
+    def pages(self, store) -> list:
+        return [store.page(start, 7) for start in range(0, store.count() + 7, 7)]
+
+    def test_lazy_pages_after_deletes(self):
+        for extension in ['csv', 'pbk']:
+            with self.subTest(extension=extension):
+                store = self.new_store(f'phonebook.{extension}', make_records(50))
+                for record_id in ['1', '2', '8', '20', '21', '50']:
+                    store.delete(record_id)
+                store.update('9', {'Имя': 'Измененное'})
+                store.add_many(make_records(3, 100))
+                expected = self.pages(store)
+                store.close()
+
+                lazy = open_store(store.filename, COLUMNS)
+                self.addCleanup(lazy.close)
+                self.assertEqual(lazy.count(), 47)
+                self.assertEqual(self.pages(lazy), expected)
+                self.assertEqual(lazy.page(5, 1)[0]['Имя'], 'Измененное')
+                # pages were read straight from file
+                self.assertIsNone(lazy._signature)
+
+    def test_loaded_pages(self):
+        store = self.new_store('phonebook.csv', make_records(20))
+        store.records()
+        self.assertEqual([record['ИД'] for record in store.page(18, 5)], ['19', '20'])
+
+        store.delete('3')
+        store.delete('19')
+        self.assertEqual([record['ИД'] for record in store.page(1, 3)], ['2', '4', '5'])
+        store.add_many(make_records(1))
+        store.delete('5')
+        self.assertEqual([record['ИД'] for record in store.page(15, 5)], ['18', '20', '21'])
+
+
+class TablePositionsTest(unittest.TestCase):
+    def test_positions(self):
+        table = RecordTable(COLUMNS, [0])
+        for number in range(10):
+            table.append([str(number + 1)] + [''] * 6)
+        self.assertEqual(table.positions(8, 5), [8, 9])
+
+        table.delete(2)
+        self.assertEqual(table.positions(1, 3), [1, 3, 4])
+        table.delete(4)
+        table.append(['11'] + [''] * 6)
+        self.assertEqual(table.positions(5, 10), [7, 8, 9, 10])
+        self.assertEqual(table.copy().positions(0, 3), [0, 1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
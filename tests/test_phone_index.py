@@ -0,0 +1,77 @@
+import sqlite3
+import unittest
+
+from phone_index import PhoneIndex
+from storage import open_store
+from tests.support import COLUMNS, StoreTestCase, record
+
+
+class PhoneIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = PhoneIndex.build([
+            ['1', '+7 (912) 345-67-89', ''],
+            ['2', '8 912 345 00 00', '8-495-111-22-33'],
+            ['3', '', '12-34'],
+        ], [1, 2])
+
+    def test_normalize(self):
+        self.assertEqual(PhoneIndex.normalize('+7 (912) 345-67-89'), '79123456789')
+        self.assertEqual(PhoneIndex.normalize('8 912 345-67-89'), '79123456789')
+        # only full russian numbers are changed
+        self.assertEqual(PhoneIndex.normalize('8-12-34'), '81234')
+        self.assertEqual(PhoneIndex.normalize('нет'), '')
+
+    def test_exact(self):
+        self.assertEqual(self.index.find('89123456789'), {'1'})
+        self.assertEqual(self.index.find('+7 912 345-00-00'), {'2'})
+        self.assertEqual(self.index.find('7912345'), set())
+        self.assertEqual(self.index.find(''), set())
+
+    def test_prefix_and_suffix(self):
+        self.assertEqual(self.index.find('+7 912', 'prefix'), {'1', '2'})
+        self.assertEqual(self.index.find('7495', 'prefix'), {'2'})
+        self.assertEqual(self.index.find('00-00', 'suffix'), {'2'})
+        self.assertEqual(self.index.find('34', 'suffix'), {'3'})
+
+    def test_changes(self):
+        self.index.update('3', ['', '12-34'], ['89990001122', ''])
+        self.assertEqual(self.index.find('1234', 'suffix'), set())
+        self.assertEqual(self.index.find('+79990001122'), {'3'})
+        self.index.remove('1', ['+7 (912) 345-67-89'])
+        self.index.add('4', ['+7 (912) 345-67-89'])
+        self.assertEqual(self.index.find('89123456789'), {'4'})
+
+
+class StorePhoneTest(StoreTestCase):
+    def test_eight_and_seven(self):
+        for extension in ['csv', 'pbk', 'db']:
+            with self.subTest(extension=extension):
+                store = self.new_store(f'phonebook.{extension}', [
+                    record(first_name='Анна', mobile='8 (912) 345-67-89'),
+                    record(first_name='Иван', work='+7 912 000-11-22'),
+                ])
+                self.assertEqual([found['Имя'] for found in store.find_by_phone('+79123456789')], ['Анна'])
+                self.assertEqual([found['Имя'] for found in store.find_by_phone('89120001122')], ['Иван'])
+                self.assertEqual(len(store.find_by_phone('7912', 'prefix')), 2)
+
+    def test_old_database_is_migrated(self):
+        store = self.new_store('phonebook.db', [record(first_name='Анна', mobile='8 (912) 345-67-89')])
+        store.close()
+        # digits stored as they were before numbers got canonical form
+        connection = sqlite3.connect(store.filename)
+        position = COLUMNS.index('Личный номер')
+        connection.execute(
+            f"UPDATE records SET digits{position} = '89123456789', reversed{position} = '98765432198'"
+        )
+        connection.execute('PRAGMA user_version = 0')
+        connection.commit()
+        connection.close()
+
+        migrated = open_store(store.filename, COLUMNS)
+        self.addCleanup(migrated.close)
+        self.assertEqual(len(migrated.find_by_phone('+7 912 345-67-89')), 1)
+        self.assertEqual(len(migrated.find_by_phone('89123456789')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from search_index import TokenIndex
+from storage import open_store
+from tests.support import COLUMNS, StoreTestCase, record
+
+
+class TokenIndexTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = TokenIndex.build([
+            ['1', 'Анна', 'Смирнова', 'ООО "Рога и копыта"'],
+            ['2', 'Иван', 'Смирнов', ''],
+            ['3', 'Иван', 'Иванов', 'Рога'],
+        ])
+
+    def test_prefix(self):
+        self.assertEqual(self.index.search('смир'), {'1', '2'})
+        self.assertEqual(self.index.search('СМИРНОВА'), {'1'})
+        self.assertEqual(self.index.search('ива'), {'2', '3'})
+        # only beginnings of words are matched
+        self.assertEqual(self.index.search('мирн'), set())
+        self.assertEqual(self.index.search('...'), set())
+
+    def test_all_terms(self):
+        self.assertEqual(self.index.search('иван смир'), {'2'})
+        self.assertEqual(self.index.search('рога, иван'), {'3'})
+        self.assertEqual(self.index.search('иван анна'), set())
+
+    def test_changes(self):
+        self.index.update('2', ['Иван', 'Смирнов', ''], ['Иван', 'Петров', ''])
+        self.assertEqual(self.index.search('смир'), {'1'})
+        self.assertEqual(self.index.search('петр'), {'2'})
+        self.index.remove('1', ['Анна', 'Смирнова', 'ООО "Рога и копыта"'])
+        self.assertEqual(self.index.search('смир'), set())
+        self.index.add('4', ['Анна'])
+        self.assertEqual(self.index.search('анна'), {'4'})
+
+    def test_save_and_load(self):
+        # numeric IDs are saved packed into arrays
+        filename = self.path('packed.idx')
+        self.index.save(filename, 'signature')
+        self.assertIsNone(TokenIndex.load(filename, 'other'))
+
+        loaded = TokenIndex.load(filename, 'signature')
+        self.assertIsNotNone(loaded._packed)
+        self.assertEqual(loaded.search('смир'), {'1', '2'})
+        # postings of saved index are changed after they are unpacked
+        loaded.remove('1', ['Смирнова'])
+        loaded.add('4', ['Рогов'])
+        self.assertEqual(loaded.search('смирнова'), set())
+        self.assertEqual(loaded.search('рог'), {'1', '3', '4'})
+
+        loaded.save(filename, 'changed')
+        self.assertEqual(TokenIndex.load(filename, 'changed').search('рог'), {'1', '3', '4'})
+
+        # other IDs are saved as they are
+        filename = self.path('strings.idx')
+        TokenIndex.build([['ab', 'Ольга'], ['007', 'Ольга']]).save(filename, 'signature')
+        self.assertEqual(TokenIndex.load(filename, 'signature').search('ольг'), {'ab', '007'})
+
+
+class StoreSearchTest(StoreTestCase):
+    def test_search(self):
+        for extension in ['csv', 'pbk', 'db']:
+            with self.subTest(extension=extension):
+                store = self.new_store(f'phonebook.{extension}', [
+                    record(first_name='Анна', surname='Смирнова'),
+                    record(first_name='Иван', surname='Смирнов', company='Рога'),
+                    record(first_name='Иван', surname='Иванов'),
+                ])
+                self.assertEqual([found['ИД'] for found in store.search('смир')], ['1', '2'])
+                self.assertEqual(store.search_ids('иван смир'), {'2'})
+                store.update('2', {'Фамилия': 'Петров'})
+                store.delete('1')
+                self.assertEqual(store.search('смир'), [])
+                store.close()
+
+                # index saved on close gives the same results
+                reopened = open_store(store.filename, COLUMNS)
+                self.addCleanup(reopened.close)
+                self.assertEqual([found['ИД'] for found in reopened.search('иван')], ['2', '3'])
+                self.assertEqual(reopened.search_ids('петр рога'), {'2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import os
+import json
+import asyncio
+import unittest
+from contextlib import redirect_stdout
+
+from phonebook import Phonebook
+from server import PhonebookServer
+from tests.support import COLUMNS, StoreTestCase, record
+
+
+@unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), 'unix sockets are not supported')
+class ServerTest(StoreTestCase, unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.new_store('phonebook.csv', [
+            record(first_name='Анна', surname='Смирнова', mobile='79161234567'),
+            record(first_name='Иван', surname='Смирнов'),
+        ]).close()
+        phonebook = Phonebook(self.path('phonebook.csv'), COLUMNS)
+        self.addCleanup(phonebook.store.close)
+
+        self.socket = self.path('phonebook.sock')
+        with redirect_stdout(io.StringIO()):
+            self.server = asyncio.create_task(PhonebookServer(phonebook, 0.01).serve(self.socket))
+            while not os.path.exists(self.socket):
+                await asyncio.sleep(0.01)
+
+    async def asyncTearDown(self):
+        self.server.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await self.server
+        self.assertFalse(os.path.exists(self.socket))
+
+    async def connect(self) -> tuple:
+        reader, writer = await asyncio.open_unix_connection(self.socket)
+        self.addCleanup(writer.close)
+        return reader, writer
+
+    async def request(self, connection: tuple, *lines) -> list:
+        """Sends lines of requests and returns their responses"""
+        reader, writer = connection
+        for line in lines:
+            if isinstance(line, dict):
+                line = json.dumps(line, ensure_ascii=False)
+            writer.write(line.encode('utf-8') + b'\n')
+        await writer.drain()
+        return [json.loads(await reader.readline()) for _ in lines]
+
+    async def test_lookups(self):
+        connection = await self.connect()
+        search, scan, get, phone = await self.request(
+            connection,
+            {'op': 'search', 'query': 'смирн иван'},
+            # index finds nothing, terms are looked for in any part of words
+            {'op': 'search', 'query': 'мирн'},
+            {'op': 'get', 'ids': ['2', 1, '7']},
+            {'op': 'phone', 'number': '4567', 'mode': 'suffix'},
+        )
+        self.assertEqual([found['ИД'] for found in search['result']], ['2'])
+        self.assertEqual([found['ИД'] for found in scan['result']], ['1', '2'])
+        self.assertEqual([found['Имя'] for found in get['result']], ['Иван', 'Анна'])
+        self.assertEqual(phone['result'][0]['Имя'], 'Анна')
+
+    async def test_writes(self):
+        first, second = await self.connect(), await self.connect()
+        # writes of both clients come in one batch and get IDs in order
+        added = await asyncio.gather(
+            self.request(first, {'op': 'add', 'record': {'Имя': 'Петр'}}),
+            self.request(second, {'op': 'add', 'record': {'Имя': 'Ольга'}}),
+        )
+        self.assertEqual(sorted(response[0]['result']['ИД'] for response in added), ['3', '4'])
+
+        edited, conflict, deleted, missing = await self.request(
+            first,
+            {'op': 'edit', 'id': '3', 'fields': {'Фамилия': 'Петров'}},
+            {'op': 'edit', 'id': '3', 'fields': {'Фамилия': 'Иванов'}, 'version': 1},
+            {'op': 'delete', 'id': 4},
+            {'op': 'delete', 'id': '4'},
+        )
+        self.assertEqual(edited['result']['Фамилия'], 'Петров')
+        self.assertEqual(conflict, {'ok': False, 'error': 'Запись была изменена другим пользователем'})
+        self.assertTrue(deleted['result'])
+        self.assertEqual(missing, {'ok': False, 'error': 'Запись не найдена'})
+
+    async def test_bad_requests(self):
+        connection = await self.connect()
+        responses = await self.request(
+            connection,
+            '{"op": "search"',
+            '["search"]',
+            {'op': 'drop'},
+            {'op': 'add', 'record': {'Имя': 'Петр', 'Город': 'Москва'}},
+            {'op': 'get', 'id': True},
+        )
+        self.assertEqual([response['ok'] for response in responses], [False] * 5)
+        self.assertEqual(responses[0]['error'], 'Некорректный JSON')
+        self.assertEqual(responses[2]['error'], 'Неизвестная операция: drop')
+        self.assertEqual(responses[3]['error'], 'Неизвестные поля: Город')
+
+    async def test_too_long_line(self):
+        connection = await self.connect()
+        query = 'а' * 100000
+        too_long, found = await self.request(
+            connection,
+            {'op': 'search', 'query': query},
+            {'op': 'get', 'id': '1'},
+        )
+        self.assertEqual(too_long, {'ok': False, 'error': 'Слишком длинный запрос'})
+        # connection is still served from start of next request
+        self.assertEqual(found['result']['Имя'], 'Анна')
+
+
+if __name__ == '__main__':
+    unittest.main()
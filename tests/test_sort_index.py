@@ -0,0 +1,73 @@
+import unittest
+
+from sort_index import SortIndex, sort_key
+from tests.support import StoreTestCase, record
+
+
+class SortIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.values = ['Петров', '', 'иванов', 'Иванов', 'Сидоров']
+        self.index = SortIndex.build(range(len(self.values)), self.key)
+
+    def key(self, position: int) -> tuple:
+        return sort_key([self.values[position]], position)
+
+    def test_build(self):
+        # case is ignored, empty values go last, equal values go by ID
+        self.assertEqual(self.index.slice(0, 10), [2, 3, 0, 4, 1])
+        self.assertEqual(self.index.slice(1, 2), [3, 0])
+        self.assertEqual(self.index.bisect(sort_key(['п'], ())[:1], self.key), 2)
+        self.assertEqual(self.index.bisect(sort_key(['я'], ())[:1], self.key), 4)
+
+    def test_changes(self):
+        old_key = self.key(4)
+        self.values[4] = 'Алексеев'
+        self.index.update(4, old_key, self.key)
+        self.assertEqual(self.index.slice(0, 10), [4, 2, 3, 0, 1])
+
+        # record is removed by key it had when it was inserted
+        old_key = self.key(0)
+        self.values[0] = 'Яковлев'
+        self.index.remove(0, old_key, self.key)
+        self.assertEqual(self.index.slice(0, 10), [4, 2, 3, 1])
+
+        self.values.append('Борисов')
+        self.index.add(5, self.key)
+        self.assertEqual(self.index.slice(0, 10), [4, 5, 2, 3, 1])
+        self.assertEqual(len(self.index), 5)
+
+
+class SortedPageTest(StoreTestCase):
+    surnames = ['Петров', '', 'иванов', 'Иванов', 'Сидоров', 'петрова', 'Абрамов', 'Щукин']
+
+    def expected(self, store, order: str) -> list:
+        """IDs of records sorted by all records, like base storage does"""
+        records = sorted(store.records(), key=lambda found: store._sort_key(order, found))
+        return [found['ИД'] for found in records]
+
+    def test_pages(self):
+        for extension in ['csv', 'pbk', 'db']:
+            with self.subTest(extension=extension):
+                store = self.new_store(f'phonebook.{extension}', [
+                    record(first_name=f'Имя{number}', surname=surname, company='Рога' if number % 2 else '')
+                    for number, surname in enumerate(self.surnames)
+                ])
+                store.sorted_page('surname', 0, 1)
+                store.update('3', {'Фамилия': 'Яковлев'})
+                store.delete('7')
+                store.add(record(first_name='Иван', surname='Борисов'))
+
+                for order in ['id', 'surname', 'company']:
+                    expected = self.expected(store, order)
+                    pages = [store.sorted_page(order, start, 3) for start in range(0, len(expected), 3)]
+                    self.assertEqual([found['ИД'] for page in pages for found in page], expected)
+
+                self.assertEqual(store.sorted_page('surname', 0, 3)[0]['Фамилия'], 'Борисов')
+                self.assertEqual(store.sorted_position('surname', 'п'), 2)
+                self.assertEqual(store.sorted_position('surname', 'ПЕТРОВА'), 3)
+                self.assertEqual(store.sorted_position('surname', 'ю'), 6)
+                self.assertEqual(store.sorted_position('id', '5'), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from storage import convert, open_store
+from tests.support import COLUMNS, StoreTestCase, make_records, record
+
+
+class SqliteStoreTest(StoreTestCase):
+    def test_search_and_phone_lookup(self):
+        store = self.new_store('phonebook.db', [
+            record(first_name='Анна', surname='Смирнова', work='+7 (495) 123-45-67'),
+            record(first_name='Иван', surname='Смирнов', company='Рога и копыта'),
+            record(first_name='Петр', surname='Иванов', mobile='8 916 000-11-22'),
+        ])
+        self.assertEqual([found['ИД'] for found in store.search('смир')], ['1', '2'])
+        self.assertEqual([found['ИД'] for found in store.search('смир иван')], ['2'])
+        self.assertEqual(store.find_by_phone('74951234567')[0]['Имя'], 'Анна')
+        self.assertEqual(store.find_by_phone('1122', 'suffix')[0]['Имя'], 'Петр')
+
+    def test_changes(self):
+        store = self.new_store('phonebook.db', make_records(3))
+        self.assertTrue(store.update('2', {'Компания': 'Новая'}))
+        self.assertTrue(store.delete('3'))
+        self.assertFalse(store.delete('3'))
+        self.assertEqual(store.get('2')['Компания'], 'Новая')
+        self.assertEqual(store.add(make_records(1)[0])['ИД'], '4')
+        self.assertEqual(store.count(), 3)
+
+
+class ConvertTest(StoreTestCase):
+    def test_round_trip(self):
+        store = self.new_store('phonebook.csv', make_records(50))
+        store.delete('5')
+        store.update('7', {'Компания': ''})
+        expected = store.records()
+        store.close()
+
+        names = ['phonebook.csv', 'phonebook.pbk', 'phonebook.db', 'copy.csv']
+        for source, target in zip(names, names[1:]):
+            with self.subTest(target=target):
+                self.assertEqual(convert(self.path(source), self.path(target), COLUMNS), 49)
+                converted = open_store(self.path(target), COLUMNS)
+                self.addCleanup(converted.close)
+                self.assertEqual(converted.records(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()